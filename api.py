@@ -1,51 +1,32 @@
 #!/usr/bin/env python3
 """Zoning Intelligence API Server - FastAPI wrapper around zoning.py CLI."""
-import json
-import sys
 import time
-from pathlib import Path
-from typing import Optional, Tuple
+from datetime import date
+from typing import List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from pydantic import BaseModel
 import uvicorn
 
-from parsers.geo import load_geofile, find_parcel_by_apn, find_nearest_parcel
-from parsers.pdf import get_citation_snippet
-from parsers.llm import parse_pdf_with_llm
-from engine.geom import intersect_zone, detect_overlays, is_corner_lot
-from engine.apply_rules import load_rules, get_zone_rules, apply_zone_rules, get_overlay_rules, get_crs_config
-from engine.schemas import create_output_schema, validate_output_schema
-# Telemetry stubs (if module doesn't exist)
-try:
-    from engine.telemetry import (
-        emit_metrics,
-        incr,
-        log,
-        set_gauge,
-        start_timer,
-        stop_timer,
-    )
-except ImportError:
-    # Stub telemetry functions if module doesn't exist
-    def emit_metrics(*args, **kwargs): pass
-    def incr(*args, **kwargs): pass
-    def log(*args, **kwargs): pass
-    def set_gauge(*args, **kwargs): pass
-    def start_timer(*args, **kwargs): return 0
-    def stop_timer(*args, **kwargs): return 0
-
-# Jurisdiction configuration
-JURISDICTIONS = {
-    "austin": {
-        "parcel_layer": "data/austin/parcels.geojson",
-        "zoning_layer": "data/austin/zoning.geojson",
-        "overlay_layers": {},
-        "code_pdfs": [],
-        "rules_file": "rules/austin.yaml"
-    }
-}
+from parsers.geo import find_parcel_by_apn, locate_parcel, normalize_apn
+from engine.geom import intersect_zone_shares, detect_overlays, is_corner_lot
+from engine.schemas import create_output_schema, validate_output_schema, format_jurisdiction_name
+from engine.batch import resolve_batch
+from engine.envelope import compute_envelope, envelope_summary
+from engine.precedence import parcel_answers, current_answer_table, INTENTS
+from engine.executor import ZoningExecutor, ExecutorSaturated
+from engine.dataset import get_jurisdiction_data, preload_jurisdictions
+from engine.jurisdictions import resolve_jurisdiction, resolve_batch_any
+from engine.search import search_code, parse_query, DEFAULT_LIMIT, MAX_LIMIT
+from engine.telemetry import request_span, span
+
+# Upper bound on items per POST /zoning/batch call
+MAX_BATCH_ITEMS = 500_000
+
+# Worker pool for the blocking geo pipeline (sized via ZONING_EXECUTOR_WORKERS)
+executor = ZoningExecutor.from_env()
 
 app = FastAPI(title="Zoning Intelligence API", version="1.0.0")
 
@@ -59,109 +40,109 @@ app.add_middleware(
 )
 
 
-def load_jurisdiction_data(city: str, data_dir: str, verbose: bool = False):
-    """Load all data layers for jurisdiction."""
-    if city not in JURISDICTIONS:
-        raise ValueError(f"Unknown jurisdiction: {city}")
-    
-    config = JURISDICTIONS[city]
-    base_path = Path(data_dir)
-    
-    # Load rules
-    rules_path = base_path / config["rules_file"]
-    rules = load_rules(str(rules_path))
-    crs_config = get_crs_config(rules)
-    
-    # Load parcel layer
-    parcel_path = base_path / config["parcel_layer"]
-    parcels = load_geofile(str(parcel_path), target_crs=crs_config["internal"])
-    
-    # Load zoning layer
-    zoning_path = base_path / config["zoning_layer"]
-    zoning = load_geofile(str(zoning_path), target_crs=crs_config["internal"])
-    
-    # Load overlay layers
-    overlay_gdfs = {}
-    for overlay_name, overlay_path in config.get("overlay_layers", {}).items():
-        overlay_full_path = base_path / overlay_path
-        if overlay_full_path.exists():
-            overlay_gdfs[overlay_name] = load_geofile(str(overlay_full_path), target_crs=crs_config["internal"])
-    
-    return {
-        "rules": rules,
-        "crs_config": crs_config,
-        "parcels": parcels,
-        "zoning": zoning,
-        "overlay_gdfs": overlay_gdfs,
-        "config": config,
-        "base_path": base_path
-    }
-
+def find_parcel(data: dict, apn: Optional[str], lat_lng: Optional[Tuple[float, float]], verbose: bool = False,
+                max_distance: Optional[float] = None):
+    """
+    Find parcel by APN or lat/lng.
 
-def find_parcel(data: dict, apn: Optional[str], lat_lng: Optional[Tuple[float, float]], verbose: bool = False):
-    """Find parcel by APN or lat/lng."""
+    Returns:
+        Tuple of (parcel, APN, match info); match info is None for APN lookups
+    """
     parcels = data["parcels"]
     crs_config = data["crs_config"]
     
     if apn:
-        parcel = find_parcel_by_apn(parcels, apn)
+        parcel = find_parcel_by_apn(parcels, apn, index=data.get("apn_index"))
         if parcel is None:
             raise ValueError(f"Parcel not found for APN: {apn}")
-        return parcel, apn
+        return parcel, parcel.get("APN", apn), None
     else:
         lat, lng = lat_lng
-        parcel = find_nearest_parcel(parcels, lat, lng, 
-                                    source_crs=crs_config["input"],
-                                    target_crs=crs_config["internal"])
-        if parcel is None:
+        if max_distance is None:
+            max_distance = data.get("lookup_config", {}).get("max_snap_distance_ft")
+        position, match = locate_parcel(parcels, lat, lng,
+                                        source_crs=crs_config["input"],
+                                        target_crs=crs_config["internal"],
+                                        max_distance=max_distance)
+        if position is None:
+            if max_distance is not None:
+                raise ValueError(f"No parcel found within {max_distance} ft of {lat},{lng}")
             raise ValueError(f"No parcel found near {lat},{lng}")
+        parcel = parcels.iloc[position]
         # Get APN from parcel
         apn = parcel.get("APN", "UNKNOWN")
-        return parcel, apn
+        return parcel, apn, match
 
 
 def get_zoning_data(apn: Optional[str] = None, latitude: Optional[float] = None, 
-                    longitude: Optional[float] = None, city: str = "austin", 
-                    data_dir: str = ".", verbose: bool = False, offline: bool = False):
+                    longitude: Optional[float] = None, city: Optional[str] = None, 
+                    data_dir: str = ".", verbose: bool = False, offline: bool = False,
+                    max_distance_ft: Optional[float] = None, trace: bool = False):
     """Get zoning data for a parcel - extracted from zoning.py logic."""
     start_time = time.time()
     
-    # Load jurisdiction data
-    data = load_jurisdiction_data(city, data_dir, verbose)
-    
-    # Find parcel
-    lat_lng = None
-    if latitude is not None and longitude is not None:
-        lat_lng = (latitude, longitude)
-    
-    parcel, parcel_apn = find_parcel(data, apn, lat_lng, verbose)
-    
-    # Get zone
-    zone = intersect_zone(parcel, data["zoning"])
-    if zone is None:
-        zone = "UNKNOWN"
-    
-    # Get zone rules
-    zone_rules = get_zone_rules(data["rules"], zone)
-    if zone_rules is None:
-        raise ValueError(f"No rules found for zone: {zone}")
+    # Resolve the jurisdiction from the APN or point when not given
+    if city is None:
+        city = resolve_jurisdiction(data_dir, apn=apn, lat_lng=None if apn else (latitude, longitude))
     
-    # Detect corner lot
-    corner_lot = is_corner_lot(parcel)
+    # Get warm jurisdiction data (loaded once, reloaded when source files change)
+    with span("data_load"):
+        data = get_jurisdiction_data(city, data_dir)
     
-    # Apply zone rules (note: apply_zone_rules takes zone_rules dict and is_corner_lot bool)
-    zone_constraints = apply_zone_rules(zone_rules, corner_lot)
+    # Find parcel
+    with span("parcel_lookup"):
+        lat_lng = None
+        if latitude is not None and longitude is not None:
+            lat_lng = (latitude, longitude)
+        
+        # APN lookups are a keyed read on the precomputed join table when available
+        joined = None
+        parcel_match = None
+        if apn and data.get("parcel_join") is not None:
+            joined = data["parcel_join"].lookup(apn)
+        
+        if joined is not None:
+            parcel_apn = joined["apn"]
+            zone = joined["zone"]
+            zone_fractions = joined["zone_fractions"]
+            corner_lot = joined["corner_lot"]
+            overlays = joined["overlays"]
+        else:
+            parcel, parcel_apn, parcel_match = find_parcel(data, apn, lat_lng, verbose, max_distance=max_distance_ft)
+            
+            # Get zone (dominant by area) and per-zone area fractions
+            zone, zone_fractions = intersect_zone_shares(parcel, data["zoning"])
+            if zone is None:
+                zone = "UNKNOWN"
+            
+            # Detect corner lot
+            corner_lot = is_corner_lot(parcel, data["street_buffer_ft"], streets=data["streets"])
+            
+            # Detect overlays
+            overlays = detect_overlays(parcel, data["overlay_layer"])
     
-    # Detect overlays
-    overlays = detect_overlays(parcel, data["overlay_gdfs"])
-    overlay_rules = get_overlay_rules(data["rules"], overlays)
+    # Apply zone rules (precompiled per zone and corner-lot case)
+    with span("rules_application"):
+        zone_constraints = data["rules_table"].constraints(zone, corner_lot)
+        if zone_constraints is None:
+            raise ValueError(f"No rules found for zone: {zone}")
+        overlay_notes = data["rules_table"].overlay_notes(overlays)
+        
+        # Buildable envelope on the parcel polygon
+        attributes = parcel if joined is None else None
+        if joined is not None:
+            parcel = data["parcels"].geometry.values[joined["position"]]
+        envelope = envelope_summary(compute_envelope(parcel, zone_constraints))
+        
+        # Rule answers merged with overlay, exception and override adjustments
+        answers = parcel_answers(data, zone, overlays, corner_lot, parcel_apn, attributes,
+                                 trace_jurisdiction=city if trace else None)
     
     # Build notes
     notes_parts = []
     if corner_lot:
         notes_parts.append("Corner lot; street-side setback applied")
-    if overlay_rules.get("notes"):
-        notes_parts.extend(overlay_rules["notes"])
+    notes_parts.extend(overlay_notes)
     notes = "; ".join(notes_parts) if notes_parts else ""
     
     # Get PDF citations (stub for MVP)
@@ -170,48 +151,115 @@ def get_zoning_data(apn: Optional[str] = None, latitude: Optional[float] = None,
     ]
     
     # Format jurisdiction
-    jurisdiction_raw = data["rules"].get("jurisdiction", city)
-    if "_" in jurisdiction_raw:
-        parts = jurisdiction_raw.split("_")
-        jurisdiction_name = f"{parts[0].title()}, {parts[1].upper()}"
-    else:
-        jurisdiction_name = jurisdiction_raw.title()
+    jurisdiction_name = format_jurisdiction_name(data["rules"].get("jurisdiction", city))
     
     # Build output
-    run_ms = (time.time() - start_time) * 1000
-    output = create_output_schema(
-        apn=parcel_apn,
-        jurisdiction=jurisdiction_name,
-        zone=zone,
-        setbacks_ft=zone_constraints["setbacks_ft"],
-        height_ft=zone_constraints["height_ft"],
-        far=zone_constraints["far"],
-        lot_coverage_pct=zone_constraints["lot_coverage_pct"],
-        overlays=overlays,
-        sources=sources,
-        notes=notes,
-        run_ms=run_ms
-    )
+    with span("output_write"):
+        run_ms = (time.time() - start_time) * 1000
+        output = create_output_schema(
+            apn=parcel_apn,
+            jurisdiction=jurisdiction_name,
+            zone=zone,
+            setbacks_ft=zone_constraints["setbacks_ft"],
+            height_ft=zone_constraints["height_ft"],
+            far=zone_constraints["far"],
+            lot_coverage_pct=zone_constraints["lot_coverage_pct"],
+            overlays=overlays,
+            sources=sources,
+            notes=notes,
+            run_ms=run_ms,
+            parcel_match=parcel_match,
+            zone_fractions=zone_fractions,
+            envelope=envelope,
+            answers=answers
+        )
+        
+        # Validate output
+        if not validate_output_schema(output):
+            raise ValueError("Output schema validation failed")
     
-    # Validate output
-    if not validate_output_schema(output):
-        raise ValueError("Output schema validation failed")
+    return output
+
+
+def get_zoning_data_timed(**kwargs):
+    """
+    get_zoning_data with its stage spans collected into a per-request span tree.
     
+    The tree is attached as "timings".
+    """
+    with request_span("zoning") as root:
+        output = get_zoning_data(**kwargs)
+    output["timings"] = root.to_dict()
     return output
 
 
+def get_answer_payload(zone: str, intent: str, corner_lot: bool = False, city: str = "austin",
+                       data_dir: str = ".") -> bytes:
+    """Get one precomputed {zone, intent, corner} answer as JSON bytes."""
+    data = get_jurisdiction_data(city, data_dir)
+    payload = current_answer_table(data, city).payload(zone, intent, corner_lot)
+    if payload is None:
+        raise ValueError(f"No answer for zone {zone}: {intent}")
+    return payload
+
+
+def get_answer_trace(answer_id: str, apn: Optional[str] = None, latitude: Optional[float] = None,
+                     longitude: Optional[float] = None, city: Optional[str] = None, data_dir: str = ".",
+                     max_distance_ft: Optional[float] = None):
+    """
+    Get the trace for one of a parcel's merged answers.
+
+    A parcel's traces are built together on first request and cached with
+    the dataset, so they are dropped whenever the layers, rules or
+    adjustment configs are reloaded.
+    """
+    if city is None:
+        city = resolve_jurisdiction(data_dir, apn=apn, lat_lng=None if apn else (latitude, longitude))
+    data = get_jurisdiction_data(city, data_dir)
+    if apn:
+        key = ("apn", normalize_apn(apn), max_distance_ft, date.today())
+    else:
+        key = ("point", latitude, longitude, max_distance_ft, date.today())
+    traces = data["trace_cache"].get(key, lambda: {
+        answer["answer_id"]: answer["trace"]
+        for answer in get_zoning_data(apn=apn, latitude=latitude, longitude=longitude, city=city,
+                                      data_dir=data_dir, max_distance_ft=max_distance_ft,
+                                      trace=True).get("answers") or []
+    })
+    if traces.get(answer_id) is None:
+        raise ValueError(f"No trace for answer: {answer_id}")
+    return traces[answer_id]
+
+
+@app.on_event("startup")
+async def warm_datasets():
+    """Load configured jurisdiction datasets before serving requests."""
+    preload_jurisdictions(".")
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
 
 
+@app.get("/executor/stats")
+async def executor_stats():
+    """Worker pool size, queue depth and queue wait times."""
+    return executor.stats()
+
+
 @app.get("/zoning")
 async def get_zoning(
     apn: Optional[str] = Query(None, description="Assessor's Parcel Number"),
     latitude: Optional[float] = Query(None, description="Latitude"),
     longitude: Optional[float] = Query(None, description="Longitude"),
-    city: str = Query("austin", description="City/jurisdiction"),
+    city: Optional[str] = Query(None, description="City/jurisdiction (resolved from the APN or coordinates if omitted)"),
+    max_distance_ft: Optional[float] = Query(
+        None, ge=0, description="Max snap distance (ft) for points outside every parcel"
+    ),
+    trace: bool = Query(False, description="Include step-by-step traces in answers"),
+    timings: bool = Query(False, description="Include the request's span tree (stage timings)"),
 ):
     """
     Get zoning information for a parcel.
@@ -231,18 +279,114 @@ async def get_zoning(
         )
     
     try:
-        result = get_zoning_data(
+        result = await executor.run(
+            get_zoning_data_timed if timings else get_zoning_data,
             apn=apn,
             latitude=latitude,
             longitude=longitude,
-            city=city.lower(),
+            city=city.lower() if city else None,
             data_dir=".",
             verbose=False,
-            offline=False
+            offline=False,
+            max_distance_ft=max_distance_ft,
+            trace=trace
         )
         
         return result
         
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Configuration error: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.get("/answers")
+async def get_answer(
+    zone: str = Query(..., description="Zoning district, e.g. SF-3"),
+    intent: str = Query(..., description="One of " + ", ".join(INTENTS)),
+    corner_lot: bool = Query(False, description="Answer for a corner lot"),
+    city: str = Query("austin", description="City/jurisdiction"),
+):
+    """
+    Get a single answer (value, unit, rationale, citations) for a zone and intent.
+    
+    Served from the answer table precomputed when the rules load.
+    """
+    if intent not in INTENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown intent: {intent} (expected one of {', '.join(INTENTS)})"
+        )
+    
+    try:
+        payload = await executor.run(
+            get_answer_payload,
+            zone,
+            intent,
+            corner_lot=corner_lot,
+            city=city.lower(),
+            data_dir="."
+        )
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Configuration error: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return Response(content=payload, media_type="application/json")
+
+
+@app.get("/zoning/trace")
+async def get_zoning_trace(
+    answer_id: str = Query(..., description="Answer id, e.g. SF-3:front_setback"),
+    apn: Optional[str] = Query(None, description="Assessor's Parcel Number"),
+    latitude: Optional[float] = Query(None, description="Latitude"),
+    longitude: Optional[float] = Query(None, description="Longitude"),
+    city: Optional[str] = Query(None, description="City/jurisdiction (resolved from the APN or coordinates if omitted)"),
+    max_distance_ft: Optional[float] = Query(
+        None, ge=0, description="Max snap distance (ft) for points outside every parcel"
+    ),
+):
+    """
+    Get the step-by-step trace for one answer of a parcel.
+    
+    Either APN or latitude/longitude must be provided.
+    """
+    if not apn and (latitude is None or longitude is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Either 'apn' or both 'latitude' and 'longitude' must be provided"
+        )
+    
+    if apn and (latitude is not None or longitude is not None):
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot specify both 'apn' and 'latitude'/'longitude'"
+        )
+    
+    try:
+        return await executor.run(
+            get_answer_trace,
+            answer_id,
+            apn=apn,
+            latitude=latitude,
+            longitude=longitude,
+            city=city.lower() if city else None,
+            data_dir=".",
+            max_distance_ft=max_distance_ft
+        )
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=500, detail=f"Configuration error: {str(e)}")
     except ValueError as e:
@@ -253,5 +397,110 @@ async def get_zoning(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.get("/search")
+async def search(
+    q: str = Query(..., description='Search terms; "quoted text" matches as a phrase'),
+    city: str = Query("austin", description="City/jurisdiction"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Max results"),
+):
+    """
+    Full-text search over the jurisdiction's code PDFs, best matches first.
+    
+    Each result has the section citation, page and a snippet.
+    """
+    try:
+        parse_query(q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    start_time = time.time()
+    try:
+        results = await executor.run(search_code, city.lower(), q, ".", limit)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Configuration error: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    return {
+        "query": q,
+        "count": len(results),
+        "results": results,
+        "run_ms": (time.time() - start_time) * 1000
+    }
+
+
+class BatchItem(BaseModel):
+    """One parcel to resolve: either an APN or a lat/lng pair."""
+    apn: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class BatchRequest(BaseModel):
+    """Body for POST /zoning/batch (city resolved per item if omitted)."""
+    city: Optional[str] = None
+    items: List[BatchItem]
+    max_distance_ft: Optional[float] = None
+    trace: bool = False
+
+
+@app.post("/zoning/batch")
+async def get_zoning_batch(request: BatchRequest):
+    """
+    Get zoning information for many parcels in one call.
+    
+    Items are resolved together; per-item errors are returned inline.
+    """
+    if len(request.items) == 0:
+        raise HTTPException(status_code=400, detail="'items' must not be empty")
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {MAX_BATCH_ITEMS})"
+        )
+    
+    start_time = time.time()
+    city = request.city.lower() if request.city else None
+    try:
+        items = [
+            {"apn": item.apn, "latitude": item.latitude, "longitude": item.longitude}
+            for item in request.items
+        ]
+        if city is None:
+            results = await executor.run(
+                lambda: resolve_batch_any(items, ".", max_distance=request.max_distance_ft,
+                                          trace=request.trace)
+            )
+        else:
+            results = await executor.run(
+                lambda: resolve_batch(get_jurisdiction_data(city, "."), items, city,
+                                      max_distance=request.max_distance_ft, trace=request.trace)
+            )
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Configuration error: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    errors = sum(1 for result in results if not result["ok"])
+    return {
+        "count": len(results),
+        "errors": errors,
+        "results": results,
+        "run_ms": (time.time() - start_time) * 1000
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,7 +1,36 @@
 """Rule engine: YAML loading, zone matching, overlay merging."""
 import yaml
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+from engine.cache import FileBackedCache
+
+
+# libyaml-backed loader when available (same safe subset, much faster)
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Answer intent -> (path into the zone rules, unit)
+RULE_INTENTS = {
+    "front_setback": (("setbacks_ft", "front"), "ft"),
+    "side_setback": (("setbacks_ft", "side"), "ft"),
+    "rear_setback": (("setbacks_ft", "rear"), "ft"),
+    "max_height": (("height_ft",), "ft"),
+    "lot_coverage": (("lot_coverage_pct",), "percent"),
+    "min_lot_size": (("min_lot_size_sqft",), "sqft"),
+}
+
+INTENT_LABELS = {
+    "front_setback": "Minimum front yard setback",
+    "side_setback": "Minimum interior side yard setback",
+    "rear_setback": "Minimum rear yard setback",
+    "max_height": "Maximum building height",
+    "lot_coverage": "Maximum lot coverage",
+    "min_lot_size": "Minimum lot size",
+}
+
+# Compiled rule tables keyed by resolved rules file path
+_rule_tables = FileBackedCache()
 
 
 def load_rules(rules_file: str) -> Dict[str, Any]:
@@ -11,7 +40,7 @@ def load_rules(rules_file: str) -> Dict[str, Any]:
         raise FileNotFoundError(f"Rules file not found: {rules_file}")
     
     with open(path, 'r') as f:
-        rules = yaml.safe_load(f)
+        rules = yaml.load(f, Loader=_YamlLoader)
     
     # Validate required fields
     if 'version' not in rules:
@@ -92,3 +121,130 @@ def get_crs_config(rules: Dict[str, Any]) -> Dict[str, str]:
         "internal": crs_config.get("internal", "EPSG:2277")
     }
 
+
+def get_lookup_config(rules: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Get parcel lookup configuration from rules file."""
+    lookup_config = rules.get('parcel_lookup', {})
+    return {
+        "max_snap_distance_ft": lookup_config.get("max_snap_distance_ft")
+    }
+
+
+def get_rule_answer(rules: Dict[str, Any], zone_code: str, intent: str) -> Optional[Dict[str, Any]]:
+    """
+    District rule answer for one intent of a zone.
+
+    Returns dict with value, unit, rationale and citations (from the zone's
+    code_section and the rules file's citations block), or None if the zone
+    rules do not set the intent.
+    """
+    zone_rules = get_zone_rules(rules, zone_code)
+    path, unit = RULE_INTENTS[intent]
+    value: Any = zone_rules
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        value = value[key]
+
+    citations = []
+    citation_config = rules.get('citations') or {}
+    if zone_rules.get("code_section") and citation_config.get("code_id"):
+        citation = {"code_id": citation_config["code_id"], "section": str(zone_rules["code_section"])}
+        anchor = (citation_config.get("anchors") or {}).get(intent)
+        if anchor:
+            citation["anchor"] = anchor
+        citations.append(citation)
+    return {
+        "value": value,
+        "unit": unit,
+        "rationale": f"{INTENT_LABELS[intent]} for {zone_code}",
+        "citations": citations,
+    }
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only view of nested dicts (lists become tuples)."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class RulesTable:
+    """
+    Rules compiled into immutable lookup tables.
+
+    Zone constraints are precomputed for both the corner and non-corner case
+    (exactly as apply_zone_rules would build them), as is the rule answer for
+    every intent; overlay notes are keyed by normalized overlay name, so rule
+    application is a dict read.
+    """
+
+    __slots__ = ("rules", "_constraints", "_rule_answers", "_overlay_notes")
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.rules = rules
+        constraints = {}
+        for zone_code, zone_rules in (rules.get('zones') or {}).items():
+            for corner in (False, True):
+                constraints[(zone_code, corner)] = _freeze(apply_zone_rules(zone_rules, corner))
+        self._constraints: Mapping[Tuple[str, bool], Mapping[str, Any]] = MappingProxyType(constraints)
+
+        rule_answers = {}
+        for zone_code in (rules.get('zones') or {}):
+            for intent in RULE_INTENTS:
+                answer = get_rule_answer(rules, zone_code, intent)
+                if answer is not None:
+                    rule_answers[(zone_code, intent)] = _freeze(answer)
+        self._rule_answers: Mapping[Tuple[str, str], Mapping[str, Any]] = MappingProxyType(rule_answers)
+
+        overlay_notes = {}
+        for overlay_key, overlay_rule in (rules.get('overlays') or {}).items():
+            note = (overlay_rule.get("rules") or {}).get("notes") if overlay_rule else None
+            if note is not None:
+                overlay_notes[overlay_key] = note
+        self._overlay_notes: Mapping[str, Any] = MappingProxyType(overlay_notes)
+
+    def constraints(self, zone_code: str, is_corner_lot: bool = False) -> Optional[Mapping[str, Any]]:
+        """Precomputed apply_zone_rules result for a zone, or None if the zone has no rules."""
+        return self._constraints.get((zone_code, bool(is_corner_lot)))
+
+    def rule_answer(self, zone_code: str, intent: str) -> Optional[Mapping[str, Any]]:
+        """Precomputed get_rule_answer result, or None if the zone does not set the intent."""
+        return self._rule_answers.get((zone_code, intent))
+
+    def overlay_notes(self, overlay_names: List[str]) -> List[str]:
+        """Notes for the given overlays, as in get_overlay_rules."""
+        notes = []
+        for overlay_name in overlay_names:
+            note = self._overlay_notes.get(overlay_name.lower().replace(" ", "_"))
+            if note is not None:
+                notes.append(note)
+        return notes
+
+    def zone_codes(self) -> List[str]:
+        """Zone codes with rules."""
+        return sorted({zone_code for zone_code, _ in self._constraints})
+
+
+def compile_rules(rules: Dict[str, Any]) -> RulesTable:
+    """Compile loaded rules into a RulesTable."""
+    return RulesTable(rules)
+
+
+def load_rules_table(rules_file: str) -> RulesTable:
+    """
+    Load and compile a rules file, cached per file.
+
+    The cached table is reused until the file's mtime/size changes and its
+    content hash differs.
+    """
+    path = Path(rules_file)
+    if not path.exists():
+        raise FileNotFoundError(f"Rules file not found: {rules_file}")
+    return _rule_tables.get(
+        str(path.resolve()),
+        [path],
+        lambda: compile_rules(load_rules(str(path))),
+    )
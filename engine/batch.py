@@ -0,0 +1,199 @@
+"""Batch zoning resolution: one vectorized spatial join per batch instead of per parcel."""
+import time
+from typing import Any, Dict, List, Optional
+
+import geopandas as gpd
+import numpy as np
+
+from parsers.geo import ApnIndex, build_apn_index, locate_parcels
+from engine.geom import assign_zone_shares, assign_overlays, assign_corner_lots, CORNER_LOT_FIELD
+from engine.envelope import compute_envelopes, constraint_arrays, envelope_summary
+from engine.precedence import lot_context
+from engine.schemas import create_output_schema, format_jurisdiction_name
+
+
+def _error(index: int, message: str) -> Dict[str, Any]:
+    return {"index": index, "ok": False, "error": message}
+
+
+def lookup_apns(parcels: gpd.GeoDataFrame, apns: List[str], apn_field: str = "APN",
+                index: Optional[ApnIndex] = None) -> np.ndarray:
+    """
+    Resolve APNs to parcel row positions in one vectorized lookup.
+
+    Returns:
+        Array of row positions, -1 where the APN is not found
+    """
+    if len(apns) == 0:
+        return np.empty(0, dtype=np.intp)
+    if index is None:
+        index = build_apn_index(parcels, apn_field)
+    return index.get_many(apns)
+
+
+def resolve_batch(data: Dict[str, Any], items: List[Dict[str, Any]], city: str,
+                  apn_field: str = "APN", max_distance: Optional[float] = None,
+                  trace: bool = False) -> List[Dict[str, Any]]:
+    """
+    Resolve zoning for a batch of APNs and/or lat/lng points.
+
+    Parcel lookup, zone intersection, overlay detection and rule application
+    each run once over the whole batch. Per-item failures are returned inline.
+
+    Args:
+        data: Jurisdiction dataset (see engine.dataset.load_jurisdiction_data)
+        items: Dicts with either "apn" or both "latitude" and "longitude"
+        city: Jurisdiction name (used for map citation)
+        apn_field: Parcel APN column
+        max_distance: Max snap distance (ft) for points outside every parcel
+            (default: the jurisdiction's parcel_lookup config)
+        trace: Attach a step-by-step trace to each merged answer
+
+    Returns:
+        List (same order as items) of {"index", "ok", "result"} or
+        {"index", "ok", "error"} dicts
+    """
+    start_time = time.time()
+    parcels = data["parcels"]
+    crs_config = data["crs_config"]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    positions = np.full(len(items), -1, dtype=np.intp)
+
+    # Classify input
+    apn_items, point_items = [], []
+    for i, item in enumerate(items):
+        apn = item.get("apn")
+        lat, lng = item.get("latitude"), item.get("longitude")
+        if apn and (lat is not None or lng is not None):
+            results[i] = _error(i, "Cannot specify both 'apn' and 'latitude'/'longitude'")
+        elif apn:
+            apn_items.append(i)
+        elif lat is not None and lng is not None:
+            point_items.append(i)
+        else:
+            results[i] = _error(i, "Either 'apn' or both 'latitude' and 'longitude' must be provided")
+
+    # Parcel lookup
+    if apn_items:
+        positions[apn_items] = lookup_apns(parcels, [items[i]["apn"] for i in apn_items], apn_field,
+                                           index=data.get("apn_index"))
+    match_methods = np.full(len(items), None, dtype=object)
+    snap_distances = np.full(len(items), np.nan)
+    if max_distance is None:
+        max_distance = data.get("lookup_config", {}).get("max_snap_distance_ft")
+    if point_items:
+        positions[point_items], match_methods[point_items], snap_distances[point_items] = locate_parcels(
+            parcels,
+            [items[i]["latitude"] for i in point_items],
+            [items[i]["longitude"] for i in point_items],
+            source_crs=crs_config["input"],
+            target_crs=crs_config["internal"],
+            max_distance=max_distance,
+        )
+    for i in apn_items:
+        if positions[i] < 0:
+            results[i] = _error(i, f"Parcel not found for APN: {items[i]['apn']}")
+    for i in point_items:
+        if positions[i] < 0:
+            lat_lng = f"{items[i]['latitude']},{items[i]['longitude']}"
+            if max_distance is not None:
+                results[i] = _error(i, f"No parcel found within {max_distance} ft of {lat_lng}")
+            else:
+                results[i] = _error(i, f"No parcel found near {lat_lng}")
+
+    # Spatial work runs once per distinct parcel
+    found = positions >= 0
+    unique_positions, inverse = np.unique(positions[found], return_inverse=True)
+    parcel_join = data.get("parcel_join")
+    if parcel_join is not None and len(parcel_join) == len(parcels):
+        # Precomputed join table: no geometry work
+        zones = [parcel_join.zones[p] or "UNKNOWN" for p in unique_positions]
+        zone_splits = {u: parcel_join.zone_splits[p] for u, p in enumerate(unique_positions.tolist())
+                       if p in parcel_join.zone_splits}
+        overlays = [parcel_join.overlays[p] for p in unique_positions]
+        corners = parcel_join.corner_lots[unique_positions]
+    else:
+        geom_array = np.asarray(parcels.geometry.values[unique_positions])
+        zones, zone_splits = assign_zone_shares(geom_array, data["zoning"])
+        overlays = assign_overlays(geom_array, data["overlay_layer"])
+        if CORNER_LOT_FIELD in parcels.columns:
+            corners = parcels[CORNER_LOT_FIELD].to_numpy()[unique_positions]
+        else:
+            corners = assign_corner_lots(geom_array, data.get("streets"), data.get("street_buffer_ft", 10.0))
+    apn_values = parcels[apn_field].to_numpy()[unique_positions] if apn_field in parcels.columns else None
+
+    # Rule application is a lookup in the compiled rules table; notes run once per overlay set
+    rules = data["rules"]
+    rules_table = data["rules_table"]
+    notes_memo: Dict[tuple, List[str]] = {}
+    parcel_constraints = [
+        rules_table.constraints(zones[u] if zones[u] is not None else "UNKNOWN", bool(corners[u]))
+        for u in range(len(unique_positions))
+    ]
+
+    # Buildable envelopes for all parcels with rules, in one vectorized pass
+    with_rules = np.array([c is not None for c in parcel_constraints], dtype=bool)
+    envelope_rows = np.cumsum(with_rules) - 1
+    envelopes = compute_envelopes(
+        parcels.geometry.values[unique_positions[with_rules]],
+        **constraint_arrays([c for c in parcel_constraints if c is not None])
+    )
+
+    # Overlay/exception/override adjustments, merged for all parcels in one pass
+    merged = None
+    if data.get("precedence") is not None:
+        merged = data["precedence"].evaluate(
+            zones,
+            rules_table,
+            overlays,
+            lot=lot_context(parcels, unique_positions, corners),
+            apns=apn_values,
+        )
+
+    jurisdiction_name = format_jurisdiction_name(rules.get("jurisdiction", city))
+    sources = [{"type": "map", "cite": f"{city}_zoning_v2024"}]
+    run_ms = (time.time() - start_time) * 1000 / max(len(items), 1)
+
+    for i, u in zip(np.flatnonzero(found), inverse):
+        zone = zones[u] if zones[u] is not None else "UNKNOWN"
+        corner_lot = bool(corners[u])
+        zone_constraints = parcel_constraints[u]
+        if zone_constraints is None:
+            results[i] = _error(int(i), f"No rules found for zone: {zone}")
+            continue
+
+        overlay_key = tuple(overlays[u])
+        if overlay_key not in notes_memo:
+            notes_memo[overlay_key] = rules_table.overlay_notes(overlays[u])
+        notes_parts = []
+        if corner_lot:
+            notes_parts.append("Corner lot; street-side setback applied")
+        notes_parts.extend(notes_memo[overlay_key])
+
+        parcel_match = None
+        if match_methods[i] is not None:
+            parcel_match = {"method": match_methods[i], "snap_distance_ft": float(snap_distances[i])}
+        parcel_apn = apn_values[u] if apn_values is not None else items[i].get("apn") or "UNKNOWN"
+        results[i] = {
+            "index": int(i),
+            "ok": True,
+            "result": create_output_schema(
+                apn=parcel_apn,
+                jurisdiction=jurisdiction_name,
+                zone=zone,
+                setbacks_ft=zone_constraints["setbacks_ft"],
+                height_ft=zone_constraints["height_ft"],
+                far=zone_constraints["far"],
+                lot_coverage_pct=zone_constraints["lot_coverage_pct"],
+                overlays=list(overlays[u]),
+                sources=[dict(s) for s in sources],
+                notes="; ".join(notes_parts),
+                run_ms=run_ms,
+                parcel_match=parcel_match,
+                zone_fractions=[dict(share) for share in zone_splits.get(u, [])],
+                envelope=envelope_summary(envelopes, envelope_rows[u]),
+                answers=merged.answers(u, city if trace else None) if merged is not None else None
+            ),
+        }
+
+    return results
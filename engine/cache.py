@@ -0,0 +1,149 @@
+"""In-process caches keyed by source files, invalidated on mtime or content change."""
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) for a file, or None if it does not exist."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def content_hash(path: Path, chunk_size: int = 1 << 20) -> Optional[str]:
+    """Return the SHA256 hex digest of a file, or None if it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _Entry:
+    __slots__ = ("paths", "signatures", "hashes", "value")
+
+    def __init__(self, paths: List[Path], signatures: list, hashes: list, value: Any):
+        self.paths = paths
+        self.signatures = signatures
+        self.hashes = hashes
+        self.value = value
+
+
+class FileBackedCache:
+    """
+    Cache of values built from a set of source files.
+
+    Each entry remembers the (mtime, size) signature and content hash of its
+    source files. A lookup whose signatures still match is a dict read; when a
+    signature changes the files are re-hashed, and the value is only rebuilt if
+    the content actually changed (a `touch` does not trigger a reload).
+    Builds for the same key are serialized so concurrent requests share one load.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, key: Hashable, paths: Sequence[Path], build: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, building it if missing or stale.
+
+        Args:
+            key: Cache key (e.g., jurisdiction name and data dir)
+            paths: Source files the value is derived from
+            build: Zero-argument callable producing the value
+
+        Returns:
+            Cached or freshly built value
+        """
+        paths = [Path(p) for p in paths]
+        signatures = [file_signature(p) for p in paths]
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.paths == paths and entry.signatures == signatures:
+            return entry.value
+
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            signatures = [file_signature(p) for p in paths]
+            if entry is not None and entry.paths == paths:
+                if entry.signatures == signatures:
+                    return entry.value
+                hashes = [content_hash(p) for p in paths]
+                if entry.hashes == hashes:
+                    entry.signatures = signatures
+                    return entry.value
+            else:
+                hashes = [content_hash(p) for p in paths]
+
+            value = build()
+            self._entries[key] = _Entry(paths, signatures, hashes, value)
+            return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or all entries if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        """Return the keys currently cached."""
+        return list(self._entries.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe cache of derived values, evicting the least recently used.
+
+    Unlike FileBackedCache it has no source files: callers scope it to the
+    value it derives from (e.g., one per loaded dataset).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Return the cached value for key, building it (outside the lock) if missing."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
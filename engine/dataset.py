@@ -0,0 +1,340 @@
+"""Jurisdiction dataset loading and the process-wide warm dataset registry."""
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import shapely
+
+from parsers.geo import build_apn_index
+from parsers.snapshot import load_layer, compile_layer
+from engine.apply_rules import load_rules_table, get_crs_config, get_lookup_config
+from engine.cache import FileBackedCache, LRUCache
+from engine.geom import merge_overlays, assign_corner_lots, CORNER_LOT_FIELD
+from engine.join_table import load_join_table
+from engine.precedence import load_precedence_table, build_answer_table
+
+
+# Jurisdiction configuration
+JURISDICTIONS = {
+    "austin": {
+        "parcel_layer": "data/austin/parcels.geojson",
+        "zoning_layer": "data/austin/zoning.geojson",
+        "overlay_layers": {},
+        "street_layer": None,
+        "street_buffer_ft": 10.0,
+        # Jurisdiction boundary (default: hull of the zoning layer, see engine.jurisdictions)
+        "boundary_layer": None,
+        # APNs this jurisdiction can hold (regex; None = any)
+        "apn_pattern": None,
+        "code_pdfs": [],
+        "rules_file": "rules/austin.yaml",
+        "answers_config": {
+            "overlays": "ui/src/engine/answers/config/overlays.json",
+            "exceptions": "ui/src/engine/answers/config/exceptions.json",
+            "overrides": "ui/src/engine/answers/overrides.json",
+        },
+        "derived_dir": "data/austin/derived"
+    }
+}
+
+# Answer traces kept per loaded dataset (so a rules or config change drops them)
+TRACE_CACHE_SIZE = 4096
+
+# Loaded datasets keyed by (city, resolved data dir), shared by all requests
+_datasets = FileBackedCache()
+
+# Datasets unused for this long are dropped (0 keeps them loaded)
+DATASET_IDLE_SECONDS = float(os.getenv("ZONING_DATASET_IDLE_S", "1800"))
+
+# Last use (monotonic seconds) per dataset key, guarded by _sweep_lock, and the sweep thread
+_last_used: Dict[Any, float] = {}
+_sweep_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+
+
+def get_jurisdiction_config(city: str) -> Dict[str, Any]:
+    """Get configuration for a jurisdiction."""
+    if city not in JURISDICTIONS:
+        raise ValueError(f"Unknown jurisdiction: {city}")
+    return JURISDICTIONS[city]
+
+
+def source_paths(city: str, data_dir: str) -> List[Path]:
+    """List the source files a jurisdiction dataset is built from."""
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    paths = [
+        base_path / config["rules_file"],
+        base_path / config["parcel_layer"],
+        base_path / config["zoning_layer"],
+    ]
+    for overlay_path in config.get("overlay_layers", {}).values():
+        paths.append(base_path / overlay_path)
+    if config.get("street_layer"):
+        paths.append(base_path / config["street_layer"])
+    for answers_path in config.get("answers_config", {}).values():
+        paths.append(base_path / answers_path)
+    return paths
+
+
+def layer_sources(city: str, data_dir: str) -> Dict[str, str]:
+    """Existing source layer paths by role ("parcels", "zoning", "overlay:<name>", "streets")."""
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    layers = {"parcels": config["parcel_layer"], "zoning": config["zoning_layer"]}
+    for name, path in config.get("overlay_layers", {}).items():
+        layers[f"overlay:{name}"] = path
+    if config.get("street_layer"):
+        layers["streets"] = config["street_layer"]
+    return {role: str(base_path / path) for role, path in layers.items() if (base_path / path).exists()}
+
+
+def derived_path(city: str, data_dir: str) -> Path:
+    """Directory holding compiled artifacts for a jurisdiction."""
+    config = get_jurisdiction_config(city)
+    derived_dir = config.get("derived_dir") or str(Path(config["parcel_layer"]).parent / "derived")
+    return Path(data_dir) / derived_dir
+
+
+def load_jurisdiction_data(city: str, data_dir: str, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Load all data layers for jurisdiction.
+
+    Layers come from the compiled snapshot in the derived dir when it is
+    current (see compile_jurisdiction), else from the source GeoJSON.
+    """
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    derived_dir = str(derived_path(city, data_dir))
+
+    # Load rules
+    rules_path = base_path / config["rules_file"]
+    rules_table = load_rules_table(str(rules_path))
+    rules = rules_table.rules
+    crs_config = get_crs_config(rules)
+
+    if verbose:
+        print(f"Loaded rules from {rules_path}")
+        print(f"CRS: {crs_config['input']} -> {crs_config['internal']}")
+
+    # Load overlay/exception/override adjustments (compiled into per-intent op chains)
+    answers_config = config.get("answers_config", {})
+    precedence = load_precedence_table(*(str(base_path / answers_config.get(kind, ""))
+                                         for kind in ("overlays", "exceptions", "overrides")))
+
+    # Load parcel layer
+    parcel_path = base_path / config["parcel_layer"]
+    parcels = load_layer(str(parcel_path), crs_config["internal"], derived_dir, "parcels")
+    if verbose:
+        print(f"Loaded {len(parcels)} parcels from {parcel_path}")
+    # Prepare parcel polygons once for point-in-parcel tests (not thread-safe to do lazily)
+    shapely.prepare(np.asarray(parcels.geometry.values))
+
+    # Load zoning layer
+    zoning_path = base_path / config["zoning_layer"]
+    zoning = load_layer(str(zoning_path), crs_config["internal"], derived_dir, "zoning")
+    if verbose:
+        print(f"Loaded {len(zoning)} zoning districts from {zoning_path}")
+
+    # Load overlay layers
+    overlay_gdfs = {}
+    for overlay_name, overlay_path in config.get("overlay_layers", {}).items():
+        overlay_full_path = base_path / overlay_path
+        if overlay_full_path.exists():
+            overlay_gdfs[overlay_name] = load_layer(str(overlay_full_path), crs_config["internal"],
+                                                    derived_dir, f"overlay:{overlay_name}")
+            if verbose:
+                print(f"Loaded overlay {overlay_name} from {overlay_full_path}")
+
+    # Load street centerlines (corner lot detection)
+    streets = None
+    street_buffer_ft = config.get("street_buffer_ft", 10.0)
+    if config.get("street_layer") and (base_path / config["street_layer"]).exists():
+        street_path = base_path / config["street_layer"]
+        streets = load_layer(str(street_path), crs_config["internal"], derived_dir, "streets")
+        if verbose:
+            print(f"Loaded {len(streets)} street segments from {street_path}")
+
+    # Merge overlays into one indexed layer (one query finds every overlay)
+    overlay_layer = merge_overlays(overlay_gdfs, crs=crs_config["internal"])
+
+    # Build APN index (normalized APN -> parcel row)
+    apn_index = build_apn_index(parcels)
+
+    # Load precomputed parcel join table (rebuilt here if a source layer changed)
+    parcel_join = load_join_table(derived_dir, layer_sources(city, data_dir), parcels, zoning, overlay_layer,
+                                  index=apn_index, streets=streets, street_buffer_ft=street_buffer_ft)
+    if verbose and parcel_join is not None:
+        print(f"Loaded parcel join table ({len(parcel_join)} rows)")
+
+    # Corner lots for every parcel, so the request path is a column read
+    if CORNER_LOT_FIELD in parcels.columns:
+        warnings.warn(f"{city}: parcel layer already has a {CORNER_LOT_FIELD!r} column; "
+                      f"replacing it with corner lots detected from street centerlines")
+    if parcel_join is not None:
+        parcels[CORNER_LOT_FIELD] = parcel_join.corner_lots
+    else:
+        parcels[CORNER_LOT_FIELD] = assign_corner_lots(parcels, streets, street_buffer_ft)
+
+    return {
+        "rules": rules,
+        "rules_table": rules_table,
+        "crs_config": crs_config,
+        "lookup_config": get_lookup_config(rules),
+        "precedence": precedence,
+        "trace_cache": LRUCache(TRACE_CACHE_SIZE),
+        # {zone, intent, corner} answers served by GET /answers
+        "answer_table": build_answer_table(precedence, rules_table, city),
+        "parcels": parcels,
+        "zoning": zoning,
+        "overlay_gdfs": overlay_gdfs,
+        "overlay_layer": overlay_layer,
+        "streets": streets,
+        "street_buffer_ft": street_buffer_ft,
+        "apn_index": apn_index,
+        "parcel_join": parcel_join,
+        "config": config,
+        "base_path": base_path
+    }
+
+
+def compile_jurisdiction(city: str, data_dir: str = ".", verbose: bool = False) -> Path:
+    """
+    Compile a jurisdiction's parcel, zoning, overlay and street layers into snapshots.
+
+    Each layer is parsed, reprojected to the internal CRS and written as
+    columnar arrays under the derived dir, so later loads skip GeoJSON
+    parsing and reprojection. The parcel join table is precomputed as well.
+
+    Returns:
+        Path to the derived dir
+    """
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    derived_dir = derived_path(city, data_dir)
+    crs_config = get_crs_config(load_rules_table(str(base_path / config["rules_file"])).rules)
+
+    sources = layer_sources(city, data_dir)
+    for role, key in (("parcels", "parcel_layer"), ("zoning", "zoning_layer")):
+        if role not in sources:
+            raise FileNotFoundError(f"Geo file not found: {base_path / config[key]}")
+    layers = {}
+    for layer, source in sources.items():
+        layers[layer] = compile_layer(source, crs_config["internal"], str(derived_dir), layer)
+        if verbose:
+            print(f"Compiled {layer}: {len(layers[layer])} rows from {source}")
+
+    overlay_gdfs = {layer.split(":", 1)[1]: gdf for layer, gdf in layers.items() if layer.startswith("overlay:")}
+    parcel_join = load_join_table(str(derived_dir), sources, layers["parcels"], layers["zoning"],
+                                  merge_overlays(overlay_gdfs, crs=crs_config["internal"]), build_missing=True,
+                                  streets=layers.get("streets"),
+                                  street_buffer_ft=config.get("street_buffer_ft", 10.0))
+    if verbose:
+        print(f"Compiled parcel join table: {len(parcel_join)} rows")
+    return derived_dir
+
+
+def get_jurisdiction_data(city: str, data_dir: str = ".", verbose: bool = False) -> Dict[str, Any]:
+    """
+    Get the warm dataset for a jurisdiction, loading it on first use.
+
+    The dataset is reloaded only when one of its source files (rules YAML,
+    parcel, zoning or overlay layers) changes on disk, and dropped after
+    DATASET_IDLE_SECONDS without use (see evict_idle_datasets).
+    """
+    key = (city, str(Path(data_dir).resolve()))
+    # Mark the key used before a possibly long load so a sweep cannot drop it meanwhile
+    _touch(key)
+    data = _datasets.get(
+        key,
+        source_paths(city, data_dir),
+        lambda: load_jurisdiction_data(city, data_dir, verbose),
+    )
+    _touch(key)
+    _start_sweeper()
+    return data
+
+
+def _touch(key: Any) -> None:
+    with _sweep_lock:
+        _last_used[key] = time.monotonic()
+
+
+def _sweep_forever(interval_s: float) -> None:
+    while True:
+        time.sleep(interval_s)
+        evict_idle_datasets()
+
+
+def _start_sweeper() -> None:
+    """Start the idle sweep thread once (every minute, or once per idle period if shorter)."""
+    global _sweeper
+    if DATASET_IDLE_SECONDS <= 0 or _sweeper is not None:
+        return
+    with _sweep_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_forever, args=(min(60.0, DATASET_IDLE_SECONDS),),
+                                        name="zoning-dataset-sweeper", daemon=True)
+            _sweeper.start()
+
+
+def evict_idle_datasets(max_idle_s: Optional[float] = None, now: Optional[float] = None) -> List[Any]:
+    """
+    Drop datasets that have not been used for max_idle_s seconds.
+
+    Runs on a background thread once a dataset is loaded; requests already
+    holding a dataset keep it and the next request reloads it.
+
+    Args:
+        max_idle_s: Idle time limit (default: DATASET_IDLE_SECONDS)
+        now: Current time.monotonic() value
+
+    Returns:
+        Keys of the evicted datasets
+    """
+    max_idle_s = DATASET_IDLE_SECONDS if max_idle_s is None else max_idle_s
+    evicted = []
+    with _sweep_lock:
+        now = time.monotonic() if now is None else now
+        for key, last_used in list(_last_used.items()):
+            if now - last_used >= max_idle_s:
+                _datasets.invalidate(key)
+                del _last_used[key]
+                evicted.append(key)
+    return evicted
+
+
+def preload_jurisdictions(data_dir: str = ".", cities: Optional[List[str]] = None) -> List[str]:
+    """
+    Warm the dataset registry for the given (default: all) jurisdictions.
+
+    Jurisdictions whose source files are missing are skipped.
+
+    Returns:
+        List of jurisdictions that were loaded
+    """
+    loaded = []
+    for city in cities if cities is not None else list(JURISDICTIONS):
+        try:
+            get_jurisdiction_data(city, data_dir)
+        except FileNotFoundError:
+            continue
+        loaded.append(city)
+    return loaded
+
+
+def clear_datasets(city: Optional[str] = None) -> None:
+    """Drop cached datasets (all, or those for one jurisdiction)."""
+    with _sweep_lock:
+        if city is None:
+            _datasets.invalidate()
+            _last_used.clear()
+            return
+        for key in _datasets.keys():
+            if key[0] == city:
+                _datasets.invalidate(key)
+                _last_used.pop(key, None)
@@ -0,0 +1,147 @@
+"""Buildable envelope: setbacks applied to the parcel polygon, plus FAR and coverage caps."""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import shapely
+
+from engine.geom import as_geometry_array, get_parcel_geometry_arrays
+
+
+# Output fields of envelope_summary
+SUMMARY_FIELDS = (
+    "lot_area_sqft",
+    "envelope_area_sqft",
+    "max_footprint_sqft",
+    "buildable_footprint_sqft",
+    "max_gfa_sqft",
+)
+
+
+def constraint_arrays(constraints: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Column arrays (front, side, rear, street_side, far, lot_coverage_pct) from apply_zone_rules results."""
+    return {
+        "front": np.array([c["setbacks_ft"]["front"] for c in constraints], dtype=float),
+        "side": np.array([c["setbacks_ft"]["side"] for c in constraints], dtype=float),
+        "rear": np.array([c["setbacks_ft"]["rear"] for c in constraints], dtype=float),
+        "street_side": np.array([c["setbacks_ft"]["street_side"] for c in constraints], dtype=float),
+        "far": np.array([c["far"] for c in constraints], dtype=float),
+        "lot_coverage_pct": np.array([c["lot_coverage_pct"] for c in constraints], dtype=float),
+    }
+
+
+def compute_envelopes(parcels, front, side, rear, street_side, far, lot_coverage_pct) -> Dict[str, np.ndarray]:
+    """
+    Compute buildable envelopes for many parcels with vectorized geometry ops.
+
+    Each parcel's minimum rotated rectangle gives its frontage (short side)
+    and depth (long side) axes. The front setback is applied on one short
+    side and the rear on the other. The side setback is applied on both long
+    sides; on corner lots (street_side > 0), one of them uses the larger of
+    side and street_side. The resulting rectangle is clipped to the parcel
+    inset by the smallest setback, so irregular lots keep at least that
+    distance from every lot line.
+
+    Without street frontage data, the front is a short side of the rectangle;
+    for rectangular lots the envelope area does not depend on which one.
+
+    Args:
+        parcels: Parcel GeoDataFrame, GeoSeries or array of geometries
+        front, side, rear, street_side: Setbacks in feet (scalars or per-parcel arrays)
+        far: Floor area ratio (scalar or per-parcel array)
+        lot_coverage_pct: Max lot coverage percent (scalar or per-parcel array)
+
+    Returns:
+        Dict of per-parcel arrays: envelope (polygons, empty when setbacks
+        leave no buildable area), lot_area_sqft, envelope_area_sqft,
+        max_footprint_sqft (lot area x coverage), buildable_footprint_sqft
+        (envelope area capped by max footprint) and max_gfa_sqft (lot area x FAR)
+    """
+    geoms = as_geometry_array(parcels)
+    n = len(geoms)
+    front, side, rear, street_side, far, lot_coverage_pct = (
+        np.broadcast_to(np.asarray(v, dtype=float), (n,))
+        for v in (front, side, rear, street_side, far, lot_coverage_pct)
+    )
+    lot_area = get_parcel_geometry_arrays(geoms)["area_sqft"]
+    envelopes = np.full(n, shapely.Polygon(), dtype=object)
+
+    # Oriented rectangles: p0 + a*u + b*v, u along frontage (0..width), v along depth (0..depth)
+    rects = shapely.oriented_envelope(geoms)
+    rings = shapely.get_exterior_ring(rects)
+    valid = (shapely.get_type_id(rects) == shapely.GeometryType.POLYGON) & \
+        (shapely.get_num_coordinates(rings) == 5) & (lot_area > 0)
+    if valid.any():
+        corners = shapely.get_coordinates(rings[valid]).reshape(-1, 5, 2)
+        origin = corners[:, 0]
+        edge1 = corners[:, 1] - corners[:, 0]
+        edge2 = corners[:, 2] - corners[:, 1]
+        len1 = np.hypot(edge1[:, 0], edge1[:, 1])
+        len2 = np.hypot(edge2[:, 0], edge2[:, 1])
+        first_short = (len1 <= len2)[:, None]
+        width = np.minimum(len1, len2)
+        depth = np.maximum(len1, len2)
+        u = np.where(first_short, edge1 / len1[:, None], edge2 / len2[:, None])
+        v = np.where(first_short, edge2 / len2[:, None], edge1 / len1[:, None])
+
+        left = np.where(street_side[valid] > 0, np.maximum(side[valid], street_side[valid]), side[valid])
+        a0, a1 = left, width - side[valid]
+        b0, b1 = front[valid], depth - rear[valid]
+        buildable = (a1 > a0) & (b1 > b0)
+
+        ring = np.stack([
+            origin + a0[:, None] * u + b0[:, None] * v,
+            origin + a1[:, None] * u + b0[:, None] * v,
+            origin + a1[:, None] * u + b1[:, None] * v,
+            origin + a0[:, None] * u + b1[:, None] * v,
+            origin + a0[:, None] * u + b0[:, None] * v,
+        ], axis=1)
+        setback_rects = shapely.polygons(ring[buildable])
+
+        targets = np.flatnonzero(valid)[buildable]
+        min_setback = np.minimum(np.minimum(front, side), rear)[targets]
+        insets = shapely.buffer(geoms[targets], -min_setback, join_style="mitre")
+        envelopes[targets] = shapely.intersection(setback_rects, insets)
+
+    envelope_area = np.nan_to_num(shapely.area(envelopes))
+    max_footprint = lot_area * lot_coverage_pct / 100.0
+    return {
+        "envelope": envelopes,
+        "lot_area_sqft": lot_area,
+        "envelope_area_sqft": envelope_area,
+        "max_footprint_sqft": max_footprint,
+        "buildable_footprint_sqft": np.minimum(envelope_area, max_footprint),
+        "max_gfa_sqft": lot_area * far,
+    }
+
+
+def compute_envelope(parcel, zone_constraints: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the buildable envelope for one parcel (see compute_envelopes).
+
+    Args:
+        parcel: Parcel row, GeoSeries or geometry
+        zone_constraints: Result of apply_zone_rules
+
+    Returns:
+        Dict with the envelope polygon and the summary areas
+    """
+    # Extract geometry from GeoSeries if needed
+    geom = parcel.geometry if hasattr(parcel, 'geometry') else parcel
+    if hasattr(geom, 'iloc'):
+        geom = geom.iloc[0]
+
+    arrays = compute_envelopes([geom], **constraint_arrays([zone_constraints]))
+    return {key: values[0] for key, values in arrays.items()}
+
+
+def envelope_summary(envelope: Dict[str, Any], index: Optional[int] = None) -> Dict[str, float]:
+    """
+    Output form of an envelope: areas in square feet, rounded to 0.1.
+
+    Args:
+        envelope: Result of compute_envelope, or of compute_envelopes with index
+        index: Row of compute_envelopes arrays to summarize
+    """
+    if index is None:
+        return {field: round(float(envelope[field]), 1) for field in SUMMARY_FIELDS}
+    return {field: round(float(envelope[field][index]), 1) for field in SUMMARY_FIELDS}
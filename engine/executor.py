@@ -0,0 +1,121 @@
+"""Bounded worker pool for running the synchronous zoning pipeline off the event loop."""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the executor queue is full and a job is rejected."""
+
+
+class ZoningExecutor:
+    """
+    Thread pool with a bounded queue and queue-depth/wait-time accounting.
+
+    Threads (not processes) are used so jobs share the warm dataset registry;
+    the heavy shapely/pyproj work releases the GIL.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = 1024):
+        """
+        Args:
+            max_workers: Worker threads (default: min(32, cpu_count + 4))
+            max_queue: Max jobs waiting for a worker; 0 means unbounded
+        """
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="zoning")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+        self._wait_last_s = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ZoningExecutor":
+        """Create executor sized by ZONING_EXECUTOR_WORKERS / ZONING_EXECUTOR_MAX_QUEUE."""
+        workers = os.getenv("ZONING_EXECUTOR_WORKERS")
+        max_queue = os.getenv("ZONING_EXECUTOR_MAX_QUEUE")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_queue=int(max_queue) if max_queue else 1024,
+        )
+
+    def _run_job(self, submitted_at: float, fn: Callable[[], Any]) -> Any:
+        wait_s = time.perf_counter() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_total_s += wait_s
+            self._wait_last_s = wait_s
+            self._wait_max_s = max(self._wait_max_s, wait_s)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def _on_done(self, future) -> None:
+        # A job cancelled while still queued (e.g. the awaiting request went
+        # away) never reaches _run_job, so release its queue slot here
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self._cancelled += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and await its result.
+
+        Raises:
+            ExecutorSaturated: If max_queue jobs are already waiting
+        """
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturated(f"Executor queue full ({self._queued} jobs waiting)")
+            self._queued += 1
+        job = functools.partial(self._run_job, time.perf_counter(), functools.partial(fn, *args, **kwargs))
+        # Run in a copy of the caller's context so context variables (e.g. open
+        # telemetry spans) do not leak between jobs sharing a worker thread
+        context = contextvars.copy_context()
+        try:
+            future = self._pool.submit(context.run, job)
+        except RuntimeError:
+            # Pool already shut down
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current queue depth, utilization and wait-time statistics."""
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "wait_ms_last": self._wait_last_s * 1000,
+                "wait_ms_avg": (self._wait_total_s / started * 1000) if started else 0.0,
+                "wait_ms_max": self._wait_max_s * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and release worker threads."""
+        self._pool.shutdown(wait=wait)
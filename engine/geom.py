@@ -1,121 +1,361 @@
 """Geometric operations: CRS transforms, spatial queries, corner lot detection."""
+import threading
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
 from shapely.geometry import Point
-from typing import Optional, List, Tuple
+from typing import Any, Dict, Optional, List, Tuple
+
+# Columns of the merged overlay layer (see merge_overlays)
+OVERLAY_NAME_FIELD = "overlay_name"
+OVERLAY_ORDER_FIELD = "overlay_order"
+
+# Precomputed corner-lot flag on loaded parcel layers (see assign_corner_lots)
+CORNER_LOT_FIELD = "corner_lot"
+
+# Per-thread transformer cache keyed by (source CRS, target CRS);
+# pyproj transformers must not be shared across threads
+_transformers = threading.local()
+
+
+def get_transformer(source_crs: str = "EPSG:4326", target_crs: str = "EPSG:2277") -> Transformer:
+    """Get a cached lng/lat-ordered (always_xy) transformer for a CRS pair."""
+    cache = getattr(_transformers, "cache", None)
+    if cache is None:
+        cache = _transformers.cache = {}
+    key = (str(source_crs), str(target_crs))
+    transformer = cache.get(key)
+    if transformer is None:
+        transformer = cache[key] = Transformer.from_crs(source_crs, target_crs, always_xy=True)
+    return transformer
+
+
+def transform_coords(lats, lngs, source_crs: str = "EPSG:4326",
+                     target_crs: str = "EPSG:2277") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transform arrays of lat/lng coordinates in one call.
+
+    Returns:
+        (x, y) arrays in target CRS
+    """
+    transformer = get_transformer(source_crs, target_crs)
+    return transformer.transform(np.asarray(lngs, dtype=float), np.asarray(lats, dtype=float))
 
 
 def transform_point(lat: float, lng: float, source_crs: str = "EPSG:4326", 
                    target_crs: str = "EPSG:2277") -> Point:
     """Transform a point from source CRS to target CRS."""
-    point = Point(lng, lat)
-    point_gdf = gpd.GeoDataFrame([1], geometry=[point], crs=source_crs)
-    point_gdf = point_gdf.to_crs(target_crs)
-    return point_gdf.geometry.iloc[0]
+    x, y = get_transformer(source_crs, target_crs).transform(lng, lat)
+    return Point(x, y)
 
 
-def intersect_zone(parcel: gpd.GeoSeries, zoning_gdf: gpd.GeoDataFrame) -> Optional[str]:
+def find_zone_field(zoning_gdf: gpd.GeoDataFrame) -> Optional[str]:
+    """Find the zone code column in a zoning layer."""
+    for field in ['zone', 'ZONE', 'zoning', 'ZONING', 'zone_code', 'ZONE_CODE']:
+        if field in zoning_gdf.columns:
+            return field
+    return None
+
+
+def as_geometry_array(geoms) -> np.ndarray:
+    """Geometry object array from a GeoDataFrame, GeoSeries or array-like."""
+    if isinstance(geoms, gpd.GeoDataFrame):
+        geoms = geoms.geometry
+    if isinstance(geoms, gpd.GeoSeries):
+        geoms = geoms.values
+    return np.asarray(geoms, dtype=object)
+
+
+def assign_zone_shares(parcels, zoning_gdf: gpd.GeoDataFrame) -> Tuple[np.ndarray, Dict[int, List[Dict[str, Any]]]]:
     """
-    Find zone code for parcel by intersecting with zoning layer.
-    
+    Assign every parcel its dominant zone by intersection area, in bulk.
+
+    One bounding-box query on the zoning index finds candidate districts.
+    Parcels with a single candidate only need an intersects test; intersection
+    areas are computed (vectorized) for parcels with several candidates, and
+    the zone covering the largest share wins (ties go to the lowest zoning row).
+
     Args:
-        parcel: GeoSeries representing parcel geometry
-        zoning_gdf: GeoDataFrame with zoning districts
-    
+        parcels: Parcel GeoDataFrame, GeoSeries or array of geometries
+        zoning_gdf: GeoDataFrame with zoning districts (same CRS)
+
     Returns:
-        Zone code string or None if no intersection
+        Tuple of (object array of zone codes, "UNKNOWN" where no district
+        intersects and all None if the zoning layer has no zone field;
+        dict of parcel position -> [{"zone", "fraction"}, ...] by descending
+        area for parcels split across more than one zone)
+    """
+    geoms = as_geometry_array(parcels)
+    zone_field = find_zone_field(zoning_gdf)
+    if zone_field is None:
+        return np.full(len(geoms), None, dtype=object), {}
+    zones = np.full(len(geoms), "UNKNOWN", dtype=object)
+    if len(geoms) == 0 or len(zoning_gdf) == 0:
+        return zones, {}
+
+    zone_values = zoning_gdf[zone_field].to_numpy()
+    zone_geoms = np.asarray(zoning_gdf.geometry.values)
+    input_idx, tree_idx = zoning_gdf.sindex.query(geoms)
+    single = np.bincount(input_idx, minlength=len(geoms))[input_idx] == 1
+
+    # One candidate district: no area computation needed
+    hit = shapely.intersects(geoms[input_idx[single]], zone_geoms[tree_idx[single]])
+    zones[input_idx[single][hit]] = zone_values[tree_idx[single][hit]]
+
+    # Several candidates: sum intersection area per zone code
+    multi_input, multi_tree = input_idx[~single], tree_idx[~single]
+    if len(multi_input) == 0:
+        return zones, {}
+    pairs = pd.DataFrame({
+        "parcel": multi_input,
+        "row": multi_tree,
+        "zone": zone_values[multi_tree],
+        "area": shapely.area(shapely.intersection(geoms[multi_input], zone_geoms[multi_tree])),
+    })
+    by_zone = pairs.groupby(["parcel", "zone"], sort=False, dropna=False).agg(
+        area=("area", "sum"), row=("row", "min")).reset_index()
+    by_zone = by_zone[by_zone["area"] > 0]
+    by_zone = by_zone.sort_values(["parcel", "area", "row"], ascending=[True, False, True])
+    dominant = by_zone.drop_duplicates("parcel")
+    zones[dominant["parcel"].to_numpy()] = dominant["zone"].to_numpy()
+
+    # Degenerate overlaps (touching edges, zero-area parcels): lowest intersecting row
+    degenerate = ~np.isin(multi_input, dominant["parcel"].to_numpy())
+    if degenerate.any():
+        deg_input, deg_tree = multi_input[degenerate], multi_tree[degenerate]
+        hit = shapely.intersects(geoms[deg_input], zone_geoms[deg_tree])
+        first_match = np.full(len(geoms), len(zoning_gdf), dtype=np.intp)
+        np.minimum.at(first_match, deg_input[hit], deg_tree[hit])
+        matched = first_match < len(zoning_gdf)
+        zones[matched] = zone_values[first_match[matched]]
+
+    # Area fractions for parcels split across zones
+    splits = {}
+    split_rows = by_zone[by_zone.duplicated("parcel", keep=False)]
+    if len(split_rows):
+        parcel_areas = shapely.area(geoms[split_rows["parcel"].to_numpy()])
+        fractions = split_rows["area"].to_numpy() / parcel_areas
+        for parcel, zone, fraction in zip(split_rows["parcel"].tolist(), split_rows["zone"].tolist(),
+                                          fractions.tolist()):
+            splits.setdefault(parcel, []).append({"zone": zone, "fraction": round(fraction, 4)})
+    return zones, splits
+
+
+def assign_zones(parcels, zoning_gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """
+    Assign a zone code to every parcel with one bulk spatial index query.
+
+    Parcels straddling several districts get the dominant zone by area
+    (see assign_zone_shares), as in intersect_zone.
+
+    Args:
+        parcels: Parcel GeoDataFrame, GeoSeries or array of geometries
+        zoning_gdf: GeoDataFrame with zoning districts (same CRS)
+
+    Returns:
+        Object array of zone codes, "UNKNOWN" where no district intersects
+        (all None if the zoning layer has no zone field)
+    """
+    return assign_zone_shares(parcels, zoning_gdf)[0]
+
+
+def intersect_zone_shares(parcel: gpd.GeoSeries,
+                          zoning_gdf: gpd.GeoDataFrame) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Find the dominant zone for a parcel and its area fractions per zone.
+
+    Returns:
+        Tuple of (zone code as in intersect_zone, [{"zone", "fraction"}, ...]
+        for split-zoned parcels, else [])
     """
-    if not zoning_gdf.has_sindex:
-        zoning_gdf.sindex
-    
-    # Create temporary GeoDataFrame for parcel
     # Extract geometry from GeoSeries if needed
     geom = parcel.geometry if hasattr(parcel, 'geometry') else parcel
     if hasattr(geom, 'iloc'):
         geom = geom.iloc[0]
-    # Get CRS from parcel or use zoning CRS
-    parcel_crs = parcel.crs if hasattr(parcel, 'crs') and parcel.crs else zoning_gdf.crs
-    parcel_gdf = gpd.GeoDataFrame([1], geometry=[geom], crs=parcel_crs)
     
-    # Spatial join to find intersecting zones
-    joined = gpd.sjoin(parcel_gdf, zoning_gdf, how='left', predicate='intersects')
+    # Same query and tie-breaking as the bulk path
+    zones, splits = assign_zone_shares([geom], zoning_gdf)
+    return zones[0], splits.get(0, [])
+
+
+def intersect_zone(parcel: gpd.GeoSeries, zoning_gdf: gpd.GeoDataFrame) -> Optional[str]:
+    """
+    Find zone code for parcel by intersecting with zoning layer.
     
-    if len(joined) == 0 or joined.index_right.isna().all():
-        # Fallback: return "UNKNOWN" if no zone intersection
-        return "UNKNOWN"
+    A parcel that straddles districts gets the zone covering most of its area.
     
-    # Get first matching zone (assume zone field is 'zone' or 'ZONE')
-    zone_field = None
-    for field in ['zone', 'ZONE', 'zoning', 'ZONING', 'zone_code', 'ZONE_CODE']:
-        if field in zoning_gdf.columns:
-            zone_field = field
-            break
-    
-    if zone_field is None:
-        return None
+    Args:
+        parcel: GeoSeries representing parcel geometry
+        zoning_gdf: GeoDataFrame with zoning districts
     
-    first_match_idx = joined.index_right.dropna().iloc[0]
-    return zoning_gdf.loc[first_match_idx, zone_field]
+    Returns:
+        Zone code string ("UNKNOWN" if no intersection) or None if the
+        zoning layer has no zone field
+    """
+    return intersect_zone_shares(parcel, zoning_gdf)[0]
 
 
-def detect_overlays(parcel: gpd.GeoSeries, overlay_gdfs: dict) -> List[str]:
+def merge_overlays(overlay_gdfs: dict, crs=None) -> gpd.GeoDataFrame:
+    """
+    Merge overlay layers into one indexed layer with an overlay-name column.
+
+    Args:
+        overlay_gdfs: Dict mapping overlay name to GeoDataFrame (same CRS)
+        crs: CRS for the merged layer when there are no overlay features
+
+    Returns:
+        GeoDataFrame with OVERLAY_NAME_FIELD and OVERLAY_ORDER_FIELD (position
+        of the layer in overlay_gdfs) columns, with a spatial index
+    """
+    frames = []
+    for order, (overlay_name, overlay_gdf) in enumerate(overlay_gdfs.items()):
+        if overlay_gdf is None or len(overlay_gdf) == 0:
+            continue
+        frames.append(gpd.GeoDataFrame({
+            OVERLAY_NAME_FIELD: [overlay_name] * len(overlay_gdf),
+            OVERLAY_ORDER_FIELD: np.full(len(overlay_gdf), order, dtype=np.intp),
+        }, geometry=np.asarray(overlay_gdf.geometry.values), crs=overlay_gdf.crs))
+    if frames:
+        merged = gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs=frames[0].crs)
+    else:
+        merged = gpd.GeoDataFrame({OVERLAY_NAME_FIELD: [], OVERLAY_ORDER_FIELD: np.empty(0, dtype=np.intp)},
+                                  geometry=[], crs=crs)
+    merged.sindex
+    return merged
+
+
+def _as_overlay_layer(overlays) -> gpd.GeoDataFrame:
+    """Merged overlay layer from a merged layer or a dict of overlay layers."""
+    if isinstance(overlays, gpd.GeoDataFrame):
+        return overlays
+    return merge_overlays(overlays or {})
+
+
+def assign_overlays(parcels, overlays) -> List[List[str]]:
+    """
+    Find the overlays intersecting every parcel with one spatial index query.
+
+    Args:
+        parcels: Parcel GeoDataFrame, GeoSeries or array of geometries
+        overlays: Merged overlay layer (see merge_overlays) or dict mapping
+            overlay name to GeoDataFrame
+
+    Returns:
+        Overlay names per parcel, in overlay layer order
+    """
+    geoms = as_geometry_array(parcels)
+    layer = _as_overlay_layer(overlays)
+    result = [[] for _ in range(len(geoms))]
+    if len(geoms) == 0 or len(layer) == 0:
+        return result
+
+    input_idx, tree_idx = layer.sindex.query(geoms, predicate='intersects')
+    order = layer[OVERLAY_ORDER_FIELD].to_numpy()[tree_idx]
+    # One entry per (parcel, overlay layer), sorted by parcel then layer order
+    sort = np.lexsort((order, input_idx))
+    input_idx, order, tree_idx = input_idx[sort], order[sort], tree_idx[sort]
+    keep = np.ones(len(sort), dtype=bool)
+    keep[1:] = (input_idx[1:] != input_idx[:-1]) | (order[1:] != order[:-1])
+    names = layer[OVERLAY_NAME_FIELD].iloc[tree_idx[keep]].tolist()
+    for i, overlay_name in zip(input_idx[keep].tolist(), names):
+        result[i].append(overlay_name)
+    return result
+
+
+def detect_overlays(parcel: gpd.GeoSeries, overlays) -> List[str]:
     """
     Detect which overlays intersect with parcel.
     
     Args:
         parcel: GeoSeries representing parcel geometry
-        overlay_gdfs: Dict mapping overlay name to GeoDataFrame
+        overlays: Merged overlay layer (see merge_overlays) or dict mapping
+            overlay name to GeoDataFrame
     
     Returns:
         List of overlay names that intersect
     """
-    overlays = []
     # Extract geometry from GeoSeries if needed
     geom = parcel.geometry if hasattr(parcel, 'geometry') else parcel
     if hasattr(geom, 'iloc'):
         geom = geom.iloc[0]
-    # Get CRS from parcel or use first overlay CRS
-    parcel_crs = parcel.crs if hasattr(parcel, 'crs') and parcel.crs else None
-    if parcel_crs is None and overlay_gdfs:
-        first_overlay = next(iter(overlay_gdfs.values()))
-        if first_overlay is not None and hasattr(first_overlay, 'crs'):
-            parcel_crs = first_overlay.crs
-    parcel_gdf = gpd.GeoDataFrame([1], geometry=[geom], crs=parcel_crs)
     
-    for overlay_name, overlay_gdf in overlay_gdfs.items():
-        if overlay_gdf is None or len(overlay_gdf) == 0:
-            continue
-        
-        if not overlay_gdf.has_sindex:
-            overlay_gdf.sindex
-        
-        joined = gpd.sjoin(parcel_gdf, overlay_gdf, how='left', predicate='intersects')
-        if len(joined) > 0 and not joined.index_right.isna().all():
-            overlays.append(overlay_name)
-    
-    return overlays
+    return assign_overlays([geom], overlays)[0]
+
+
+def find_street_name_field(streets_gdf: gpd.GeoDataFrame) -> Optional[str]:
+    """Find the street name column in a street centerline layer."""
+    for field in ['street_name', 'STREET_NAME', 'full_name', 'FULL_NAME', 'name', 'NAME']:
+        if field in streets_gdf.columns:
+            return field
+    return None
+
+
+def assign_corner_lots(parcels, streets: Optional[gpd.GeoDataFrame] = None,
+                       street_buffer_ft: float = 10.0) -> np.ndarray:
+    """
+    Flag corner lots for every parcel in bulk.
+
+    With a street centerline layer, a parcel is a corner lot when segments of
+    two or more distinct streets lie within street_buffer_ft of it. Segments
+    are grouped into streets by name; unnamed segments (or a layer without a
+    name field) count as separate streets. One dwithin query on the street
+    index covers all parcels.
+
+    Without a street layer, falls back to the vertex-count heuristic (more
+    than 5 exterior ring coordinates).
+
+    Args:
+        parcels: Parcel GeoDataFrame, GeoSeries or array of geometries
+        streets: Street centerline layer (same CRS), or None
+        street_buffer_ft: Max distance from parcel to a street centerline
+
+    Returns:
+        Boolean array, True for corner lots
+    """
+    geoms = as_geometry_array(parcels)
+    if streets is None:
+        return shapely.get_num_coordinates(shapely.get_exterior_ring(geoms)) > 5
+    if len(geoms) == 0 or len(streets) == 0:
+        return np.zeros(len(geoms), dtype=bool)
 
+    # Street id per segment: factorized name, unnamed segments get their own id
+    name_field = find_street_name_field(streets)
+    if name_field is not None:
+        street_ids, names = pd.factorize(streets[name_field])
+        unnamed = street_ids < 0
+        street_ids[unnamed] = len(names) + np.arange(unnamed.sum())
+    else:
+        street_ids = np.arange(len(streets))
+    num_streets = int(street_ids.max()) + 1
 
-def is_corner_lot(parcel: gpd.GeoSeries, street_buffer_ft: float = 10.0) -> bool:
+    input_idx, tree_idx = streets.sindex.query(geoms, predicate='dwithin', distance=street_buffer_ft)
+    frontages = np.unique(input_idx.astype(np.int64) * num_streets + street_ids[tree_idx])
+    return np.bincount(frontages // num_streets, minlength=len(geoms)) >= 2
+
+
+def is_corner_lot(parcel: gpd.GeoSeries, street_buffer_ft: float = 10.0,
+                  streets: Optional[gpd.GeoDataFrame] = None) -> bool:
     """
     Detect if parcel is a corner lot by checking if it touches multiple streets.
     
-    Simple heuristic: if parcel has multiple edges near street centerlines,
-    it's likely a corner lot. For MVP, we'll use a simplified check:
-    count how many parcel vertices are within buffer of street network.
-    
-    For MVP, we'll use a simpler approach: check if parcel boundary
-    has significant length exposed (indicating multiple street frontages).
+    Parcel rows from a loaded jurisdiction carry the flag precomputed for the
+    whole layer (CORNER_LOT_FIELD), so this is a lookup. Otherwise the flag is
+    computed as in assign_corner_lots: distinct streets within the buffer
+    when a street layer is given, else the vertex-count heuristic.
     
     Args:
         parcel: GeoSeries representing parcel geometry
         street_buffer_ft: Buffer distance in feet to detect street proximity
+        streets: Street centerline layer, or None
     
     Returns:
         True if corner lot detected
     """
-    # Simplified corner lot detection for MVP
-    # Check if parcel has more than 4 vertices (indicates complex shape)
-    # or if it's roughly rectangular with two long edges (corner lot pattern)
+    if isinstance(parcel, pd.Series) and not isinstance(parcel, gpd.GeoSeries) \
+            and CORNER_LOT_FIELD in parcel.index:
+        return bool(parcel[CORNER_LOT_FIELD])
     
     # Extract geometry from GeoSeries if needed
     geom = parcel.geometry if hasattr(parcel, 'geometry') else parcel
@@ -125,20 +365,7 @@ def is_corner_lot(parcel: gpd.GeoSeries, street_buffer_ft: float = 10.0) -> bool
     if geom is None:
         return False
     
-    # Get boundary
-    boundary = geom.boundary
-    
-    # For MVP: assume corner lot if geometry is complex or has many vertices
-    # In production, this would intersect with actual street centerlines
-    coords = list(geom.exterior.coords) if hasattr(geom, 'exterior') else []
-    
-    # Simple heuristic: corner lots often have 5+ vertices or are L-shaped
-    if len(coords) > 5:
-        return True
-    
-    # Check if it's roughly L-shaped (has two distinct long edges)
-    # This is a simplified check - real implementation would use street data
-    return False
+    return bool(assign_corner_lots([geom], streets, street_buffer_ft)[0])
 
 
 def get_parcel_geometry_info(parcel: gpd.GeoSeries) -> dict:
@@ -153,3 +380,12 @@ def get_parcel_geometry_info(parcel: gpd.GeoSeries) -> dict:
         "num_vertices": len(list(geom.exterior.coords)) if hasattr(geom, 'exterior') else 0
     }
 
+
+def get_parcel_geometry_arrays(parcels) -> Dict[str, np.ndarray]:
+    """Vectorized get_parcel_geometry_info for a whole parcel layer."""
+    geoms = as_geometry_array(parcels)
+    return {
+        "area_sqft": np.nan_to_num(shapely.area(geoms)),
+        "perimeter_ft": np.nan_to_num(shapely.length(geoms)),
+        "num_vertices": shapely.get_num_coordinates(shapely.get_exterior_ring(geoms)),
+    }
@@ -0,0 +1,152 @@
+"""Materialized parcel -> zone/overlay join table keyed by APN."""
+import json
+from typing import Any, Dict, List, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from engine.geom import assign_zone_shares, assign_overlays, assign_corner_lots
+from parsers.geo import ApnIndex
+from parsers.snapshot import read_table, write_table, has_table
+
+
+TABLE_NAME = "parcel_join"
+OVERLAY_SEPARATOR = "|"
+COLUMNS = ("apn", "zone", "zone_fractions", "overlays", "corner_lot")
+
+# Bump when the join logic changes so compiled tables are rebuilt
+JOIN_VERSION = 1
+
+
+class ParcelJoinTable:
+    """
+    Per-parcel zone, overlays and corner-lot flag, row-aligned with the parcel layer.
+
+    APN lookups are a dict read; no geometry work happens at query time.
+    """
+
+    def __init__(self, apns: np.ndarray, zones: np.ndarray, overlays: List[List[str]],
+                 corner_lots: np.ndarray, index: Optional[ApnIndex] = None,
+                 zone_splits: Optional[Dict[int, List[Dict[str, Any]]]] = None):
+        self.apns = apns
+        self.zones = zones
+        # Row position -> zone area fractions, only for split-zoned parcels
+        self.zone_splits = zone_splits or {}
+        self.overlays = overlays
+        self.corner_lots = corner_lots
+        self.index = index if index is not None else ApnIndex(apns)
+
+    def __len__(self) -> int:
+        return len(self.apns)
+
+    def position(self, apn: str) -> Optional[int]:
+        """Parcel row position for an APN (normalized), or None if unknown."""
+        return self.index.get(apn)
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """Joined attributes for a parcel row position."""
+        zone = self.zones[position]
+        return {
+            "position": int(position),
+            "apn": self.apns[position],
+            "zone": zone if zone else "UNKNOWN",
+            "zone_fractions": [dict(share) for share in self.zone_splits.get(position, [])],
+            "overlays": list(self.overlays[position]),
+            "corner_lot": bool(self.corner_lots[position]),
+        }
+
+    def lookup(self, apn: str) -> Optional[Dict[str, Any]]:
+        """Joined attributes for an APN, or None if unknown."""
+        position = self.position(apn)
+        return self.row(position) if position is not None else None
+
+    def to_frame(self) -> pd.DataFrame:
+        """Columnar form for persistence."""
+        return pd.DataFrame({
+            "apn": pd.Series(self.apns, dtype=object),
+            "zone": pd.Series(self.zones, dtype=object),
+            "zone_fractions": [json.dumps(self.zone_splits[i]) if i in self.zone_splits else ""
+                               for i in range(len(self.apns))],
+            "overlays": [OVERLAY_SEPARATOR.join(names) for names in self.overlays],
+            "corner_lot": np.asarray(self.corner_lots, dtype=bool),
+        })
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, index: Optional[ApnIndex] = None) -> "ParcelJoinTable":
+        overlays = [value.split(OVERLAY_SEPARATOR) if value else [] for value in df["overlays"]]
+        zone_splits = {i: json.loads(value) for i, value in enumerate(df["zone_fractions"]) if value}
+        return cls(
+            df["apn"].to_numpy(dtype=object),
+            df["zone"].to_numpy(dtype=object),
+            overlays,
+            df["corner_lot"].to_numpy(dtype=bool),
+            index=index,
+            zone_splits=zone_splits,
+        )
+
+
+def build_join_table(parcels: gpd.GeoDataFrame, zoning: gpd.GeoDataFrame,
+                     overlays, apn_field: str = "APN",
+                     index: Optional[ApnIndex] = None,
+                     streets: Optional[gpd.GeoDataFrame] = None,
+                     street_buffer_ft: float = 10.0) -> ParcelJoinTable:
+    """
+    Join every parcel against the zoning, overlay and street layers in bulk.
+
+    overlays is the merged overlay layer (or a dict of overlay layers);
+    corner lots come from streets when given (see assign_corner_lots).
+    """
+    geoms = np.asarray(parcels.geometry.values)
+    zones, zone_splits = assign_zone_shares(geoms, zoning)
+    return ParcelJoinTable(
+        parcels[apn_field].to_numpy(dtype=object),
+        np.array([z if z is not None else "" for z in zones], dtype=object),
+        assign_overlays(geoms, overlays),
+        assign_corner_lots(geoms, streets, street_buffer_ft),
+        index=index,
+        zone_splits=zone_splits,
+    )
+
+
+def load_join_table(derived_dir: str, sources: Dict[str, str], parcels: gpd.GeoDataFrame,
+                    zoning: gpd.GeoDataFrame, overlays,
+                    apn_field: str = "APN", build_missing: bool = False,
+                    index: Optional[ApnIndex] = None,
+                    streets: Optional[gpd.GeoDataFrame] = None,
+                    street_buffer_ft: float = 10.0) -> Optional[ParcelJoinTable]:
+    """
+    Load the join table, rebuilding it if its sources or build settings changed.
+
+    Build settings are JOIN_VERSION and street_buffer_ft, so a new corner-lot
+    buffer in config never serves corner lots detected with the old one.
+
+    Args:
+        derived_dir: Snapshot directory
+        sources: Source layer paths by role ("parcels", "zoning", "overlay:<name>", "streets")
+        parcels, zoning, overlays: Loaded layers, overlays merged (used for rebuilds)
+        apn_field: Parcel APN column
+        build_missing: Build the table even if it was never compiled
+        index: APN index over parcels (the table is row-aligned, so it is shared)
+        streets, street_buffer_ft: Street centerline layer for corner lots (used for rebuilds)
+
+    Returns:
+        The table, or None if it was never compiled and build_missing is False
+    """
+    # Build settings the table depends on besides its sources
+    params = {"version": JOIN_VERSION, "street_buffer_ft": street_buffer_ft}
+    df = read_table(derived_dir, TABLE_NAME, sources, params)
+    # Tables written before a column was added are rebuilt
+    if df is not None and len(df) == len(parcels) and set(COLUMNS) <= set(df.columns):
+        return ParcelJoinTable.from_frame(df, index=index)
+    if not build_missing and not has_table(derived_dir, TABLE_NAME):
+        return None
+
+    table = build_join_table(parcels, zoning, overlays, apn_field, index=index,
+                             streets=streets, street_buffer_ft=street_buffer_ft)
+    try:
+        write_table(table.to_frame(), derived_dir, TABLE_NAME, sources, params)
+    except OSError:
+        # Read-only data dir: keep the in-memory table
+        pass
+    return table
@@ -0,0 +1,270 @@
+"""Jurisdiction registry: resolve an APN or lat/lng to the jurisdiction that covers it."""
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from engine.apply_rules import load_rules_table, get_crs_config, get_lookup_config
+from engine.batch import resolve_batch
+from engine.cache import FileBackedCache
+from engine.dataset import JURISDICTIONS, get_jurisdiction_config, get_jurisdiction_data, derived_path
+from parsers.geo import load_geofile, normalize_apn, normalize_apns
+from parsers.snapshot import load_layer, load_layer_column
+
+
+# Jurisdiction names and priorities shared with the UI (lower priority wins)
+REGISTRY_FILE = "ui/src/engine/juris/registry.json"
+DEFAULT_PRIORITY = 100
+
+# Boundaries are kept in lat/lng so points need no reprojection
+BOUNDARY_CRS = "EPSG:4326"
+
+# Registries keyed by resolved data dir
+_registries = FileBackedCache()
+
+
+def _load_registry_entries(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Registry JSON entries by id, or none if the file is missing."""
+    if not path.is_file():
+        return {}
+    with open(path, 'r') as f:
+        return {entry["id"]: entry for entry in json.load(f)}
+
+
+def jurisdiction_boundary(city: str, data_dir: str = ".") -> shapely.Geometry:
+    """
+    Boundary polygon of a jurisdiction in BOUNDARY_CRS.
+
+    Uses the configured boundary_layer; without one, the convex hull of the
+    zoning layer grown by the parcel lookup's max snap distance, so points
+    that would snap to an edge parcel still resolve.
+    """
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    if config.get("boundary_layer"):
+        boundary = load_geofile(str(base_path / config["boundary_layer"]), target_crs=BOUNDARY_CRS)
+        return shapely.union_all(np.asarray(boundary.geometry.values))
+
+    rules = load_rules_table(str(base_path / config["rules_file"])).rules
+    internal_crs = get_crs_config(rules)["internal"]
+    zoning = load_layer(str(base_path / config["zoning_layer"]), internal_crs,
+                        str(derived_path(city, data_dir)), "zoning")
+    hull = shapely.convex_hull(shapely.union_all(np.asarray(zoning.geometry.values)))
+    snap_distance = get_lookup_config(rules)["max_snap_distance_ft"] or 0
+    if snap_distance:
+        hull = hull.buffer(snap_distance)
+    return gpd.GeoSeries([hull], crs=internal_crs).to_crs(BOUNDARY_CRS).iloc[0]
+
+
+def jurisdiction_apns(city: str, data_dir: str = ".", apn_field: str = "APN") -> FrozenSet[str]:
+    """
+    Normalized APNs of a jurisdiction's parcel layer.
+
+    Only the APN column is read (from the parcel snapshot when fresh), so APN
+    resolution never loads a jurisdiction's dataset.
+    """
+    config = get_jurisdiction_config(city)
+    apns = load_layer_column(str(Path(data_dir) / config["parcel_layer"]), apn_field,
+                             str(derived_path(city, data_dir)), "parcels")
+    return frozenset(normalize_apns(pd.Series(apns, dtype=object).dropna()))
+
+
+class JurisdictionRegistry:
+    """
+    Jurisdiction boundaries in a spatial index, ordered by priority.
+
+    Only boundaries and APN sets are held; a jurisdiction's dataset is loaded
+    on first hit (see engine.dataset.get_jurisdiction_data) and dropped when idle.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], data_dir: str = "."):
+        """
+        Args:
+            entries: Dicts with id, name, priority, boundary (in BOUNDARY_CRS) and
+                optionally apn_pattern and apns (normalized APNs, see jurisdiction_apns)
+            data_dir: Data directory the jurisdictions load from
+        """
+        self.data_dir = data_dir
+        self.entries = sorted(entries, key=lambda entry: (entry["priority"], entry["id"]))
+        self.ids = [entry["id"] for entry in self.entries]
+        self._boundaries = np.array([entry["boundary"] for entry in self.entries], dtype=object)
+        shapely.prepare(self._boundaries)
+        self._tree = shapely.STRtree(self._boundaries)
+        self._apn_patterns = {
+            entry["id"]: re.compile(entry["apn_pattern"]) if entry.get("apn_pattern") else None
+            for entry in self.entries
+        }
+        self._apns = {entry["id"]: entry.get("apns") or frozenset() for entry in self.entries}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def resolve_point(self, lat: float, lng: float) -> Optional[str]:
+        """Highest-priority jurisdiction whose boundary contains the point, or None."""
+        hits = self._tree.query(shapely.points(lng, lat), predicate="intersects")
+        return self.ids[int(hits.min())] if len(hits) else None
+
+    def resolve_points(self, lats, lngs) -> np.ndarray:
+        """Vectorized resolve_point; None where no jurisdiction covers a point."""
+        points = shapely.points(np.asarray(lngs, dtype=float), np.asarray(lats, dtype=float))
+        result = np.full(len(points), None, dtype=object)
+        if len(points) == 0:
+            return result
+        point_idx, entry_idx = self._tree.query(points, predicate="intersects")
+        # Entries are sorted by priority, so the lowest index per point wins
+        best = np.full(len(points), len(self.entries), dtype=np.intp)
+        np.minimum.at(best, point_idx, entry_idx)
+        found = best < len(self.entries)
+        result[found] = np.array(self.ids, dtype=object)[best[found]]
+        return result
+
+    def resolve_apn(self, apn: str) -> Optional[str]:
+        """
+        Highest-priority jurisdiction whose parcel layer holds the APN, or None.
+
+        A set lookup per jurisdiction whose apn_pattern allows the APN; no
+        dataset is loaded.
+        """
+        key = normalize_apn(apn)
+        for city in self.ids:
+            pattern = self._apn_patterns[city]
+            if pattern is not None and not pattern.fullmatch(str(apn).strip()):
+                continue
+            if key in self._apns[city]:
+                return city
+        return None
+
+    def resolve_items(self, items: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Jurisdiction id per batch item (None where unresolved or malformed).
+
+        Points are resolved in one spatial query; each distinct APN once.
+        """
+        result = np.full(len(items), None, dtype=object)
+        point_items, apn_cities = [], {}
+        for i, item in enumerate(items):
+            apn = item.get("apn")
+            lat, lng = item.get("latitude"), item.get("longitude")
+            if apn and lat is None and lng is None:
+                if apn not in apn_cities:
+                    apn_cities[apn] = self.resolve_apn(apn)
+                result[i] = apn_cities[apn]
+            elif not apn and lat is not None and lng is not None:
+                point_items.append(i)
+        if point_items:
+            result[point_items] = self.resolve_points([items[i]["latitude"] for i in point_items],
+                                                      [items[i]["longitude"] for i in point_items])
+        return result
+
+    def resolve(self, apn: Optional[str] = None, lat_lng: Optional[Tuple[float, float]] = None) -> str:
+        """
+        Resolve an APN or lat/lng to a jurisdiction id.
+
+        Raises:
+            ValueError: If no jurisdiction covers it
+        """
+        if apn:
+            city = self.resolve_apn(apn)
+            if city is None:
+                raise ValueError(f"No jurisdiction found for APN: {apn}")
+            return city
+        lat, lng = lat_lng
+        city = self.resolve_point(lat, lng)
+        if city is None:
+            raise ValueError(f"No jurisdiction covers {lat},{lng}")
+        return city
+
+
+def _boundary_sources(city: str, data_dir: str) -> List[Path]:
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    if config.get("boundary_layer"):
+        return [base_path / config["boundary_layer"]]
+    return [base_path / config["rules_file"], base_path / config["zoning_layer"]]
+
+
+def _registry_sources(city: str, data_dir: str) -> List[Path]:
+    """Files a jurisdiction's registry entry is built from (boundary and APNs)."""
+    return _boundary_sources(city, data_dir) + [Path(data_dir) / get_jurisdiction_config(city)["parcel_layer"]]
+
+
+def build_registry(data_dir: str = ".") -> JurisdictionRegistry:
+    """
+    Build the registry for every configured jurisdiction with boundary and parcel data on disk.
+
+    Names and priorities come from REGISTRY_FILE (jurisdictions missing there
+    get DEFAULT_PRIORITY); ids listed there without a configuration are skipped.
+    """
+    registry_entries = _load_registry_entries(Path(data_dir) / REGISTRY_FILE)
+    entries = []
+    for city, config in JURISDICTIONS.items():
+        if not all(path.exists() for path in _registry_sources(city, data_dir)):
+            continue
+        registry_entry = registry_entries.get(city, {})
+        entries.append({
+            "id": city,
+            "name": registry_entry.get("name", city.title()),
+            "priority": registry_entry.get("priority", DEFAULT_PRIORITY),
+            "apn_pattern": config.get("apn_pattern"),
+            "apns": jurisdiction_apns(city, data_dir),
+            "boundary": jurisdiction_boundary(city, data_dir),
+        })
+    return JurisdictionRegistry(entries, data_dir)
+
+
+def get_registry(data_dir: str = ".") -> JurisdictionRegistry:
+    """Get the registry for a data dir, rebuilt when the registry, a boundary or a parcel layer changes."""
+    paths = [Path(data_dir) / REGISTRY_FILE]
+    for city in JURISDICTIONS:
+        paths.extend(_registry_sources(city, data_dir))
+    return _registries.get(str(Path(data_dir).resolve()), paths, lambda: build_registry(data_dir))
+
+
+def resolve_jurisdiction(data_dir: str = ".", apn: Optional[str] = None,
+                         lat_lng: Optional[Tuple[float, float]] = None) -> str:
+    """
+    Resolve an APN or lat/lng to the jurisdiction that covers it.
+
+    Raises:
+        ValueError: If no jurisdiction covers it
+    """
+    return get_registry(data_dir).resolve(apn=apn, lat_lng=lat_lng)
+
+
+def resolve_batch_any(items: List[Dict[str, Any]], data_dir: str = ".", max_distance: Optional[float] = None,
+                      trace: bool = False) -> List[Dict[str, Any]]:
+    """
+    Resolve a batch whose items may fall in different jurisdictions.
+
+    Items are grouped by resolved jurisdiction and each group runs through
+    engine.batch.resolve_batch against that jurisdiction's dataset.
+
+    Returns:
+        List (same order as items) of {"index", "ok", "result"} or
+        {"index", "ok", "error"} dicts
+    """
+    cities = get_registry(data_dir).resolve_items(items)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    for city in dict.fromkeys(city for city in cities if city is not None):
+        group = np.flatnonzero(cities == city)
+        group_results = resolve_batch(get_jurisdiction_data(city, data_dir), [items[i] for i in group], city,
+                                      max_distance=max_distance, trace=trace)
+        for i, result in zip(group, group_results):
+            results[i] = {**result, "index": int(i)}
+    for i in np.flatnonzero(pd.isna(cities)):
+        item = items[i]
+        if item.get("apn") and (item.get("latitude") is not None or item.get("longitude") is not None):
+            error = "Cannot specify both 'apn' and 'latitude'/'longitude'"
+        elif item.get("apn"):
+            error = f"No jurisdiction found for APN: {item['apn']}"
+        elif item.get("latitude") is not None and item.get("longitude") is not None:
+            error = f"No jurisdiction covers {item['latitude']},{item['longitude']}"
+        else:
+            error = "Either 'apn' or both 'latitude' and 'longitude' must be provided"
+        results[i] = {"index": int(i), "ok": False, "error": error}
+    return results
@@ -0,0 +1,540 @@
+"""Precedence engine: merge district rules with overlay, exception and override adjustments."""
+import json
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine.apply_rules import RULE_INTENTS
+from engine.cache import FileBackedCache
+from parsers.geo import normalize_apn, normalize_apns
+
+
+# Answer intent -> unit
+INTENTS = {intent: unit for intent, (_, unit) in RULE_INTENTS.items()}
+
+# Adjustment ops; "max" caps the value, "min" floors it
+OP_REPLACE, OP_ADD, OP_MAX, OP_MIN = 0, 1, 2, 3
+OPS = {"replace": OP_REPLACE, "add": OP_ADD, "max": OP_MAX, "min": OP_MIN}
+
+# Source types, in ascending precedence
+RULE, OVERLAY, EXCEPTION, OVERRIDE = 0, 1, 2, 3
+SOURCE_TYPES = ("rule", "overlay", "exception", "override")
+
+# Lot context thresholds (as in ui/src/engine/answers/conditions.ts)
+MIN_FRONTAGE_FT = 50.0
+STEEP_SLOPE_PCT = 15.0
+
+# Optional parcel columns feeding the lot context
+LOT_CONTEXT_FIELDS = {"flag": "flag_lot", "frontage": "frontage_ft", "slope": "slope_pct"}
+
+# Trace step expressions by op; "prev" is the previous step's value
+STEP_EXPRESSIONS = {OP_REPLACE: "{value}", OP_ADD: "prev + {value}", OP_MAX: "min(prev, {value})",
+                    OP_MIN: "max(prev, {value})"}
+OP_NAMES = {code: name for name, code in OPS.items()}
+
+# Compiled precedence tables keyed by resolved config file paths
+_precedence_tables = FileBackedCache()
+
+
+def _format_number(value: float) -> str:
+    return f"{value:g}"
+
+
+def _trace_step(step_type: str, step_id: str, op: int, amount: float, value: float,
+                citations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "type": step_type,
+        "id": step_id,
+        "op": OP_NAMES[op],
+        "expr": STEP_EXPRESSIONS[op].format(value=_format_number(amount)),
+        "value": float(value),
+        "citations": [dict(c) for c in citations],
+    }
+
+
+def _overlay_key(name: str) -> str:
+    return str(name).lower().replace(" ", "_")
+
+
+def _apply_op(op: int, current: np.ndarray, value: float) -> np.ndarray:
+    """Apply one adjustment op to an array of values (NaN stays NaN)."""
+    if op == OP_REPLACE:
+        return np.where(np.isnan(current), np.nan, value)
+    if op == OP_ADD:
+        return current + value
+    if op == OP_MAX:
+        return np.minimum(current, value)
+    return np.maximum(current, value)
+
+
+def _load_json_list(path: Path) -> List[Dict[str, Any]]:
+    """Load a JSON array config file; a missing file is an empty list."""
+    if not path.is_file():
+        return []
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a JSON array in {path}")
+    return data
+
+
+def lot_context(parcels, positions: np.ndarray, corner_lots: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Lot context arrays for the parcels at the given row positions.
+
+    corner comes from the corner-lot flags; flag, frontage and slope are read
+    from the optional LOT_CONTEXT_FIELDS parcel columns when present.
+    """
+    context = {"corner": np.asarray(corner_lots, dtype=bool)}
+    for key, field in LOT_CONTEXT_FIELDS.items():
+        if field in parcels.columns:
+            values = parcels[field].to_numpy()[positions]
+            context[key] = values.astype(bool) if key == "flag" else values.astype(np.float64)
+    return context
+
+
+class PrecedenceTable:
+    """
+    Overlay, exception and override configs compiled into per-intent op chains.
+
+    For each intent, overlay steps are ordered as applied (first replace,
+    then min/max, then add) and exception steps keep config order, so
+    evaluation is a fixed sequence of array ops over a whole batch.
+
+    Precedence: parcel override > district override > exceptions > overlays
+    > district rule. Overlay and exception results that disagree with each
+    other (in the intent's unit) make the answer needs_review unless an
+    override settles it.
+    """
+
+    __slots__ = ("overlays", "exceptions", "overrides", "_overlay_columns", "_overlay_steps",
+                 "_exception_steps", "_override_steps")
+
+    def __init__(self, overlays: List[Dict[str, Any]], exceptions: List[Dict[str, Any]],
+                 overrides: List[Dict[str, Any]]):
+        self.overlays = overlays
+        self.exceptions = exceptions
+        self.overrides = overrides
+
+        # Overlay layer names match an overlay config by id or name
+        self._overlay_columns: Dict[str, int] = {}
+        for column, overlay in enumerate(overlays):
+            for name in (overlay.get("name"), overlay["id"]):
+                if name:
+                    self._overlay_columns.setdefault(_overlay_key(name), column)
+
+        self._overlay_steps: Dict[str, List[Tuple[int, float, int]]] = {}
+        self._exception_steps: Dict[str, List[Tuple[int, float, int, str]]] = {}
+        self._override_steps: Dict[str, List[Dict[str, Any]]] = {}
+        for intent in INTENTS:
+            applicable = [(column, overlay) for column, overlay in enumerate(overlays)
+                          if intent in overlay.get("applies_to", [])]
+            replaces = [(OP_REPLACE, float(o["value"]), c) for c, o in applicable if o["op"] == "replace"]
+            bounds = [(OPS[o["op"]], float(o["value"]), c) for c, o in applicable if o["op"] in ("min", "max")]
+            adds = [(OP_ADD, float(o["value"]), c) for c, o in applicable if o["op"] == "add"]
+            self._overlay_steps[intent] = replaces + bounds + adds
+
+            # One step per exception with an adjustment for the intent (its first one)
+            exception_steps = []
+            for index, rule in enumerate(exceptions):
+                adjustment = next((a for a in rule.get("adjustments", []) if a["intent"] == intent), None)
+                if adjustment is not None:
+                    exception_steps.append((OPS[adjustment["op"]], float(adjustment["value"]), index,
+                                            adjustment.get("unit", "")))
+            self._exception_steps[intent] = exception_steps
+
+            # District overrides first, parcel overrides last; the first match in config order wins
+            matching = [o for o in overrides if o.get("intent") == intent]
+            district = [o for o in matching if o.get("scope", "district") != "parcel"]
+            parcel = [dict(o, apn_key=normalize_apn(o.get("apn", ""))) for o in matching
+                      if o.get("scope") == "parcel"]
+            self._override_steps[intent] = district[::-1] + parcel[::-1]
+
+    def overlay_matrix(self, overlays: Sequence[Iterable[str]]) -> np.ndarray:
+        """Boolean (parcels x overlay configs) membership from per-parcel overlay names."""
+        matrix = np.zeros((len(overlays), len(self.overlays)), dtype=bool)
+        for row, names in enumerate(overlays):
+            for name in names:
+                column = self._overlay_columns.get(_overlay_key(name))
+                if column is not None:
+                    matrix[row, column] = True
+        return matrix
+
+    def predicate_matrix(self, n: int, lot: Optional[Mapping[str, np.ndarray]] = None) -> np.ndarray:
+        """Boolean (parcels x exception configs) predicate results for a lot context."""
+        lot = lot or {}
+        masks = {
+            "corner_lot": np.asarray(lot.get("corner", np.zeros(n, dtype=bool)), dtype=bool),
+            "flag_lot": np.asarray(lot.get("flag", np.zeros(n, dtype=bool)), dtype=bool),
+            "min_frontage": np.asarray(lot.get("frontage", np.full(n, np.nan)), dtype=np.float64) < MIN_FRONTAGE_FT,
+            "steep_slope": np.asarray(lot.get("slope", np.full(n, np.nan)), dtype=np.float64) > STEEP_SLOPE_PCT,
+        }
+        matrix = np.zeros((n, len(self.exceptions)), dtype=bool)
+        for column, rule in enumerate(self.exceptions):
+            if rule.get("predicate") in masks:
+                matrix[:, column] = masks[rule["predicate"]]
+        return matrix
+
+    def evaluate(self, zones: Sequence[str], rules_table,
+                 overlays: Sequence[Iterable[str]], lot: Optional[Mapping[str, np.ndarray]] = None,
+                 apns: Optional[Sequence[str]] = None, today: Optional[date] = None) -> "MergedAnswers":
+        """
+        Merge answers for a batch of parcels in one vectorized pass.
+
+        Args:
+            zones: Zone code per parcel
+            rules_table: Compiled district rules (engine.apply_rules.RulesTable)
+            overlays: Overlay names per parcel
+            lot: Lot context arrays ("corner", "flag", "frontage", "slope"), see lot_context
+            apns: Parcel APNs (for parcel-scoped overrides)
+            today: Date for override expiry (default: today)
+
+        Returns:
+            MergedAnswers for the batch
+        """
+        n = len(zones)
+        zones = np.asarray(zones, dtype=object)
+        apn_keys = normalize_apns(apns) if apns is not None else np.full(n, None, dtype=object)
+        today = (today or date.today()).isoformat()
+        members = self.overlay_matrix(overlays)
+        predicates = self.predicate_matrix(n, lot)
+        base = base_values(rules_table, zones)
+
+        columns = {}
+        for intent, unit in INTENTS.items():
+            value = base[intent].copy()
+            rule_value = value.copy()
+            provenance = np.where(np.isnan(value), -1, RULE).astype(np.int8)
+            low = np.full(n, np.nan)
+            high = np.full(n, np.nan)
+
+            # Overlays: first replace wins, min/max count only when they bind
+            overlay_steps = self._overlay_steps[intent]
+            overlay_hits = np.zeros((n, len(overlay_steps)), dtype=bool)
+            overlay_values = np.full((n, len(overlay_steps)), np.nan)
+            replaced = np.zeros(n, dtype=bool)
+            for step, (op, amount, column) in enumerate(overlay_steps):
+                mask = members[:, column] & ~np.isnan(value)
+                if op == OP_REPLACE:
+                    mask &= ~replaced
+                    replaced |= mask
+                adjusted = _apply_op(op, value, amount)
+                if op in (OP_MAX, OP_MIN):
+                    mask &= adjusted != value
+                value = np.where(mask, adjusted, value)
+                overlay_hits[:, step] = mask
+                overlay_values[:, step] = np.where(mask, value, np.nan)
+            overlay_applied = overlay_hits.any(axis=1)
+            overlay_value = np.where(overlay_applied, value, np.nan)
+            low, high = np.fmin(low, overlay_value), np.fmax(high, overlay_value)
+            provenance[overlay_applied] = OVERLAY
+
+            # Exceptions in config order, each refining the running value
+            exception_steps = self._exception_steps[intent]
+            exception_hits = np.zeros((n, len(exception_steps)), dtype=bool)
+            exception_values = np.full((n, len(exception_steps)), np.nan)
+            for step, (op, amount, column, adjustment_unit) in enumerate(exception_steps):
+                mask = predicates[:, column] & ~np.isnan(value)
+                value = np.where(mask, _apply_op(op, value, amount), value)
+                exception_hits[:, step] = mask
+                exception_values[:, step] = np.where(mask, value, np.nan)
+                if adjustment_unit == unit:
+                    low, high = np.fmin(low, exception_values[:, step]), np.fmax(high, exception_values[:, step])
+            provenance[exception_hits.any(axis=1)] = EXCEPTION
+
+            # Overrides replace whatever came before; parcel scope is applied last so it wins
+            override_hits = np.full(n, -1, dtype=np.intp)
+            for step, override in enumerate(self._override_steps[intent]):
+                if override.get("expires") and str(override["expires"]) < today:
+                    continue
+                mask = zones == override.get("district")
+                if override.get("scope") == "parcel":
+                    mask &= apn_keys == override["apn_key"]
+                value = np.where(mask, float(override["value"]), value)
+                override_hits[mask] = step
+            overridden = override_hits >= 0
+            provenance[overridden] = OVERRIDE
+
+            columns[intent] = {
+                "value": value,
+                "rule_value": rule_value,
+                "overlay_value": overlay_value,
+                "provenance": provenance,
+                "conflict": (high > low) & ~overridden,
+                "overlay_hits": overlay_hits,
+                "overlay_values": overlay_values,
+                "exception_hits": exception_hits,
+                "exception_values": exception_values,
+                "override_hits": override_hits,
+            }
+        return MergedAnswers(self, rules_table, zones, columns)
+
+
+class MergedAnswers:
+    """
+    Columnar result of PrecedenceTable.evaluate.
+
+    evaluate records every step's hits and values as arrays; answers(row)
+    and trace(row, intent) build one parcel's dicts from them on demand, so
+    traces cost nothing unless asked for.
+    """
+
+    __slots__ = ("table", "rules_table", "zones", "columns")
+
+    def __init__(self, table: PrecedenceTable, rules_table, zones: np.ndarray,
+                 columns: Dict[str, Dict[str, np.ndarray]]):
+        self.table = table
+        self.rules_table = rules_table
+        self.zones = zones
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def trace(self, row: int, intent: str, jurisdiction_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Step-by-step trace of one merged answer (see TRACE_README.md and
+        ui/src/engine/answers/trace.schema.json).
+
+        Returns:
+            Trace dict, or None if the intent has no district rule (traces
+            start with a rule step)
+        """
+        table = self.table
+        column = self.columns[intent]
+        rule_value = column["rule_value"][row]
+        if np.isnan(rule_value):
+            return None
+        zone = self.zones[row]
+        steps = [{
+            "type": "rule",
+            "id": f"rule.{zone}.{intent}",
+            "expr": _format_number(rule_value),
+            "value": float(rule_value),
+            "citations": [dict(c) for c in self.rules_table.rule_answer(zone, intent)["citations"]],
+        }]
+        for step, (op, amount, index) in enumerate(table._overlay_steps[intent]):
+            if column["overlay_hits"][row, step]:
+                overlay = table.overlays[index]
+                steps.append(_trace_step("overlay", f"overlay.{overlay['id']}", op, amount,
+                                         column["overlay_values"][row, step], overlay.get("citations", [])))
+        for step, (op, amount, index, _) in enumerate(table._exception_steps[intent]):
+            if column["exception_hits"][row, step]:
+                exception = table.exceptions[index]
+                steps.append(_trace_step("exception", f"exception.{exception['id']}", op, amount,
+                                         column["exception_values"][row, step], exception.get("citations", [])))
+        override_step = int(column["override_hits"][row])
+        if override_step >= 0:
+            override = table._override_steps[intent][override_step]
+            citations = [override["citation"]] if override.get("citation") else []
+            steps.append(_trace_step("override", f"override.{override.get('scope', 'district')}", OP_REPLACE,
+                                     float(override["value"]), override["value"], citations))
+
+        conflict = bool(column["conflict"][row])
+        return {
+            "answer_id": f"{zone}:{intent}",
+            "jurisdiction_id": jurisdiction_id,
+            "district": str(zone),
+            "intent": intent,
+            "units": INTENTS[intent],
+            "steps": steps,
+            "provenance": "conflict" if conflict else steps[-1]["type"],
+            "final_value": None if conflict else float(column["value"][row]),
+            "conflict": conflict,
+        }
+
+    def answers(self, row: int, trace_jurisdiction: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Merged answers for one parcel, in INTENTS order.
+
+        Each answer is {"intent", "answer_id", "status", "value", "unit",
+        "rationale", "provenance", "sources", "citations"}; needs_review answers have no
+        value. Intents with no district rule and no override are omitted.
+        With trace_jurisdiction, each answer also gets its "trace".
+        """
+        table = self.table
+        zone = self.zones[row]
+        answers = []
+        for intent, unit in INTENTS.items():
+            column = self.columns[intent]
+            provenance = int(column["provenance"][row])
+            if provenance < 0:
+                continue
+
+            sources, citations = [], []
+            rule = self.rules_table.rule_answer(zone, intent)
+            if rule is not None:
+                sources.append({"type": "rule", "value": float(rule["value"]), "unit": unit})
+            overlay_ids, overlay_names = [], []
+            for step, (_, _, index) in enumerate(table._overlay_steps[intent]):
+                if column["overlay_hits"][row, step]:
+                    overlay_ids.append(table.overlays[index]["id"])
+                    overlay_names.append(table.overlays[index].get("name", table.overlays[index]["id"]))
+                    citations.extend(table.overlays[index].get("citations", []))
+            if overlay_ids:
+                sources.append({"type": "overlay", "id": overlay_ids[0], "applied": overlay_ids,
+                                "value": float(column["overlay_value"][row]), "unit": unit})
+            for step, (_, _, index, adjustment_unit) in enumerate(table._exception_steps[intent]):
+                if column["exception_hits"][row, step]:
+                    exception = table.exceptions[index]
+                    sources.append({"type": "exception", "id": exception["id"],
+                                    "value": float(column["exception_values"][row, step]),
+                                    "unit": adjustment_unit})
+                    citations.extend(exception.get("citations", []))
+            if rule is not None:
+                citations.extend(rule["citations"])
+            override_step = int(column["override_hits"][row])
+            if override_step >= 0:
+                override = table._override_steps[intent][override_step]
+                sources.append({"type": "override", "id": override.get("scope", "district"),
+                                "value": float(override["value"]), "unit": override.get("unit", unit)})
+                citations = [override["citation"]] if override.get("citation") else []
+
+            answer = {"intent": intent, "answer_id": f"{zone}:{intent}"}
+            if column["conflict"][row]:
+                answer["status"] = "needs_review"
+                answer["unit"] = unit
+            else:
+                answer["status"] = "answered"
+                answer["value"] = float(column["value"][row])
+                answer["unit"] = sources[-1]["unit"] if provenance == OVERRIDE else unit
+            if provenance == OVERRIDE:
+                answer["rationale"] = override.get("rationale", "")
+            elif rule is not None:
+                answer["rationale"] = rule["rationale"]
+                if overlay_names:
+                    answer["rationale"] += f" (adjusted by {', '.join(overlay_names)} overlay)"
+            answer["provenance"] = SOURCE_TYPES[provenance]
+            answer["sources"] = sources
+            answer["citations"] = [dict(c) for c in citations]
+            if trace_jurisdiction is not None:
+                answer["trace"] = self.trace(row, intent, trace_jurisdiction)
+            answers.append(answer)
+        return answers
+
+
+def base_values(rules_table, zones: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    District rule value per parcel for every intent (NaN where missing).
+
+    Rule lookups run once per distinct zone.
+    """
+    zones = np.asarray([zone if zone is not None else "UNKNOWN" for zone in zones], dtype=object)
+    if len(zones) == 0:
+        return {intent: np.empty(0) for intent in INTENTS}
+    unique_zones, inverse = np.unique(zones.astype(str), return_inverse=True)
+    values = {}
+    for intent in INTENTS:
+        answers = [rules_table.rule_answer(zone, intent) for zone in unique_zones]
+        values[intent] = np.array([a["value"] if a is not None else np.nan for a in answers],
+                                  dtype=np.float64)[inverse]
+    return values
+
+
+def compile_precedence(overlays: List[Dict[str, Any]], exceptions: List[Dict[str, Any]],
+                       overrides: List[Dict[str, Any]]) -> PrecedenceTable:
+    """Compile overlay, exception and override configs into a PrecedenceTable."""
+    return PrecedenceTable(overlays, exceptions, overrides)
+
+
+def load_precedence_table(overlays_file: str, exceptions_file: str, overrides_file: str) -> PrecedenceTable:
+    """
+    Load and compile the overlays, exceptions and overrides JSON configs, cached per file set.
+
+    Missing files count as empty configs.
+    """
+    paths = [Path(overlays_file), Path(exceptions_file), Path(overrides_file)]
+    return _precedence_tables.get(
+        tuple(str(p.resolve()) for p in paths),
+        paths,
+        lambda: compile_precedence(*(_load_json_list(p) for p in paths)),
+    )
+
+
+def parcel_answers(data: Dict[str, Any], zone: str, overlays: List[str], corner_lot: bool,
+                   apn: Optional[str] = None, attributes: Optional[Mapping[str, Any]] = None,
+                   trace_jurisdiction: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Merged answers for a single parcel of a jurisdiction dataset (a batch of one).
+
+    Args:
+        data: Jurisdiction dataset (see engine.dataset.load_jurisdiction_data)
+        zone, overlays, corner_lot: The parcel's zone, overlay names and corner-lot flag
+        apn: Parcel APN (for parcel-scoped overrides)
+        attributes: Parcel row, read for the optional LOT_CONTEXT_FIELDS
+        trace_jurisdiction: Jurisdiction id; when given each answer carries its trace
+
+    Returns:
+        List of answers (see MergedAnswers.answers), or None if the dataset
+        has no precedence table
+    """
+    precedence = data.get("precedence")
+    if precedence is None:
+        return None
+    lot = {"corner": np.array([bool(corner_lot)])}
+    for key, field in LOT_CONTEXT_FIELDS.items():
+        if attributes is not None and field in attributes:
+            lot[key] = np.array([attributes[field]], dtype=bool if key == "flag" else np.float64)
+    merged = precedence.evaluate([zone], data["rules_table"], [overlays],
+                                 lot=lot, apns=[apn] if apn else None)
+    return merged.answers(0, trace_jurisdiction)
+
+
+class AnswerTable:
+    """
+    Merged answer for every {zone, intent, corner} case, precomputed when the rules load.
+
+    Entries cover district rules, corner-lot exceptions and district
+    overrides (no overlays or parcel-scoped overrides, which depend on the
+    parcel). Each entry is also kept pre-serialized as JSON.
+    """
+
+    __slots__ = ("jurisdiction_id", "built_on", "_answers", "_payloads")
+
+    def __init__(self, jurisdiction_id: str, built_on: date, answers: Dict[Tuple[str, str, bool], Dict[str, Any]]):
+        self.jurisdiction_id = jurisdiction_id
+        self.built_on = built_on
+        self._answers = answers
+        self._payloads = {key: json.dumps(answer).encode() for key, answer in answers.items()}
+
+    def answer(self, zone: str, intent: str, corner_lot: bool = False) -> Optional[Dict[str, Any]]:
+        """Precomputed answer, or None if the zone has no answer for the intent."""
+        return self._answers.get((zone, intent, bool(corner_lot)))
+
+    def payload(self, zone: str, intent: str, corner_lot: bool = False) -> Optional[bytes]:
+        """Precomputed answer as JSON bytes, or None if the zone has no answer for the intent."""
+        return self._payloads.get((zone, intent, bool(corner_lot)))
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+
+def build_answer_table(precedence: PrecedenceTable, rules_table, jurisdiction_id: str,
+                       today: Optional[date] = None) -> AnswerTable:
+    """Evaluate every zone, corner and non-corner, in one pass into an AnswerTable."""
+    today = today or date.today()
+    zone_codes = rules_table.zone_codes()
+    zones = zone_codes * 2
+    corners = np.repeat([False, True], len(zone_codes))
+    merged = precedence.evaluate(zones, rules_table, [[] for _ in zones], lot={"corner": corners}, today=today)
+
+    answers = {}
+    for row, (zone, corner_lot) in enumerate(zip(zones, corners.tolist())):
+        for answer in merged.answers(row):
+            answer.pop("sources")
+            answers[(zone, answer["intent"], corner_lot)] = dict(answer, zone=zone, corner_lot=corner_lot)
+    return AnswerTable(jurisdiction_id, today, answers)
+
+
+def current_answer_table(data: Dict[str, Any], jurisdiction_id: str) -> AnswerTable:
+    """
+    The dataset's answer table, rebuilt first if it was built on an earlier
+    day (district overrides expire by date).
+    """
+    table = data.get("answer_table")
+    if table is None or table.built_on != date.today():
+        table = data["answer_table"] = build_answer_table(data["precedence"], data["rules_table"],
+                                                          jurisdiction_id)
+    return table
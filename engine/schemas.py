@@ -61,9 +61,26 @@ def create_output_schema(apn: str, jurisdiction: str, zone: str,
                         setbacks_ft: Dict[str, float], height_ft: float,
                         far: float, lot_coverage_pct: float,
                         overlays: List[str], sources: List[Dict[str, str]],
-                        notes: str, run_ms: float) -> Dict[str, Any]:
-    """Create output dict matching frozen schema."""
-    return {
+                        notes: str, run_ms: float,
+                        parcel_match: Optional[Dict[str, Any]] = None,
+                        zone_fractions: Optional[List[Dict[str, Any]]] = None,
+                        envelope: Optional[Dict[str, float]] = None,
+                        answers: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Create output dict matching frozen schema.
+
+    Optional fields, omitted when not given:
+    - parcel_match (lat/lng lookups only): how the point was matched to the
+      parcel, {"method": "contains" | "nearest", "snap_distance_ft"}
+    - zone_fractions (split-zoned parcels only): share of parcel area per
+      zone, [{"zone", "fraction"}, ...] with the dominant zone first
+    - envelope: buildable envelope areas in sq ft (see engine.envelope),
+      {"lot_area_sqft", "envelope_area_sqft", "max_footprint_sqft",
+      "buildable_footprint_sqft", "max_gfa_sqft"}
+    - answers: per-intent answers merged with overlay, exception and
+      override adjustments (see engine.precedence)
+    """
+    output = {
         "apn": apn,
         "jurisdiction": jurisdiction,
         "zone": zone,
@@ -81,4 +98,20 @@ def create_output_schema(apn: str, jurisdiction: str, zone: str,
         "notes": notes,
         "run_ms": run_ms
     }
+    if parcel_match is not None:
+        output["parcel_match"] = parcel_match
+    if zone_fractions:
+        output["zone_fractions"] = zone_fractions
+    if envelope is not None:
+        output["envelope"] = envelope
+    if answers is not None:
+        output["answers"] = answers
+    return output
+
 
+def format_jurisdiction_name(jurisdiction_raw: str) -> str:
+    """Format jurisdiction id for output: "austin_tx" -> "Austin, TX"."""
+    if "_" in jurisdiction_raw:
+        parts = jurisdiction_raw.split("_")
+        return f"{parts[0].title()}, {parts[1].upper()}"
+    return jurisdiction_raw.title()
@@ -0,0 +1,215 @@
+"""Full-text search over code PDFs: an on-disk inverted index (SQLite FTS5) ranked by BM25."""
+import hashlib
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from engine.dataset import get_jurisdiction_config
+from parsers.pdf import CITATION_PATTERN, extract_documents, pdf_content_hash
+
+
+# One index per jurisdiction and data dir: <SEARCH_INDEX_DIR>/<city>-<data dir hash>.sqlite
+SEARCH_INDEX_DIR = Path(__file__).parent.parent / "cache" / "search"
+SEARCH_INDEX_VERSION = 1
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+# Tokens of context around matches in result snippets
+SNIPPET_TOKENS = 24
+
+_QUERY_TOKENS = re.compile(r'"([^"]*)"|(\S+)')
+_update_lock = threading.Lock()
+
+
+def split_passages(pages: List[str], pattern: str = CITATION_PATTERN) -> List[Dict[str, Any]]:
+    """
+    Split page texts into passages in one pass.
+
+    A passage is the run of lines on one page under the same section; a new
+    section starts at each line with a citation.
+
+    Returns:
+        List of {"citation" (None before the first section), "page" (1-based),
+        "line" (0-based, within the page), "text"}
+    """
+    regex = re.compile(pattern)
+    passages = []
+    citation = None
+    for page_number, page_text in enumerate(pages, start=1):
+        start, lines = 0, []
+        for i, line in enumerate(page_text.split('\n')):
+            match = regex.search(line)
+            if match and lines:
+                passages.append({"citation": citation, "page": page_number, "line": start,
+                                 "text": '\n'.join(lines)})
+                start, lines = i, []
+            if match:
+                citation = match.group(0)
+            lines.append(line)
+        if any(line.strip() for line in lines):
+            passages.append({"citation": citation, "page": page_number, "line": start,
+                             "text": '\n'.join(lines)})
+    return passages
+
+
+def parse_query(query: str) -> str:
+    """
+    Turn a user query into an FTS5 match expression.
+
+    Double-quoted text is a phrase; other words are terms. All must match.
+
+    Raises:
+        ValueError: If the query has no terms
+    """
+    parts = []
+    for phrase, term in _QUERY_TOKENS.findall(query):
+        text = (phrase or term).strip()
+        if text:
+            parts.append('"' + text.replace('"', '""') + '"')
+    if not parts:
+        raise ValueError("Empty search query")
+    return " ".join(parts)
+
+
+def _connect(index_file: Path) -> sqlite3.Connection:
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(index_file), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, pdf_hash TEXT, name TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS indexed (pdf_hash TEXT PRIMARY KEY, version INTEGER)")
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5("
+        "text, citation UNINDEXED, page UNINDEXED, line UNINDEXED, pdf_hash UNINDEXED, "
+        "tokenize = 'porter unicode61')"
+    )
+    return conn
+
+
+def _stale(conn: sqlite3.Connection, documents: Dict[str, str]) -> bool:
+    rows = dict(conn.execute("SELECT path, pdf_hash FROM documents").fetchall())
+    indexed = {pdf_hash for pdf_hash, in conn.execute(
+        "SELECT pdf_hash FROM indexed WHERE version = ?", (SEARCH_INDEX_VERSION,))}
+    return rows != documents or not set(documents.values()) <= indexed
+
+
+def update_search_index(pdf_paths: List[str], index_file: Path, workers: Optional[int] = None) -> int:
+    """
+    Bring a search index in line with a set of PDFs.
+
+    Only PDFs whose content hash is not yet indexed are extracted (see
+    parsers.pdf.extract_documents); passages of content no longer listed
+    are dropped.
+
+    Args:
+        pdf_paths: PDFs the index should cover
+        index_file: SQLite index file
+        workers: Extraction worker processes
+
+    Returns:
+        Number of documents (re)indexed
+    """
+    documents = {}
+    for pdf_path in pdf_paths:
+        pdf_hash = pdf_content_hash(pdf_path)
+        if pdf_hash is None:
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        documents[str(pdf_path)] = pdf_hash
+
+    with closing(_connect(index_file)) as conn:
+        if not _stale(conn, documents):
+            return 0
+
+    with _update_lock, closing(_connect(index_file)) as conn:
+        indexed = {pdf_hash for pdf_hash, in conn.execute(
+            "SELECT pdf_hash FROM indexed WHERE version = ?", (SEARCH_INDEX_VERSION,))}
+        pending = {}
+        for path, pdf_hash in documents.items():
+            if pdf_hash not in indexed and pdf_hash not in pending:
+                pending[pdf_hash] = path
+        pages = extract_documents(list(pending.values()), workers) if pending else {}
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM documents")
+            conn.executemany("INSERT INTO documents VALUES (?, ?, ?)",
+                             [(path, pdf_hash, Path(path).name) for path, pdf_hash in documents.items()])
+            kept = set(documents.values())
+            for pdf_hash, in conn.execute("SELECT pdf_hash FROM indexed").fetchall():
+                if pdf_hash not in kept or pdf_hash in pending:
+                    conn.execute("DELETE FROM passages WHERE pdf_hash = ?", (pdf_hash,))
+                    conn.execute("DELETE FROM indexed WHERE pdf_hash = ?", (pdf_hash,))
+            for pdf_hash, path in pending.items():
+                conn.executemany(
+                    "INSERT INTO passages (text, citation, page, line, pdf_hash) VALUES (?, ?, ?, ?, ?)",
+                    [(passage["text"], passage["citation"], passage["page"], passage["line"], pdf_hash)
+                     for passage in split_passages(pages[path])],
+                )
+                conn.execute("INSERT INTO indexed VALUES (?, ?)", (pdf_hash, SEARCH_INDEX_VERSION))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return len(pending)
+
+
+def search_index(query: str, index_file: Path, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Search an index, best matches first.
+
+    Args:
+        query: Terms and "quoted phrases" (see parse_query)
+        index_file: SQLite index file
+        limit: Max results
+
+    Returns:
+        List of {"document", "citation", "page", "line", "snippet", "score"};
+        higher scores are better matches (negated FTS5 bm25)
+    """
+    expression = parse_query(query)
+    with closing(_connect(index_file)) as conn:
+        names = {}
+        for pdf_hash, name in conn.execute("SELECT pdf_hash, name FROM documents ORDER BY path"):
+            names.setdefault(pdf_hash, name)
+        rows = conn.execute(
+            "SELECT pdf_hash, citation, page, line, "
+            "snippet(passages, 0, '[', ']', '…', ?), bm25(passages) AS rank "
+            "FROM passages WHERE passages MATCH ? ORDER BY rank LIMIT ?",
+            (SNIPPET_TOKENS, expression, limit),
+        ).fetchall()
+    return [
+        {"document": names.get(pdf_hash), "citation": citation, "page": page, "line": line,
+         "snippet": snippet, "score": round(-rank, 4)}
+        for pdf_hash, citation, page, line, snippet, rank in rows
+    ]
+
+
+def search_index_file(city: str, data_dir: str = ".") -> Path:
+    """
+    Index file for a jurisdiction's code PDFs under a data dir.
+
+    Keyed by the resolved data dir as well as the city: each update drops
+    passages of PDFs it was not given, so two data dirs sharing an index
+    would re-extract each other's PDFs on every alternate search.
+    """
+    digest = hashlib.sha256(str(Path(data_dir).resolve()).encode()).hexdigest()[:12]
+    return SEARCH_INDEX_DIR / f"{city}-{digest}.sqlite"
+
+
+def search_code(city: str, query: str, data_dir: str = ".", limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Search a jurisdiction's code PDFs (config code_pdfs), updating its index first.
+
+    Raises:
+        ValueError: If the jurisdiction is unknown or the query is empty
+    """
+    config = get_jurisdiction_config(city)
+    base_path = Path(data_dir)
+    pdf_paths = [str(base_path / pdf) for pdf in config.get("code_pdfs", [])
+                 if (base_path / pdf).exists()]
+    index_file = search_index_file(city, data_dir)
+    update_search_index(pdf_paths, index_file)
+    return search_index(query, index_file, limit)
@@ -0,0 +1,364 @@
+"""
+Telemetry helpers for structured logging and metrics collection.
+
+Counters, gauges and timers aggregate in memory and are written as a single
+"Metrics flushed" record every FLUSH_INTERVAL_S seconds and at exit. Log
+records go through a queue to a background listener, so callers never block
+on console or file writes.
+
+Timers are spans: the open span lives in a context variable, so concurrent
+requests (threads or tasks) each build their own span tree.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+LOG_DIR = Path("cache/logs")
+
+# Also log every incr/set_gauge/timer call at DEBUG (per-event mode)
+EVENT_LOGS = os.getenv("ZONING_TELEMETRY_EVENTS", "0") == "1"
+
+# Seconds between aggregate flushes (0 = only at exit or on flush_metrics())
+FLUSH_INTERVAL_S = float(os.getenv("ZONING_TELEMETRY_FLUSH_S", "60"))
+
+# Fraction of DEBUG records kept; INFO and above are never sampled
+DEBUG_SAMPLE_RATE = float(os.getenv("ZONING_LOG_SAMPLE_RATE", "1.0"))
+
+# Global metrics store
+_metrics: Dict[str, Any] = defaultdict(int)
+_timer_stats: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+_dirty = False
+_last_flush = time.monotonic()
+
+_logger: Optional[logging.Logger] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_logger_lock = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry = {
+            # Creation time, not write time: records may wait in the queue
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        # Add extra fields if present
+        if hasattr(record, "extra"):
+            log_entry.update(record.extra)
+        return json.dumps(log_entry)
+
+
+class DebugSampler(logging.Filter):
+    """Keep a random fraction of DEBUG records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+def _ensure_logger() -> logging.Logger:
+    """Initialize structured logger if not already created."""
+    global _logger, _listener
+    if _logger is not None:
+        return _logger
+
+    with _logger_lock:
+        if _logger is not None:
+            return _logger
+
+        # Create logs directory
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+        # Console handler (INFO level, JSON)
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(JSONFormatter())
+
+        # File handler (DEBUG level, JSON)
+        log_file = LOG_DIR / f"zoning_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JSONFormatter())
+
+        # Callers only enqueue; the listener thread does the writes
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(DebugSampler(DEBUG_SAMPLE_RATE))
+        _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+
+        # Create logger
+        logger = logging.getLogger("zoning")
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+
+        _logger = logger
+        return logger
+
+
+def log(level: str, message: str, **extra: Any) -> None:
+    """Emit structured log entry."""
+    logger = _ensure_logger()
+    log_level = getattr(logging, level.upper(), logging.INFO)
+    logger.log(log_level, message, extra={"extra": extra})
+
+
+def _maybe_flush() -> None:
+    """Flush aggregates if FLUSH_INTERVAL_S has passed since the last flush."""
+    if FLUSH_INTERVAL_S > 0 and time.monotonic() - _last_flush >= FLUSH_INTERVAL_S:
+        flush_metrics()
+
+
+class Span:
+    """A timed operation; spans opened while it is current become its children."""
+
+    __slots__ = ("name", "attrs", "parent", "children", "start_ns", "end_ns")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List["Span"] = []
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> float:
+        """Elapsed milliseconds (so far, if still open)."""
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span tree as JSON-ready dicts: name, duration_ms, attributes and children."""
+        tree = {"name": self.name, "duration_ms": round(self.duration_ms, 3), **self.attrs}
+        if self.children:
+            tree["children"] = [child.to_dict() for child in self.children]
+        return tree
+
+
+# Innermost open span of the current thread / task
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("zoning_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span in this context, or None."""
+    return _current_span.get()
+
+
+def start_span(name: str, **attrs: Any) -> Span:
+    """Open a span as a child of the current span and make it current."""
+    parent = _current_span.get()
+    span = Span(name, parent, **attrs)
+    if parent is not None:
+        parent.children.append(span)
+    _current_span.set(span)
+    if EVENT_LOGS:
+        log("debug", f"Timer started: {name}", timer=name, action="start")
+    return span
+
+
+def end_span(span: Span) -> float:
+    """
+    Close a span, add it to its timer aggregate and return elapsed seconds.
+
+    If the span is current (or an ancestor of it), its parent becomes current.
+    """
+    global _dirty
+    if span.end_ns is None:
+        span.end_ns = time.perf_counter_ns()
+        elapsed_ms = span.duration_ms
+        with _lock:
+            stats = _timer_stats.get(span.name)
+            if stats is None:
+                stats = _timer_stats[span.name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            _dirty = True
+        if EVENT_LOGS:
+            log("debug", f"Timer stopped: {span.name}", timer=span.name, elapsed_ms=elapsed_ms)
+        _maybe_flush()
+
+    node = _current_span.get()
+    while node is not None and node is not span:
+        node = node.parent
+    if node is span:
+        _current_span.set(span.parent)
+    return span.duration_ms / 1000
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a block as a child span of the current span."""
+    opened = start_span(name, **attrs)
+    try:
+        yield opened
+    finally:
+        end_span(opened)
+
+
+@contextmanager
+def request_span(name: str, **attrs: Any) -> Iterator[Span]:
+    """
+    Time a block as the root of a new span tree, ignoring any span already open.
+
+    Use one per request; attach root.to_dict() to the response or a log line.
+    """
+    token = _current_span.set(None)
+    root = start_span(name, **attrs)
+    try:
+        yield root
+    finally:
+        end_span(root)
+        _current_span.reset(token)
+
+
+def start_timer(name: str) -> None:
+    """Start a named timer (a span under the current span)."""
+    start_span(name)
+
+
+def stop_timer(name: str) -> float:
+    """Stop the innermost open timer with this name in this context and return elapsed seconds."""
+    node = _current_span.get()
+    while node is not None and node.name != name:
+        node = node.parent
+    if node is None:
+        log("warning", f"Timer not found: {name}", timer=name)
+        return 0.0
+    return end_span(node)
+
+
+def incr(counter: str, value: int = 1) -> None:
+    """Increment a counter metric."""
+    global _dirty
+    with _lock:
+        _metrics[counter] += value
+        total = _metrics[counter]
+        _dirty = True
+    if EVENT_LOGS:
+        log("debug", f"Counter incremented: {counter}", counter=counter, value=value, total=total)
+    _maybe_flush()
+
+
+def set_gauge(gauge: str, value: float) -> None:
+    """Set a gauge metric."""
+    global _dirty
+    with _lock:
+        _metrics[gauge] = value
+        _dirty = True
+    if EVENT_LOGS:
+        log("debug", f"Gauge set: {gauge}", gauge=gauge, value=value)
+    _maybe_flush()
+
+
+def _timer_summary() -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "count": stats["count"],
+            "total_ms": stats["total_ms"],
+            "avg_ms": stats["total_ms"] / stats["count"],
+            "max_ms": stats["max_ms"],
+        }
+        for name, stats in _timer_stats.items()
+    }
+
+
+def flush_metrics() -> Optional[Dict[str, Any]]:
+    """
+    Log current counters, gauges and timer aggregates as one DEBUG record.
+
+    Returns:
+        The flushed snapshot, or None if nothing changed since the last flush
+    """
+    global _dirty, _last_flush
+    with _lock:
+        _last_flush = time.monotonic()
+        if not _dirty:
+            return None
+        snapshot = {"metrics": dict(_metrics), "timers": _timer_summary()}
+        _dirty = False
+    log("debug", "Metrics flushed", **snapshot)
+    return snapshot
+
+
+def emit_metrics(output_path: Optional[str] = None) -> Dict[str, Any]:
+    """Emit all collected metrics to JSON."""
+    with _lock:
+        collected = dict(_metrics)
+        timers = _timer_summary()
+    metrics = {
+        "ts": datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+        "parcels_processed": collected.get("parcels_processed", 0),
+        "rules_applied": collected.get("rules_applied", 0),
+        "total_runtime_ms": collected.get("total_runtime_ms", 0),
+        "errors_count": collected.get("errors_count", 0),
+        "warnings_count": collected.get("warnings_count", 0),
+    }
+
+    # Add any other metrics
+    for key, value in collected.items():
+        if key not in metrics:
+            metrics[key] = value
+    if timers:
+        metrics["timers"] = timers
+
+    if output_path:
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(metrics, f, indent=2)
+        log("info", f"Metrics emitted to {output_path}", metrics_file=output_path)
+
+    return metrics
+
+
+def reset_metrics() -> None:
+    """Reset all metrics (useful for testing)."""
+    global _dirty
+    with _lock:
+        _metrics.clear()
+        _timer_stats.clear()
+        _dirty = False
+    _current_span.set(None)
+
+
+def shutdown() -> None:
+    """Flush pending aggregates and drain the log queue (registered to run at exit)."""
+    global _logger, _listener
+    flush_metrics()
+    with _logger_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+        if _logger is not None:
+            for handler in list(_logger.handlers):
+                _logger.removeHandler(handler)
+            _logger = None
+
+
+atexit.register(shutdown)
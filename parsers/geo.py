@@ -1,7 +1,16 @@
 """GeoJSON/Shapefile loading with CRS transformation."""
+import re
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from engine.geom import transform_coords
+
+
+_APN_SEPARATORS = re.compile(r'[\s\-]+')
 
 
 def load_geofile(filepath: str, target_crs: str = "EPSG:2277") -> gpd.GeoDataFrame:
@@ -36,46 +45,159 @@ def load_geofile(filepath: str, target_crs: str = "EPSG:2277") -> gpd.GeoDataFra
     return gdf
 
 
-def find_parcel_by_apn(gdf: gpd.GeoDataFrame, apn: str, apn_field: str = "APN") -> Optional[gpd.GeoSeries]:
-    """Find parcel by APN field."""
-    matches = gdf[gdf[apn_field] == apn]
-    if len(matches) == 0:
+def normalize_apn(apn) -> str:
+    """
+    Normalize an APN for lookup: strip dashes and whitespace, drop leading
+    zeros and fold case ("0204-050712" -> "204050712").
+    """
+    key = _APN_SEPARATORS.sub('', str(apn)).casefold()
+    stripped = key.lstrip('0')
+    return stripped if stripped or not key else '0'
+
+
+def normalize_apns(apns: Iterable) -> np.ndarray:
+    """Vectorized normalize_apn."""
+    keys = pd.Series(list(apns), dtype=object).astype(str)
+    keys = keys.str.replace(_APN_SEPARATORS, '', regex=True).str.casefold()
+    stripped = keys.str.lstrip('0')
+    stripped[(stripped == '') & (keys != '')] = '0'
+    return stripped.to_numpy(dtype=object)
+
+
+class ApnIndex:
+    """
+    Hash index from normalized APN to parcel row position.
+
+    Built once at load time; lookups and existence checks are O(1) and never
+    touch the GeoDataFrame. The first parcel wins for duplicate APNs.
+    """
+
+    def __init__(self, apns: Iterable):
+        keys = normalize_apns(apns)
+        first = ~pd.Series(keys).duplicated(keep='first').to_numpy()
+        self._keys = pd.Index(keys[first])
+        self._rows = np.flatnonzero(first)
+        self._positions = dict(zip(self._keys, self._rows.tolist()))
+
+    def get(self, apn: str) -> Optional[int]:
+        """Row position for an APN, or None if unknown."""
+        return self._positions.get(normalize_apn(apn))
+
+    def get_many(self, apns: Iterable) -> np.ndarray:
+        """Row positions for many APNs (-1 where unknown)."""
+        found = self._keys.get_indexer(normalize_apns(apns))
+        return np.where(found >= 0, self._rows[found], -1).astype(np.intp)
+
+    def __contains__(self, apn: str) -> bool:
+        return normalize_apn(apn) in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+def build_apn_index(gdf: gpd.GeoDataFrame, apn_field: str = "APN") -> ApnIndex:
+    """Build an APN index over a parcel layer."""
+    return ApnIndex(gdf[apn_field].to_numpy())
+
+
+def find_parcel_by_apn(gdf: gpd.GeoDataFrame, apn: str, apn_field: str = "APN",
+                       index: Optional[ApnIndex] = None) -> Optional[gpd.GeoSeries]:
+    """
+    Find parcel by APN field.
+
+    Args:
+        gdf: Parcel layer
+        apn: APN (matched after normalization, see normalize_apn)
+        apn_field: APN column
+        index: Prebuilt index for gdf; built on the fly if omitted
+
+    Returns:
+        Parcel row or None if not found
+    """
+    if index is None:
+        index = build_apn_index(gdf, apn_field)
+    position = index.get(apn)
+    if position is None:
         return None
-    return matches.iloc[0]
+    return gdf.iloc[position]
+
+
+def locate_parcels(gdf: gpd.GeoDataFrame, lats: Iterable[float], lngs: Iterable[float],
+                   source_crs: str = "EPSG:4326", target_crs: str = "EPSG:2277",
+                   max_distance: Optional[float] = None):
+    """
+    Locate the parcels containing lat/lng points, snapping to the nearest parcel otherwise.
+
+    Points are first matched by containment: a bounding-box query on the
+    spatial index followed by an exact test against the (prepared) candidate
+    polygons. Only points inside no parcel fall back to a nearest-neighbour
+    query, limited to max_distance.
+
+    Args:
+        gdf: Parcel layer
+        lats, lngs: Point coordinates in source_crs
+        source_crs: CRS of the points
+        target_crs: CRS of the parcel layer
+        max_distance: Max snap distance in target CRS units (None = unbounded)
+
+    Returns:
+        Tuple of (row positions, -1 where unmatched; match methods, "contains",
+        "nearest" or None; snap distances, 0 for containment)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    positions = np.full(len(lats), -1, dtype=np.intp)
+    methods = np.full(len(lats), None, dtype=object)
+    distances = np.full(len(lats), np.nan)
+    if len(lats) == 0 or len(gdf) == 0:
+        return positions, methods, distances
+
+    xs, ys = transform_coords(lats, lngs, source_crs, target_crs)
+    points = shapely.points(xs, ys)
+    geoms = np.asarray(gdf.geometry.values)
+
+    # Containment: bbox candidates, then exact test (covers boundary points)
+    input_idx, tree_idx = gdf.sindex.query(points)
+    hit = shapely.intersects(geoms[tree_idx], points[input_idx])
+    first_match = np.full(len(points), len(gdf), dtype=np.intp)
+    np.minimum.at(first_match, input_idx[hit], tree_idx[hit])
+    contained = first_match < len(gdf)
+    positions[contained] = first_match[contained]
+    methods[contained] = "contains"
+    distances[contained] = 0.0
+
+    # Fallback: nearest parcel within max_distance
+    remaining = np.flatnonzero(~contained)
+    if len(remaining):
+        (near_input, near_tree), near_dist = gdf.sindex.nearest(
+            points[remaining], return_all=False, max_distance=max_distance, return_distance=True)
+        snapped = remaining[near_input]
+        positions[snapped] = near_tree
+        methods[snapped] = "nearest"
+        distances[snapped] = near_dist
+    return positions, methods, distances
+
+
+def locate_parcel(gdf: gpd.GeoDataFrame, lat: float, lng: float,
+                  source_crs: str = "EPSG:4326", target_crs: str = "EPSG:2277",
+                  max_distance: Optional[float] = None) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """
+    Locate the parcel containing a lat/lng point (see locate_parcels).
+
+    Returns:
+        Tuple of (row position, match info {"method", "snap_distance_ft"}),
+        or (None, None) if no parcel is within max_distance
+    """
+    positions, methods, distances = locate_parcels(gdf, [lat], [lng], source_crs, target_crs, max_distance)
+    if positions[0] < 0:
+        return None, None
+    return int(positions[0]), {"method": methods[0], "snap_distance_ft": float(distances[0])}
 
 
 def find_nearest_parcel(gdf: gpd.GeoDataFrame, lat: float, lng: float, 
-                       source_crs: str = "EPSG:4326", target_crs: str = "EPSG:2277") -> Optional[gpd.GeoSeries]:
-    """Find nearest parcel to lat/lng point."""
-    from shapely.geometry import Point
-    
-    # Create point in source CRS
-    point = Point(lng, lat)
-    point_gdf = gpd.GeoDataFrame([1], geometry=[point], crs=source_crs)
-    
-    # Transform to target CRS
-    point_gdf = point_gdf.to_crs(target_crs)
-    query_point = point_gdf.geometry.iloc[0]
-    
-    # Use spatial index for nearest neighbor
-    if not gdf.has_sindex:
-        gdf.sindex
-    
-    # Find nearest using sindex.nearest (takes geometry, not bounds)
-    # Returns array of indices - handle both scalar and array returns
-    nearest_result = gdf.sindex.nearest(query_point, return_all=False)
-    if len(nearest_result) == 0:
+                       source_crs: str = "EPSG:4326", target_crs: str = "EPSG:2277",
+                       max_distance: Optional[float] = None) -> Optional[gpd.GeoSeries]:
+    """Find the parcel containing (else nearest to) lat/lng point."""
+    position, _ = locate_parcel(gdf, lat, lng, source_crs, target_crs, max_distance)
+    if position is None:
         return None
-    
-    # Handle array return (may be 2D)
-    if hasattr(nearest_result, 'shape') and len(nearest_result.shape) > 1:
-        nearest_indices = nearest_result.flatten()
-    else:
-        nearest_indices = nearest_result if hasattr(nearest_result, '__iter__') else [nearest_result]
-    
-    # Get actual nearest by distance
-    distances = gdf.geometry.iloc[nearest_indices].distance(query_point)
-    nearest_idx = distances.idxmin()
-    
-    return gdf.loc[nearest_idx]
-
+    return gdf.iloc[position]
@@ -1,31 +1,265 @@
-"""LLM adapter for PDF parsing (stub implementation)."""
+"""LLM adapter for PDF parsing: citation extraction via any OpenAI-compatible endpoint."""
+import asyncio
+import json
 import os
-from typing import Dict, Optional
+import re
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional
 
+from parsers.pdf import extract_pages_from_pdf, lookup_citation, pdf_content_hash
 
-def parse_pdf_with_llm(pdf_path: str, citation: str) -> Optional[str]:
+
+# Model results keyed by (PDF content hash, citation, model)
+LLM_CACHE_FILE = Path(__file__).parent.parent / "cache" / "llm_results.sqlite"
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Pages of context sent per citation, starting at the page it first appears on
+CONTEXT_PAGES = 2
+
+SYSTEM_PROMPT = (
+    "You extract sections from a municipal code. For each requested citation, return the "
+    "verbatim text of that section from the excerpts, or null if it is not there. Reply with "
+    "a JSON object mapping each citation to its text."
+)
+
+_cache_lock = threading.Lock()
+
+
+class LLMError(Exception):
+    """An LLM call failed or returned an unusable response."""
+
+
+class OpenAICompatibleClient:
+    """Chat completions over HTTP against any OpenAI-compatible endpoint."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, api_key: Optional[str] = None,
+                 model: str = DEFAULT_MODEL, timeout_s: float = 30.0):
+        """
+        Args:
+            base_url: API root, e.g. https://api.openai.com/v1 or a local server
+            api_key: Bearer token (omitted from requests if None)
+            model: Model name (also part of the result cache key)
+            timeout_s: Per-call timeout
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.model = model
+        self.timeout_s = timeout_s
+
+    @classmethod
+    def from_env(cls) -> Optional["OpenAICompatibleClient"]:
+        """
+        Build a client from the environment, or None if no endpoint is configured.
+
+        Reads OPENAI_API_KEY, OPENAI_BASE_URL, ZONING_LLM_MODEL and
+        ZONING_LLM_TIMEOUT_S; a base URL alone (e.g. a local server) is enough.
+        """
+        api_key = os.getenv("OPENAI_API_KEY")
+        base_url = os.getenv("OPENAI_BASE_URL")
+        if not api_key and not base_url:
+            return None
+        return cls(base_url or DEFAULT_BASE_URL, api_key,
+                   os.getenv("ZONING_LLM_MODEL", DEFAULT_MODEL),
+                   float(os.getenv("ZONING_LLM_TIMEOUT_S", "30")))
+
+    def _post(self, messages: List[Dict[str, str]]) -> str:
+        body = json.dumps({"model": self.model, "messages": messages, "temperature": 0}).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/chat/completions", data=body, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                payload = json.load(response)
+            return payload["choices"][0]["message"]["content"]
+        except (urllib.error.URLError, OSError, ValueError, KeyError, IndexError) as e:
+            raise LLMError(f"LLM request failed: {e}")
+
+    async def complete(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Send one chat completion and return the reply text.
+
+        Raises:
+            LLMError: On HTTP errors, timeouts or malformed responses
+        """
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(self._post, messages), self.timeout_s)
+        except asyncio.TimeoutError:
+            raise LLMError(f"LLM request timed out after {self.timeout_s}s")
+
+
+def _connect(cache_file: Path) -> sqlite3.Connection:
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(cache_file), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS results (pdf_hash TEXT, citation TEXT, model TEXT, text TEXT, "
+        "PRIMARY KEY (pdf_hash, citation, model)) WITHOUT ROWID"
+    )
+    return conn
+
+
+def _parse_reply(reply: str, citations: List[str]) -> Dict[str, Optional[str]]:
+    """Citation -> text from a JSON reply (code fences allowed)."""
+    match = re.search(r'\{.*\}', reply, re.DOTALL)
+    try:
+        data = json.loads(match.group(0) if match else reply)
+    except ValueError:
+        raise LLMError("LLM reply is not a JSON object")
+    if not isinstance(data, dict):
+        raise LLMError("LLM reply is not a JSON object")
+    return {citation: data[citation] if isinstance(data.get(citation), str) else None
+            for citation in citations}
+
+
+class LLMCitationExtractor:
     """
-    Parse PDF section using LLM (requires OPENAI_API_KEY).
-    
-    This is a stub implementation. For MVP, returns None unless
-    OPENAI_API_KEY is set and LLM integration is implemented.
-    
+    Extract code sections with an LLM, several citations per call.
+
+    Results (including "not found") are memoized on disk by (PDF content
+    hash, citation, model), so re-running over the same code makes no calls.
+    Failed or timed-out batches are not cached and are retried next time.
+    """
+
+    def __init__(self, client: OpenAICompatibleClient, batch_size: int = 8, max_concurrency: int = 4,
+                 cache_file: Optional[Path] = None, index_file: Optional[Path] = None):
+        """
+        Args:
+            client: Chat completion client (anything with async complete(messages) and model)
+            batch_size: Citations per call
+            max_concurrency: Calls in flight at once
+            cache_file: Result cache (default: LLM_CACHE_FILE)
+            index_file: Citation index used to find context pages (default: parsers.pdf.INDEX_FILE)
+        """
+        self.client = client
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache_file = Path(cache_file or LLM_CACHE_FILE)
+        self.index_file = index_file
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMCitationExtractor"]:
+        """Extractor configured from the environment (ZONING_LLM_BATCH_SIZE, ZONING_LLM_CONCURRENCY)."""
+        client = OpenAICompatibleClient.from_env()
+        if client is None:
+            return None
+        return cls(client, int(os.getenv("ZONING_LLM_BATCH_SIZE", "8")),
+                   int(os.getenv("ZONING_LLM_CONCURRENCY", "4")))
+
+    def _cached(self, pdf_hash: str, citations: List[str]) -> Dict[str, Optional[str]]:
+        with closing(_connect(self.cache_file)) as conn:
+            rows = conn.execute(
+                f"SELECT citation, text FROM results WHERE pdf_hash = ? AND model = ? "
+                f"AND citation IN ({','.join('?' * len(citations))})",
+                [pdf_hash, self.client.model, *citations],
+            ).fetchall()
+        return dict(rows)
+
+    def _store(self, pdf_hash: str, results: Dict[str, Optional[str]]):
+        with _cache_lock, closing(_connect(self.cache_file)) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             [(pdf_hash, citation, self.client.model, text) for citation, text in results.items()])
+
+    def _excerpts(self, pdf_path: str, citations: List[str]) -> Dict[str, str]:
+        """Context pages per citation; citations the PDF never mentions are left out."""
+        pages = None
+        excerpts = {}
+        for citation in citations:
+            entry = lookup_citation(citation, pdf_path, self.index_file)
+            if entry is None:
+                continue
+            if pages is None:
+                pages = extract_pages_from_pdf(pdf_path)
+            start = entry["page"] - 1
+            excerpts[citation] = "\n".join(pages[start:start + CONTEXT_PAGES])
+        return excerpts
+
+    async def _extract_batch(self, semaphore: asyncio.Semaphore, excerpts: Dict[str, str]) -> Dict[str, Optional[str]]:
+        citations = list(excerpts)
+        content = "\n\n".join(f"Citation: {citation}\nExcerpt:\n{text}" for citation, text in excerpts.items())
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Citations: {json.dumps(citations)}\n\n{content}"},
+        ]
+        async with semaphore:
+            self.calls += 1
+            return _parse_reply(await self.client.complete(messages), citations)
+
+    async def extract(self, pdf_path: str, citations: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Extract section text for citations from a PDF.
+
+        Args:
+            pdf_path: Path to PDF file
+            citations: Section citations (e.g., "§25-2-492")
+
+        Returns:
+            Dict mapping each citation to its text, or None if not found or the call failed
+        """
+        citations = list(dict.fromkeys(citations))
+        pdf_hash = pdf_content_hash(pdf_path)
+        if pdf_hash is None:
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        results: Dict[str, Optional[str]] = {citation: None for citation in citations}
+        cached = self._cached(pdf_hash, citations) if citations else {}
+        results.update(cached)
+
+        missing = [citation for citation in citations if citation not in cached]
+        excerpts = await asyncio.to_thread(self._excerpts, pdf_path, missing) if missing else {}
+        if not excerpts:
+            return results
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        items = list(excerpts.items())
+        batches = [dict(items[i:i + self.batch_size]) for i in range(0, len(items), self.batch_size)]
+        outcomes = await asyncio.gather(*(self._extract_batch(semaphore, batch) for batch in batches),
+                                        return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, LLMError):
+                continue
+            if isinstance(outcome, BaseException):
+                raise outcome
+            self._store(pdf_hash, outcome)
+            results.update(outcome)
+        return results
+
+    def extract_sync(self, pdf_path: str, citations: List[str]) -> Dict[str, Optional[str]]:
+        """extract() for synchronous callers; safe to call from inside a running event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.extract(pdf_path, citations))
+        # asyncio.run() refuses to nest, so run on a fresh loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-extract") as pool:
+            return pool.submit(asyncio.run, self.extract(pdf_path, citations)).result()
+
+
+def parse_pdf_with_llm(pdf_path: str, citations: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse PDF sections using LLM (requires OPENAI_API_KEY or OPENAI_BASE_URL).
+
+    All citations go through one extract() call, so they share its batches,
+    concurrency limit and cache.
+
     Args:
         pdf_path: Path to PDF file
-        citation: Code section citation to extract
-    
+        citations: Code section citations to extract
+
     Returns:
-        Extracted text snippet or None
+        Extracted text snippet (or None) per citation
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    
-    # Stub: LLM integration not implemented for MVP
-    # In production, this would:
-    # 1. Extract PDF text
-    # 2. Send to LLM with prompt to find citation
-    # 3. Return extracted section
-    
-    return None
-
+    if not pdf_path or not Path(pdf_path).exists():
+        return dict.fromkeys(citations)
+    extractor = LLMCitationExtractor.from_env()
+    if extractor is None:
+        return dict.fromkeys(citations)
+    return extractor.extract_sync(pdf_path, citations)
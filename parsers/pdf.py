@@ -1,11 +1,20 @@
-"""PDF text extraction with regex pattern matching and caching."""
+"""PDF text extraction with regex pattern matching and a persistent citation index."""
+import hashlib
+import multiprocessing
+import os
 import re
-import json
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from engine.cache import file_signature, content_hash
 try:
     import PyPDF2
     PDF_AVAILABLE = True
+    USE_PDFPLUMBER = False
 except ImportError:
     try:
         import pdfplumber
@@ -16,52 +25,212 @@ except ImportError:
         USE_PDFPLUMBER = False
 
 
-# Cache file path (relative to project root)
-CACHE_FILE = Path(__file__).parent.parent / "cache" / "§-snippets.json"
+# Citation index: citation -> (page, line, snippet) per PDF content hash
+INDEX_FILE = Path(__file__).parent.parent / "cache" / "citation_index.sqlite"
+INDEX_VERSION = 1
+
+# Extracted page text keyed by page fingerprint (content streams and resources)
+PAGE_CACHE_DIR = Path(__file__).parent.parent / "cache" / "pages"
+PAGE_CACHE_VERSION = 2
+
+# Default page_cache_dir argument: PAGE_CACHE_DIR as set when called
+_DEFAULT_PAGE_CACHE: Any = object()
+
+# Pages per worker task when extraction fans out over processes
+PAGES_PER_TASK = 50
+
+CITATION_PATTERN = r'§\d+-\d+-\d+'
+CONTEXT_LINES = 10
+
+# PDF content hashes keyed by (path, mtime/size signature)
+_pdf_hashes: Dict[Tuple[str, Any], str] = {}
+_index_lock = threading.Lock()
+
+
+def _open_pages(pdf_path: str):
+    """Open a PDF with the available backend; returns (handle to close, pages)."""
+    if USE_PDFPLUMBER:
+        import pdfplumber
+        pdf = pdfplumber.open(pdf_path)
+        return pdf, pdf.pages
+    f = open(pdf_path, 'rb')
+    return f, PyPDF2.PdfReader(f).pages
+
+
+def _object_digest(obj, memo: Dict[Tuple[int, int], bytes]) -> bytes:
+    """
+    Digest of a PDF object tree by content.
+
+    References are followed (memoized per object) rather than hashed as
+    object numbers, so renumbering objects in an amended PDF keeps digests.
+    """
+    if isinstance(obj, PyPDF2.generic.IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref not in memo:
+            memo[ref] = b"cycle"
+            memo[ref] = _object_digest(obj.get_object(), memo)
+        return memo[ref]
+    digest = hashlib.sha256(type(obj).__name__.encode())
+    if isinstance(obj, PyPDF2.generic.StreamObject):
+        digest.update(obj.get_data())
+    if isinstance(obj, PyPDF2.generic.DictionaryObject):
+        for key in sorted(obj):
+            if key != "/Parent":
+                digest.update(key.encode())
+                digest.update(_object_digest(obj.raw_get(key), memo))
+    elif isinstance(obj, PyPDF2.generic.ArrayObject):
+        for item in obj:
+            digest.update(_object_digest(item, memo))
+    else:
+        digest.update(repr(obj).encode())
+    return digest.digest()
+
+
+def _page_fingerprint(page, memo: Dict[Tuple[int, int], bytes]) -> str:
+    """
+    Hash of everything a page's text depends on (PyPDF2 only): its content
+    streams and its resources (fonts with their encodings and ToUnicode maps,
+    form XObjects). Equal glyph streams drawn with different fonts differ.
+    """
+    digest = hashlib.sha256(f"pages-v{PAGE_CACHE_VERSION}:".encode())
+    for key in ("/Contents", "/Resources"):
+        digest.update(key.encode())
+        if key in page:
+            digest.update(_object_digest(page.raw_get(key), memo))
+    return digest.hexdigest()
+
+
+def _extract_page_text(page) -> str:
+    return page.extract_text() or ""
+
+
+def _extract_page_range(pdf_path: str, page_numbers: List[int],
+                        page_cache_dir: Optional[Path] = None) -> List[str]:
+    """
+    Extract text of some pages (0-based); runs in a worker process.
+
+    With a page cache (PyPDF2 only), pages whose fingerprint is cached are
+    read from it and the others are added to it.
+    """
+    try:
+        handle, pages = _open_pages(pdf_path)
+    except Exception as e:
+        raise IOError(f"Error reading PDF {pdf_path}: {e}")
+    use_cache = page_cache_dir is not None and not USE_PDFPLUMBER
+    memo: Dict[Tuple[int, int], bytes] = {}
+    texts = []
+    try:
+        for i in page_numbers:
+            fingerprint = _page_fingerprint(pages[i], memo) if use_cache else None
+            text = _read_cached_page(page_cache_dir, fingerprint) if fingerprint else None
+            if text is None:
+                text = _extract_page_text(pages[i])
+                if fingerprint:
+                    _write_cached_page(page_cache_dir, fingerprint, text)
+            texts.append(text)
+    except Exception as e:
+        raise IOError(f"Error reading PDF {pdf_path}: {e}")
+    finally:
+        handle.close()
+    return texts
+
+
+def _page_count(pdf_path: str) -> int:
+    try:
+        handle, pages = _open_pages(pdf_path)
+    except Exception as e:
+        raise IOError(f"Error reading PDF {pdf_path}: {e}")
+    try:
+        return len(pages)
+    finally:
+        handle.close()
+
 
+def _page_cache_path(page_cache_dir: Path, fingerprint: str) -> Path:
+    return Path(page_cache_dir) / fingerprint[:2] / f"{fingerprint}.txt"
 
-def load_cache() -> Dict[str, str]:
-    """Load cached PDF snippets."""
-    if not CACHE_FILE.exists():
-        return {}
+
+def _read_cached_page(page_cache_dir: Path, fingerprint: str) -> Optional[str]:
     try:
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return {}
+        return _page_cache_path(page_cache_dir, fingerprint).read_text(encoding='utf-8')
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
 
 
-def save_cache(cache: Dict[str, str]):
-    """Save cached PDF snippets."""
-    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f, indent=2)
+def _write_cached_page(page_cache_dir: Path, fingerprint: str, text: str):
+    path = _page_cache_path(page_cache_dir, fingerprint)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    tmp_path.write_text(text, encoding='utf-8')
+    tmp_path.replace(path)
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF file."""
+def _process_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for extraction workers.
+
+    Never fork: callers such as the API server run this on worker threads
+    alongside the log listener and open SQLite connections.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def extract_documents(pdf_paths: List[str], workers: Optional[int] = None,
+                      page_cache_dir: Optional[Path] = _DEFAULT_PAGE_CACHE) -> Dict[str, List[str]]:
+    """
+    Extract page texts of several PDFs, fanning page ranges out over a process pool.
+    
+    Workers fingerprint their pages (content streams and resources) and skip
+    pages already in the page cache, so re-indexing an amended PDF only
+    extracts changed pages.
+    
+    Args:
+        pdf_paths: PDF files
+        workers: Worker processes (default: ZONING_PDF_WORKERS or CPU count); 1 = serial
+        page_cache_dir: Per-page text cache directory (default: PAGE_CACHE_DIR; None disables it)
+    
+    Returns:
+        Dict mapping each PDF path to its text per page
+    """
     if not PDF_AVAILABLE:
         raise ImportError("PyPDF2 or pdfplumber required for PDF parsing")
+    if page_cache_dir is _DEFAULT_PAGE_CACHE:
+        page_cache_dir = PAGE_CACHE_DIR
+    workers = workers or int(os.getenv("ZONING_PDF_WORKERS", "0")) or os.cpu_count() or 1
     
-    text = ""
-    try:
-        if USE_PDFPLUMBER:
-            import pdfplumber
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-        else:
-            with open(pdf_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() or ""
-    except Exception as e:
-        raise IOError(f"Error reading PDF {pdf_path}: {e}")
+    documents: Dict[str, List[str]] = {}
+    tasks = []
+    for pdf_path in dict.fromkeys(pdf_paths):
+        documents[pdf_path] = []
+        page_count = _page_count(pdf_path)
+        tasks.extend((pdf_path, list(range(start, min(start + PAGES_PER_TASK, page_count))))
+                     for start in range(0, page_count, PAGES_PER_TASK))
+    
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=_process_context()) as pool:
+            results = list(pool.map(_extract_page_range, *zip(*tasks), [page_cache_dir] * len(tasks)))
+    else:
+        results = [_extract_page_range(pdf_path, page_numbers, page_cache_dir) for pdf_path, page_numbers in tasks]
     
-    return text
+    # Each PDF's tasks are consecutive and in page order
+    for (pdf_path, _), texts in zip(tasks, results):
+        documents[pdf_path].extend(texts)
+    return documents
+
+
+def extract_pages_from_pdf(pdf_path: str, workers: Optional[int] = None,
+                           page_cache_dir: Optional[Path] = _DEFAULT_PAGE_CACHE) -> List[str]:
+    """Extract text from PDF file, one string per page (see extract_documents)."""
+    return extract_documents([pdf_path], workers, page_cache_dir)[pdf_path]
+
 
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """Extract text from PDF file."""
+    return "".join(extract_pages_from_pdf(pdf_path))
 
-def find_code_sections(text: str, pattern: str = r'§\d+-\d+-\d+') -> List[str]:
+
+def find_code_sections(text: str, pattern: str = CITATION_PATTERN) -> List[str]:
     """
     Find code section citations in text using regex.
     
@@ -107,39 +276,203 @@ def extract_section_text(text: str, citation: str, context_lines: int = 10) -> s
     return '\n'.join(snippet_lines)
 
 
-def parse_pdf_sections(pdf_path: str, use_cache: bool = True) -> Dict[str, str]:
+def build_citation_index(pages: List[str], pattern: str = CITATION_PATTERN,
+                         context_lines: int = CONTEXT_LINES) -> Dict[str, Dict[str, Any]]:
     """
-    Parse PDF and extract code sections.
+    Index every code section citation in one pass over the page lines.
+    
+    Each citation maps to its first occurrence; the snippet is that line plus
+    the following context_lines lines (continuing onto the next page).
+    
+    Args:
+        pages: Text per page
+        pattern: Regex pattern for section citations
+        context_lines: Number of lines to include after citation
+    
+    Returns:
+        Dict mapping citation to {"page" (1-based), "line" (0-based, within the page), "snippet"}
+    """
+    regex = re.compile(pattern)
+    lines, locations = [], []
+    for page_number, page_text in enumerate(pages, start=1):
+        page_lines = page_text.split('\n')
+        lines.extend(page_lines)
+        locations.extend((page_number, line) for line in range(len(page_lines)))
+    
+    index = {}
+    for i, line in enumerate(lines):
+        for citation in regex.findall(line):
+            if citation not in index:
+                page_number, page_line = locations[i]
+                index[citation] = {
+                    "page": page_number,
+                    "line": page_line,
+                    "snippet": '\n'.join(lines[i:i + 1 + context_lines]),
+                }
+    return index
+
+
+def pdf_content_hash(pdf_path: str) -> Optional[str]:
+    """SHA256 of a PDF's content, re-hashed only when its mtime or size changes."""
+    path = str(Path(pdf_path).resolve())
+    key = (path, file_signature(Path(path)))
+    digest = _pdf_hashes.get(key)
+    if digest is None:
+        digest = content_hash(Path(path))
+        if digest is not None:
+            _pdf_hashes[key] = digest
+    return digest
+
+
+def _connect(index_file: Path) -> sqlite3.Connection:
+    """
+    Open the citation index in autocommit mode.
+
+    WAL lets readers keep serving lookups while another process writes;
+    writers serialize on SQLite's own file lock (see index_pdfs).
+    """
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(index_file), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pdfs (pdf_hash TEXT PRIMARY KEY, version INTEGER, "
+        "pages INTEGER, citations INTEGER)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS citations (pdf_hash TEXT, citation TEXT, page INTEGER, "
+        "line INTEGER, snippet TEXT, PRIMARY KEY (pdf_hash, citation)) WITHOUT ROWID"
+    )
+    return conn
+
+
+def _is_indexed(conn: sqlite3.Connection, pdf_hash: str) -> bool:
+    row = conn.execute("SELECT version FROM pdfs WHERE pdf_hash = ?", (pdf_hash,)).fetchone()
+    return row is not None and row[0] == INDEX_VERSION
+
+
+def index_pdfs(pdf_paths: List[str], index_file: Optional[Path] = None,
+               workers: Optional[int] = None) -> List[str]:
+    """
+    Add PDFs' citations to the persistent index, skipping content already indexed.
+    
+    PDFs that need indexing are extracted together (see extract_documents).
+    
+    Args:
+        pdf_paths: Paths to PDF files
+        index_file: SQLite index (default: INDEX_FILE)
+        workers: Extraction worker processes
+    
+    Returns:
+        Each PDF's content hash (the index key), in input order
+    """
+    index_file = Path(index_file or INDEX_FILE)
+    hashes = []
+    for pdf_path in pdf_paths:
+        pdf_hash = pdf_content_hash(pdf_path)
+        if pdf_hash is None:
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        hashes.append(pdf_hash)
+    
+    def pending(conn):
+        # First path per unindexed content hash
+        paths = {}
+        for pdf_path, pdf_hash in zip(pdf_paths, hashes):
+            if pdf_hash not in paths and not _is_indexed(conn, pdf_hash):
+                paths[pdf_hash] = pdf_path
+        return paths
+    
+    with closing(_connect(index_file)) as conn:
+        if not pending(conn):
+            return hashes
+    
+    # One extraction and scan per PDF content within the process; across
+    # processes the write transaction re-checks so nothing is written twice
+    with _index_lock, closing(_connect(index_file)) as conn:
+        paths = pending(conn)
+        if not paths:
+            return hashes
+        documents = extract_documents(list(paths.values()), workers)
+        indexes = {pdf_hash: build_citation_index(documents[pdf_path]) for pdf_hash, pdf_path in paths.items()}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for pdf_hash, pdf_path in pending(conn).items():
+                index = indexes[pdf_hash]
+                conn.execute("DELETE FROM citations WHERE pdf_hash = ?", (pdf_hash,))
+                conn.executemany(
+                    "INSERT INTO citations VALUES (?, ?, ?, ?, ?)",
+                    [(pdf_hash, citation, entry["page"], entry["line"], entry["snippet"])
+                     for citation, entry in index.items()],
+                )
+                conn.execute("INSERT OR REPLACE INTO pdfs VALUES (?, ?, ?, ?)",
+                             (pdf_hash, INDEX_VERSION, len(documents[pdf_path]), len(index)))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return hashes
+
+
+def index_pdf(pdf_path: str, index_file: Optional[Path] = None) -> str:
+    """
+    Add a PDF's citations to the persistent index, unless its content is already indexed.
     
     Args:
         pdf_path: Path to PDF file
-        use_cache: Whether to use cached results
+        index_file: SQLite index (default: INDEX_FILE)
     
     Returns:
-        Dict mapping citation to text snippet
+        The PDF's content hash (the index key)
     """
-    cache = load_cache() if use_cache else {}
+    return index_pdfs([pdf_path], index_file)[0]
+
+
+def lookup_citation(citation: str, pdf_path: str,
+                    index_file: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Look up one citation in a PDF via the persistent index (indexing the PDF on first use).
     
-    # Check if we already have sections from this PDF
-    pdf_key = Path(pdf_path).stem
-    if use_cache and pdf_key in cache:
-        return cache[pdf_key]
+    Args:
+        citation: Section citation (e.g., "§25-2-492")
+        pdf_path: Path to PDF file
+        index_file: SQLite index (default: INDEX_FILE)
     
-    # Extract text and find sections
-    text = extract_text_from_pdf(pdf_path)
-    citations = find_code_sections(text)
+    Returns:
+        {"page", "line", "snippet"} or None if the PDF does not cite it
+    """
+    index_file = Path(index_file or INDEX_FILE)
+    pdf_hash = index_pdf(pdf_path, index_file)
+    with closing(_connect(index_file)) as conn:
+        row = conn.execute(
+            "SELECT page, line, snippet FROM citations WHERE pdf_hash = ? AND citation = ?",
+            (pdf_hash, citation),
+        ).fetchone()
+    if row is None:
+        return None
+    return {"page": row[0], "line": row[1], "snippet": row[2]}
+
+
+def parse_pdf_sections(pdf_path: str, use_cache: bool = True) -> Dict[str, str]:
+    """
+    Parse PDF and extract code sections.
     
-    # Extract snippets for each citation
-    sections = {}
-    for citation in citations:
-        sections[citation] = extract_section_text(text, citation)
+    Args:
+        pdf_path: Path to PDF file
+        use_cache: Whether to use (and fill) the persistent citation index
     
-    # Update cache
-    if use_cache:
-        cache[pdf_key] = sections
-        save_cache(cache)
+    Returns:
+        Dict mapping citation to text snippet
+    """
+    if not use_cache:
+        index = build_citation_index(extract_pages_from_pdf(pdf_path, page_cache_dir=None))
+        return {citation: entry["snippet"] for citation, entry in sorted(index.items())}
     
-    return sections
+    pdf_hash = index_pdf(pdf_path)
+    with closing(_connect(INDEX_FILE)) as conn:
+        rows = conn.execute(
+            "SELECT citation, snippet FROM citations WHERE pdf_hash = ? ORDER BY citation",
+            (pdf_hash,),
+        ).fetchall()
+    return dict(rows)
 
 
 def get_citation_snippet(citation: str, pdf_paths: List[str], 
@@ -155,11 +488,20 @@ def get_citation_snippet(citation: str, pdf_paths: List[str],
     Returns:
         Text snippet or None if not found
     """
+    pdf_paths = [pdf_path for pdf_path in pdf_paths if Path(pdf_path).exists()]
+    if not use_cache:
+        documents = extract_documents(pdf_paths, page_cache_dir=None)
+        for pdf_path in pdf_paths:
+            entry = build_citation_index(documents[pdf_path]).get(citation)
+            if entry is not None:
+                return entry["snippet"]
+        return None
+    
+    # Index all PDFs in one extraction pass, then read entries in order
+    index_pdfs(pdf_paths)
     for pdf_path in pdf_paths:
-        if not Path(pdf_path).exists():
-            continue
-        sections = parse_pdf_sections(pdf_path, use_cache)
-        if citation in sections:
-            return sections[citation]
+        entry = lookup_citation(citation, pdf_path)
+        if entry is not None:
+            return entry["snippet"]
     return None
 
@@ -0,0 +1,427 @@
+"""Compiled binary layer snapshots: pre-projected columnar arrays loaded via mmap."""
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS
+
+from engine.cache import file_signature, content_hash
+from parsers.geo import load_geofile
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): the manifest is only locked within a process
+    fcntl = None
+
+
+SNAPSHOT_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+MANIFEST_LOCK_FILE = "manifest.lock"
+
+# Multi-part geometry type -> constructor, and the single-part type it collects
+_MULTI_TYPES = {
+    shapely.GeometryType.MULTIPOINT: shapely.multipoints,
+    shapely.GeometryType.MULTILINESTRING: shapely.multilinestrings,
+    shapely.GeometryType.MULTIPOLYGON: shapely.multipolygons,
+}
+_SINGLE_TYPES = {
+    shapely.GeometryType.MULTIPOINT: shapely.GeometryType.POINT,
+    shapely.GeometryType.MULTILINESTRING: shapely.GeometryType.LINESTRING,
+    shapely.GeometryType.MULTIPOLYGON: shapely.GeometryType.POLYGON,
+}
+
+# Serializes manifest read-modify-write within a process; the lock file
+# (see _manifest_locked) serializes it across processes
+_manifest_lock = threading.Lock()
+
+
+def layer_dirname(layer: str) -> str:
+    """File-system safe directory name for a layer (e.g., "overlay:Floodplain")."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', layer).strip('_').lower()
+
+
+def load_manifest(derived_dir: str) -> Dict[str, Any]:
+    """Load snapshot manifest, or an empty one if missing or unreadable."""
+    path = Path(derived_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {"version": SNAPSHOT_VERSION, "layers": {}}
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {"version": SNAPSHOT_VERSION, "layers": {}}
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        return {"version": SNAPSHOT_VERSION, "layers": {}}
+    return manifest
+
+
+def save_manifest(derived_dir: str, manifest: Dict[str, Any]):
+    """Atomically write snapshot manifest."""
+    path = Path(derived_dir) / MANIFEST_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{MANIFEST_FILE}.tmp-{os.getpid()}-{threading.get_ident()}")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    tmp_path.replace(path)
+
+
+def source_info(source_path: str) -> Dict[str, Any]:
+    """Fingerprint of a source file for staleness checks."""
+    signature = file_signature(Path(source_path))
+    return {
+        "path": str(source_path),
+        "mtime_ns": signature[0] if signature else None,
+        "size": signature[1] if signature else None,
+        "sha256": content_hash(Path(source_path)),
+    }
+
+
+def source_is_current(recorded: Dict[str, Any], source_path: str) -> bool:
+    """Check a recorded source fingerprint against the file on disk."""
+    signature = file_signature(Path(source_path))
+    if signature is None:
+        return False
+    if (recorded.get("mtime_ns"), recorded.get("size")) == signature:
+        return True
+    return recorded.get("sha256") == content_hash(Path(source_path))
+
+
+def _empty(geom_type: int) -> Any:
+    """Empty geometry of a type (e.g., POLYGON EMPTY)."""
+    return shapely.from_wkt(f"{shapely.GeometryType(geom_type).name} EMPTY")
+
+
+def _promote(parts: np.ndarray, multi: int) -> np.ndarray:
+    """Wrap single-part geometries as one-part multi geometries of type multi."""
+    promoted = np.empty(len(parts), dtype=object)
+    empty = shapely.is_empty(parts)
+    promoted[~empty] = _MULTI_TYPES[multi](parts[~empty][:, np.newaxis])
+    promoted[empty] = _empty(multi)
+    return promoted
+
+
+def _write_geometry(geoms: np.ndarray, layer_dir: Path) -> Dict[str, Any]:
+    """
+    Write geometries as ragged coordinate arrays, or as one WKB geometry collection.
+
+    Layers mixing single and multi parts of one type (Polygon and
+    MultiPolygon) are promoted to the multi type to stay ragged; the promoted
+    rows and missing geometries are saved as masks and restored on read.
+    """
+    missing = shapely.is_missing(geoms)
+    present = geoms[~missing]
+    type_ids = shapely.get_type_id(present)
+    promoted = np.zeros(len(present), dtype=bool)
+    promoted_from = None
+    types = set(type_ids.tolist())
+    if len(types) == 2:
+        single, multi = sorted(types)
+        if _SINGLE_TYPES.get(multi) == single:
+            promoted = type_ids == single
+            present = present.copy()
+            present[promoted] = _promote(present[promoted], multi)
+            types, promoted_from = {multi}, single
+
+    geometry: Dict[str, Any] = {"missing": bool(missing.any())}
+    if geometry["missing"]:
+        np.save(layer_dir / "missing.npy", missing)
+    if len(present) > 0 and len(types) == 1:
+        try:
+            geom_type, coords, offsets = shapely.to_ragged_array(present)
+        except ValueError:
+            pass
+        else:
+            np.save(layer_dir / "coords.npy", np.ascontiguousarray(coords))
+            for i, offset in enumerate(offsets):
+                np.save(layer_dir / f"offsets_{i}.npy", offset)
+            if promoted_from is not None:
+                np.save(layer_dir / "promoted.npy", promoted)
+            return {**geometry, "encoding": "ragged", "type": int(geom_type), "offsets": len(offsets),
+                     "promoted_from": promoted_from}
+
+    # Mixed types: one collection, so reading is a single WKB parse
+    present = geoms[~missing]
+    (layer_dir / "geometry.wkb").write_bytes(shapely.to_wkb(shapely.geometrycollections(present)))
+    return {**geometry, "encoding": "wkb"}
+
+
+def _read_geometry(layer_dir: Path, geometry: Dict[str, Any], rows: int) -> np.ndarray:
+    """Read geometries written by _write_geometry, memory-mapping the coordinate arrays."""
+    if geometry["encoding"] == "ragged":
+        coords = np.load(layer_dir / "coords.npy", mmap_mode='r')
+        offsets = tuple(np.load(layer_dir / f"offsets_{i}.npy", mmap_mode='r')
+                        for i in range(geometry["offsets"]))
+        present = shapely.from_ragged_array(shapely.GeometryType(geometry["type"]), coords, offsets or None)
+        if geometry.get("promoted_from") is not None:
+            promoted = np.load(layer_dir / "promoted.npy")
+            parts = present[promoted]
+            empty = shapely.is_empty(parts)
+            parts[~empty] = shapely.get_geometry(parts[~empty], 0)
+            parts[empty] = _empty(geometry["promoted_from"])
+            present[promoted] = parts
+    else:
+        collection = shapely.from_wkb((layer_dir / "geometry.wkb").read_bytes())
+        present = shapely.get_parts(collection)
+
+    if not geometry["missing"]:
+        return present
+    geoms = np.full(rows, None, dtype=object)
+    geoms[~np.load(layer_dir / "missing.npy")] = present
+    return geoms
+
+
+def _write_column(series: pd.Series, layer_dir: Path, index: int) -> Dict[str, Any]:
+    """Write one attribute column as a fixed-width numpy array."""
+    filename = f"col_{index}.npy"
+    if pd.api.types.is_bool_dtype(series) or (
+            pd.api.types.is_numeric_dtype(series) and not series.isna().any()):
+        np.save(layer_dir / filename, series.to_numpy())
+        return {"name": series.name, "file": filename, "kind": "native"}
+    if pd.api.types.is_float_dtype(series):
+        np.save(layer_dir / filename, series.to_numpy(dtype=np.float64))
+        return {"name": series.name, "file": filename, "kind": "native"}
+
+    # Strings and everything else: fixed-width unicode plus a null mask
+    mask = series.isna().to_numpy()
+    values = series.astype(object).where(~mask, "").astype(str).to_numpy(dtype=str)
+    np.save(layer_dir / filename, values)
+    np.save(layer_dir / f"col_{index}.mask.npy", mask)
+    return {"name": series.name, "file": filename, "kind": "str", "mask": f"col_{index}.mask.npy"}
+
+
+def _read_column(layer_dir: Path, column: Dict[str, Any]) -> pd.Series:
+    """Read one attribute column written by _write_column."""
+    values = np.load(layer_dir / column["file"], mmap_mode='r')
+    if column["kind"] == "native":
+        return pd.Series(values, name=column["name"], copy=False)
+    mask = np.load(layer_dir / column["mask"])
+    series = pd.Series(values.astype(object), name=column["name"])
+    if mask.any():
+        series[mask] = None
+    return series
+
+
+def _tmp_dir(derived: Path, dirname: str) -> Path:
+    """Private staging dir so concurrent writers never share one."""
+    tmp_dir = derived / f"{dirname}.tmp-{os.getpid()}-{threading.get_ident()}"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    return tmp_dir
+
+
+def _publish_dir(tmp_dir: Path, dirname: str) -> str:
+    """
+    Move a fully written staging dir to a new versioned dir and return its name.
+
+    Each compile gets its own dir, so nothing a reader may have open is
+    replaced; the manifest update is what switches readers over.
+    """
+    versioned = f"{dirname}@{uuid.uuid4().hex[:12]}"
+    tmp_dir.rename(tmp_dir.parent / versioned)
+    return versioned
+
+
+@contextmanager
+def _manifest_locked(derived_dir: str) -> Iterator[None]:
+    """Hold the manifest lock against other threads and, where flock exists, other processes."""
+    path = Path(derived_dir) / MANIFEST_LOCK_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _manifest_lock, open(path, 'a') as f:
+        if fcntl is not None:
+            # Released when the file is closed
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _update_manifest(derived_dir: str, section: str, name: str, entry: Dict[str, Any]):
+    """
+    Point the manifest at a newly published entry.
+
+    The replaced entry's dir is kept for readers still loading from it; the
+    one before that is removed.
+    """
+    with _manifest_locked(derived_dir):
+        manifest = load_manifest(derived_dir)
+        previous = manifest.setdefault(section, {}).get(name)
+        if previous is not None:
+            entry["previous_dir"] = previous["dir"]
+        manifest[section][name] = entry
+        save_manifest(derived_dir, manifest)
+    stale_dir = previous.get("previous_dir") if previous is not None else None
+    if stale_dir and stale_dir not in (entry["dir"], entry.get("previous_dir")):
+        shutil.rmtree(Path(derived_dir) / stale_dir, ignore_errors=True)
+
+
+def write_layer(gdf: gpd.GeoDataFrame, derived_dir: str, layer: str,
+                source_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a GeoDataFrame as a snapshot layer and record it in the manifest.
+
+    Args:
+        gdf: Layer, already in the internal CRS
+        derived_dir: Snapshot directory (e.g., data/austin/derived)
+        layer: Layer name (e.g., "parcels", "zoning", "overlay:Floodplain")
+        source_path: Source file the layer was compiled from
+
+    Returns:
+        Manifest entry for the layer
+    """
+    derived = Path(derived_dir)
+    dirname = layer_dirname(layer)
+    tmp_dir = _tmp_dir(derived, dirname)
+
+    geoms = np.asarray(gdf.geometry.values)
+    entry = {
+        "rows": len(gdf),
+        "crs": gdf.crs.to_string() if gdf.crs is not None else None,
+        "geometry": _write_geometry(geoms, tmp_dir),
+        "columns": [
+            _write_column(gdf[name], tmp_dir, i)
+            for i, name in enumerate(c for c in gdf.columns if c != gdf.geometry.name)
+        ],
+        "source": source_info(source_path) if source_path else None,
+        "compiled_at": datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+    }
+
+    entry["dir"] = _publish_dir(tmp_dir, dirname)
+    _update_manifest(derived_dir, "layers", layer, entry)
+    return entry
+
+
+def read_layer(derived_dir: str, layer: str, entry: Optional[Dict[str, Any]] = None) -> gpd.GeoDataFrame:
+    """
+    Load a snapshot layer.
+
+    Coordinate and numeric column arrays are memory-mapped; geometries are
+    built from them and string columns are copied into object arrays.
+    """
+    if entry is None:
+        entry = load_manifest(derived_dir)["layers"].get(layer)
+        if entry is None:
+            raise FileNotFoundError(f"Layer {layer} not found in snapshot {derived_dir}")
+    layer_dir = Path(derived_dir) / entry["dir"]
+    geoms = _read_geometry(layer_dir, entry["geometry"], entry["rows"])
+    columns = {c["name"]: _read_column(layer_dir, c) for c in entry["columns"]}
+    gdf = gpd.GeoDataFrame(columns, geometry=geoms, crs=entry["crs"])
+    # Build the spatial index now rather than on the first lookup
+    gdf.sindex
+    return gdf
+
+
+def write_table(df: pd.DataFrame, derived_dir: str, name: str,
+                sources: Dict[str, str], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write a derived attribute table (no geometry) and record it in the manifest.
+
+    Args:
+        df: Table to write
+        derived_dir: Snapshot directory
+        name: Table name (e.g., "parcel_join")
+        sources: Source files the table was derived from, by role
+        params: JSON-serializable build settings (algorithm version, config
+            values) the table depends on
+
+    Returns:
+        Manifest entry for the table
+    """
+    derived = Path(derived_dir)
+    dirname = "table_" + layer_dirname(name)
+    tmp_dir = _tmp_dir(derived, dirname)
+    entry = {
+        "rows": len(df),
+        "columns": [_write_column(df[column], tmp_dir, i) for i, column in enumerate(df.columns)],
+        "sources": {role: source_info(path) for role, path in sources.items()},
+        "params": params or {},
+        "compiled_at": datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+    }
+    entry["dir"] = _publish_dir(tmp_dir, dirname)
+    _update_manifest(derived_dir, "tables", name, entry)
+    return entry
+
+
+def read_table(derived_dir: str, name: str, sources: Optional[Dict[str, str]] = None,
+               params: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+    """
+    Load a derived table, memory-mapping its numeric columns.
+
+    Returns:
+        The table, or None if it is missing or (when sources / params are
+        given) was derived from different source files, content or settings
+    """
+    entry = load_manifest(derived_dir).get("tables", {}).get(name)
+    if entry is None:
+        return None
+    if params is not None and entry.get("params", {}) != json.loads(json.dumps(params)):
+        return None
+    if sources is not None:
+        recorded = entry.get("sources", {})
+        if set(recorded) != set(sources):
+            return None
+        if not all(source_is_current(recorded[role], path) for role, path in sources.items()):
+            return None
+    table_dir = Path(derived_dir) / entry["dir"]
+    return pd.DataFrame({c["name"]: _read_column(table_dir, c) for c in entry["columns"]})
+
+
+def has_table(derived_dir: str, name: str) -> bool:
+    """Check whether a derived table has been compiled (fresh or not)."""
+    return name in load_manifest(derived_dir).get("tables", {})
+
+
+def load_layer(source_path: str, target_crs: str, derived_dir: Optional[str] = None,
+               layer: Optional[str] = None) -> gpd.GeoDataFrame:
+    """
+    Load a layer from its compiled snapshot when fresh, else from the source file.
+
+    The snapshot is used only if it was compiled from the current source file
+    content and into the requested CRS.
+    """
+    if derived_dir and layer:
+        entry = load_manifest(derived_dir)["layers"].get(layer)
+        if (entry is not None and entry.get("source")
+                and entry.get("crs") == CRS.from_user_input(target_crs).to_string()
+                and source_is_current(entry["source"], source_path)):
+            return read_layer(derived_dir, layer, entry)
+    return load_geofile(source_path, target_crs=target_crs)
+
+
+def load_layer_column(source_path: str, column: str, derived_dir: Optional[str] = None,
+                      layer: Optional[str] = None) -> np.ndarray:
+    """
+    Load one attribute column of a layer without reading any geometry.
+
+    Read from the layer's snapshot when it was compiled from the current
+    source file content, else from the source file's attributes.
+
+    Raises:
+        FileNotFoundError: If the source file does not exist
+    """
+    if not Path(source_path).exists():
+        raise FileNotFoundError(f"Geo file not found: {source_path}")
+    if derived_dir and layer:
+        entry = load_manifest(derived_dir)["layers"].get(layer)
+        if entry is not None and entry.get("source") and source_is_current(entry["source"], source_path):
+            for c in entry["columns"]:
+                if c["name"] == column:
+                    return _read_column(Path(derived_dir) / entry["dir"], c).to_numpy()
+    return gpd.read_file(source_path, columns=[column], ignore_geometry=True)[column].to_numpy()
+
+
+def compile_layer(source_path: str, target_crs: str, derived_dir: str, layer: str) -> gpd.GeoDataFrame:
+    """Parse and reproject a source layer, then write it as a snapshot."""
+    gdf = load_geofile(source_path, target_crs=target_crs)
+    write_layer(gdf, derived_dir, layer, source_path=source_path)
+    return gdf
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Compile jurisdiction layers into pre-projected binary snapshots.
+
+Writes parcels, zoning and overlay layers under data/<city>/derived/ so the
+CLI and API can memory-map them instead of parsing GeoJSON on every load.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from engine.dataset import JURISDICTIONS, compile_jurisdiction
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile jurisdiction data snapshots")
+    parser.add_argument("--city", action="append", help="Jurisdiction to compile (default: all)")
+    parser.add_argument("--data-dir", default=".", help="Data directory (default: current dir)")
+    parser.add_argument("--verbose", action="store_true", help="Verbose logging")
+    args = parser.parse_args()
+
+    for city in args.city or list(JURISDICTIONS):
+        derived_dir = compile_jurisdiction(city, args.data_dir, args.verbose)
+        print(f"Compiled {city} -> {derived_dir}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
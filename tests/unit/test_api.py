@@ -0,0 +1,39 @@
+"""Unit tests for api.py."""
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fastapi.testclient import TestClient
+
+import api
+from engine import telemetry
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Datasets resolve against the repo root; logs go to tmp_path
+    monkeypatch.chdir(ROOT)
+    telemetry.shutdown()
+    monkeypatch.setattr(telemetry, "LOG_DIR", tmp_path)
+    with TestClient(api.app) as test_client:
+        yield test_client
+    telemetry.shutdown()
+
+
+def test_zoning_timings(client):
+    """Test timings=1 attaches the request's stage spans and the default omits them."""
+    response = client.get("/zoning", params={"apn": "0204050712", "city": "austin", "timings": 1})
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    assert timings["name"] == "zoning"
+    stages = [child["name"] for child in timings["children"]]
+    assert stages == ["data_load", "parcel_lookup", "rules_application", "output_write"]
+    assert all(child["duration_ms"] >= 0 for child in timings["children"])
+
+    response = client.get("/zoning", params={"apn": "0204050712", "city": "austin"})
+    assert response.status_code == 200
+    assert "timings" not in response.json()
@@ -9,7 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from engine.apply_rules import (
     load_rules, get_zone_rules, apply_zone_rules,
-    get_overlay_rules, get_crs_config
+    get_overlay_rules, get_crs_config, compile_rules, load_rules_table, get_rule_answer
 )
 
 
@@ -103,3 +103,65 @@ def test_get_crs_config():
     assert crs_config['input'] == 'EPSG:4326'
     assert crs_config['internal'] == 'EPSG:2277'
 
+
+def test_compile_rules_matches_apply_zone_rules():
+    """Test compiled table returns the same constraints and notes as the rule functions."""
+    rules = {
+        'zones': {
+            'SF-3': {
+                'height_ft': 35, 'far': 0.4, 'lot_coverage_pct': 40,
+                'setbacks_ft': {'front': 25, 'side': 5, 'rear': 10},
+                'corner_lot': {'street_side_setback_ft': 15}
+            }
+        },
+        'overlays': {'historic_district': {'rules': {'notes': 'design review required'}}}
+    }
+    table = compile_rules(rules)
+    for corner in (False, True):
+        compiled = table.constraints('SF-3', corner)
+        expected = apply_zone_rules(rules['zones']['SF-3'], corner)
+        assert compiled['height_ft'] == expected['height_ft']
+        assert dict(compiled['setbacks_ft']) == expected['setbacks_ft']
+    assert table.constraints('UNKNOWN') is None
+    assert table.overlay_notes(['Historic District', 'Airport']) == \
+        get_overlay_rules(rules, ['Historic District', 'Airport'])['notes']
+    
+    # Records are shared, so they are read-only
+    with pytest.raises(TypeError):
+        table.constraints('SF-3')['setbacks_ft']['front'] = 0
+
+
+def test_rule_answers_cite_zone_section():
+    """Test rule answers carry value, unit, rationale and the zone's code citation."""
+    rules = {
+        'citations': {'code_id': 'austin_ldc_2024', 'anchors': {'front_setback': '(B)(1)'}},
+        'zones': {
+            'SF-3': {'code_section': '25-2-492', 'height_ft': 35, 'setbacks_ft': {'front': 25}},
+            'MF-1': {'height_ft': 45},
+        }
+    }
+    assert get_rule_answer(rules, 'SF-3', 'front_setback') == {
+        'value': 25,
+        'unit': 'ft',
+        'rationale': 'Minimum front yard setback for SF-3',
+        'citations': [{'code_id': 'austin_ldc_2024', 'section': '25-2-492', 'anchor': '(B)(1)'}],
+    }
+    assert get_rule_answer(rules, 'MF-1', 'max_height')['citations'] == []
+    assert get_rule_answer(rules, 'SF-3', 'min_lot_size') is None
+    
+    table = compile_rules(rules)
+    assert table.rule_answer('SF-3', 'max_height')['value'] == 35
+    assert table.rule_answer('UNKNOWN', 'max_height') is None
+
+
+def test_load_rules_table_cached_until_content_changes(tmp_path):
+    """Test the compiled table is reused until the file content changes."""
+    rules_file = tmp_path / "rules.yaml"
+    rules_file.write_text("version: 1\njurisdiction: test\nzones:\n  SF-3:\n    height_ft: 35\n")
+    table = load_rules_table(str(rules_file))
+    assert load_rules_table(str(rules_file)) is table
+    
+    rules_file.write_text("version: 1\njurisdiction: test\nzones:\n  SF-3:\n    height_ft: 40.5\n")
+    reloaded = load_rules_table(str(rules_file))
+    assert reloaded is not table
+    assert reloaded.constraints('SF-3')['height_ft'] == 40.5
@@ -0,0 +1,54 @@
+"""Unit tests for batch.py."""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine.batch import resolve_batch, lookup_apns
+from engine.dataset import load_jurisdiction_data
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+
+@pytest.fixture(scope="module")
+def austin_data():
+    return load_jurisdiction_data("austin", str(REPO_ROOT))
+
+
+def test_resolve_batch_apns_and_points(austin_data):
+    """Test batch resolves APNs and lat/lng together, in order."""
+    items = [
+        {"apn": "0204050713"},
+        {"latitude": 30.2672, "longitude": -97.7431},
+        {"apn": "0204050713"},
+    ]
+    results = resolve_batch(austin_data, items, "austin")
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["ok"] for r in results)
+    assert results[0]["result"]["apn"] == "0204050713"
+    assert results[0]["result"]["zone"] == "SF-3"
+    assert results[0]["result"]["jurisdiction"] == "Austin, TX"
+    assert results[1]["result"]["apn"] == "0204050712"
+
+
+def test_resolve_batch_inline_errors(austin_data):
+    """Test one bad item does not fail the batch."""
+    items = [
+        {"apn": "0204050714"},
+        {"apn": "NOPE"},
+        {},
+        {"apn": "0204050714", "latitude": 30.0, "longitude": -97.0},
+    ]
+    results = resolve_batch(austin_data, items, "austin")
+    assert results[0]["ok"]
+    assert not results[1]["ok"]
+    assert "Parcel not found" in results[1]["error"]
+    assert not results[2]["ok"]
+    assert not results[3]["ok"]
+
+
+def test_lookup_apns(austin_data):
+    """Test vectorized APN lookup."""
+    positions = lookup_apns(austin_data["parcels"], ["0204050716", "missing", "0204050712"])
+    assert list(positions) == [4, -1, 0]
@@ -0,0 +1,105 @@
+"""Unit tests for dataset.py and cache.py."""
+import os
+import shutil
+import pytest
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine import dataset
+from engine.cache import FileBackedCache, LRUCache
+from engine.dataset import get_jurisdiction_data, clear_datasets, evict_idle_datasets
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+
+def test_file_backed_cache_reuses_until_content_changes(tmp_path):
+    """Test cache reuse, touch without change, and rebuild on change."""
+    source = tmp_path / "source.txt"
+    source.write_text("v1")
+    cache = FileBackedCache()
+    builds = []
+
+    def build():
+        builds.append(source.read_text())
+        return source.read_text()
+
+    assert cache.get("k", [source], build) == "v1"
+    assert cache.get("k", [source], build) == "v1"
+    assert len(builds) == 1
+
+    # Touch without content change: no rebuild
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get("k", [source], build) == "v1"
+    assert len(builds) == 1
+
+    source.write_text("v2 changed")
+    assert cache.get("k", [source], build) == "v2 changed"
+    assert len(builds) == 2
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test LRUCache builds once per key and evicts the oldest entry."""
+    cache = LRUCache(maxsize=2)
+    builds = []
+    for key in ("a", "b", "a", "c"):
+        cache.get(key, lambda: builds.append(key) or key.upper())
+    assert builds == ["a", "b", "c"]
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_get_jurisdiction_data_is_shared(tmp_path):
+    """Test the warm dataset is loaded once and reloaded on source change."""
+    for rel in ["rules/austin.yaml", "data/austin/parcels.geojson", "data/austin/zoning.geojson"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(REPO_ROOT / rel, tmp_path / rel)
+
+    clear_datasets()
+    try:
+        first = get_jurisdiction_data("austin", str(tmp_path))
+        second = get_jurisdiction_data("austin", str(tmp_path))
+        assert first is second
+        assert len(first["parcels"]) == 5
+
+        rules_file = tmp_path / "rules" / "austin.yaml"
+        rules_file.write_text(rules_file.read_text() + "\n# edited\n")
+        third = get_jurisdiction_data("austin", str(tmp_path))
+        assert third is not first
+    finally:
+        clear_datasets()
+
+
+def test_evict_idle_datasets():
+    """Test idle datasets are dropped and reloaded on next use."""
+    clear_datasets()
+    try:
+        first = get_jurisdiction_data("austin", str(REPO_ROOT))
+        assert evict_idle_datasets(max_idle_s=3600) == []
+        assert evict_idle_datasets(max_idle_s=0) == [("austin", str(REPO_ROOT.resolve()))]
+        assert get_jurisdiction_data("austin", str(REPO_ROOT)) is not first
+    finally:
+        clear_datasets()
+
+
+def test_idle_datasets_swept_in_background(monkeypatch):
+    """Test an idle dataset is dropped without any further calls."""
+    monkeypatch.setattr(dataset, "DATASET_IDLE_SECONDS", 0.1)
+    monkeypatch.setattr(dataset, "_sweeper", None)
+    clear_datasets()
+    try:
+        get_jurisdiction_data("austin", str(REPO_ROOT))
+        deadline = time.monotonic() + 5
+        while len(dataset._datasets) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(dataset._datasets) == 0
+    finally:
+        clear_datasets()
+
+
+def test_get_jurisdiction_data_unknown_city():
+    """Test unknown jurisdiction raises ValueError."""
+    with pytest.raises(ValueError):
+        get_jurisdiction_data("atlantis", str(REPO_ROOT))
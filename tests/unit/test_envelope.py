@@ -0,0 +1,69 @@
+"""Unit tests for envelope.py."""
+import pytest
+import geopandas as gpd
+from shapely.geometry import Polygon
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine.envelope import compute_envelopes, compute_envelope, envelope_summary
+from engine.apply_rules import apply_zone_rules
+
+
+ZONE_RULES = {
+    "height_ft": 35,
+    "far": 0.4,
+    "lot_coverage_pct": 40,
+    "setbacks_ft": {"front": 25, "side": 5, "rear": 10},
+    "corner_lot": {"street_side_setback_ft": 15},
+}
+
+
+def test_compute_envelopes_rectangular_lots():
+    """Test setbacks are applied along the lot's frontage and depth axes."""
+    parcels = gpd.GeoSeries([
+        Polygon([(0, 0), (50, 0), (50, 100), (0, 100)]),        # 50 ft frontage, 100 ft deep
+        Polygon([(0, 0), (100, 0), (100, 50), (0, 50)]),        # same lot, rotated
+        Polygon([(0, 0), (20, 0), (20, 30), (0, 30)]),          # too small to build on
+    ], crs='EPSG:2277')
+    result = compute_envelopes(parcels, front=25, side=5, rear=10, street_side=0, far=0.4, lot_coverage_pct=40)
+    
+    assert result["lot_area_sqft"].tolist() == [5000, 5000, 600]
+    assert result["envelope_area_sqft"] == pytest.approx([40 * 65, 40 * 65, 0])
+    assert result["max_footprint_sqft"] == pytest.approx([2000, 2000, 240])
+    assert result["max_gfa_sqft"] == pytest.approx([2000, 2000, 240])
+    assert result["buildable_footprint_sqft"] == pytest.approx([2000, 2000, 0])
+    assert result["envelope"][2].is_empty
+
+
+def test_compute_envelope_corner_lot():
+    """Test the street-side setback replaces one side setback on corner lots."""
+    parcel = gpd.GeoSeries([Polygon([(0, 0), (50, 0), (50, 100), (0, 100)])], crs='EPSG:2277')
+    envelope = compute_envelope(parcel, apply_zone_rules(ZONE_RULES, is_corner_lot=True))
+    assert envelope["envelope_area_sqft"] == pytest.approx((50 - 15 - 5) * (100 - 25 - 10))
+    assert envelope["envelope"].within(parcel.iloc[0])
+
+
+def test_compute_envelope_irregular_lot():
+    """Test irregular lots keep the minimum setback from every lot line."""
+    l_shape = Polygon([(0, 0), (60, 0), (60, 40), (30, 40), (30, 100), (0, 100)])
+    envelope = compute_envelope(l_shape, apply_zone_rules(ZONE_RULES))
+    assert envelope["envelope"].within(l_shape.buffer(-5 + 1e-6))
+    assert 0 < envelope["envelope_area_sqft"] < l_shape.area
+
+
+def test_envelope_summary():
+    """Test single-parcel and bulk summaries agree."""
+    parcels = gpd.GeoSeries([Polygon([(0, 0), (50, 0), (50, 100), (0, 100)])], crs='EPSG:2277')
+    constraints = apply_zone_rules(ZONE_RULES)
+    bulk = compute_envelopes(parcels, 25, 5, 10, 0, 0.4, 40)
+    summary = envelope_summary(compute_envelope(parcels, constraints))
+    assert summary == envelope_summary(bulk, 0)
+    assert summary == {
+        "lot_area_sqft": 5000.0,
+        "envelope_area_sqft": 2600.0,
+        "max_footprint_sqft": 2000.0,
+        "buildable_footprint_sqft": 2000.0,
+        "max_gfa_sqft": 2000.0,
+    }
@@ -0,0 +1,102 @@
+"""Unit tests for executor.py."""
+import asyncio
+import threading
+import time
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine.executor import ZoningExecutor, ExecutorSaturated
+
+
+def test_run_returns_result_off_event_loop():
+    """Test jobs run on worker threads and return their result."""
+    executor = ZoningExecutor(max_workers=2)
+
+    async def main():
+        return await executor.run(lambda x, y=0: (threading.current_thread().name, x + y), 1, y=2)
+
+    try:
+        thread_name, value = asyncio.run(main())
+        assert value == 3
+        assert thread_name.startswith("zoning")
+        stats = executor.stats()
+        assert stats["completed"] == 1
+        assert stats["queue_depth"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_blocking_job_does_not_stall_loop():
+    """Test a slow job does not block other coroutines."""
+    executor = ZoningExecutor(max_workers=1)
+
+    async def main():
+        slow = asyncio.ensure_future(executor.run(time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        await slow
+        return elapsed
+
+    try:
+        assert asyncio.run(main()) < 0.2
+    finally:
+        executor.shutdown()
+
+
+def test_queue_bound_and_wait_stats():
+    """Test jobs beyond max_queue are rejected and waits are recorded."""
+    executor = ZoningExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(executor.run(lambda: None))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queue_depth"] == 1
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(lambda: None)
+        release.set()
+        await asyncio.gather(first, second)
+
+    try:
+        asyncio.run(main())
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["wait_ms_max"] > 0
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_queued_jobs_release_their_slots():
+    """Test jobs cancelled while queued free their queue slots."""
+    executor = ZoningExecutor(max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        queued = [asyncio.ensure_future(executor.run(lambda: None)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queue_depth"] == 2
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        assert executor.stats()["queue_depth"] == 0
+        release.set()
+        await first
+        return await executor.run(lambda: "ok")
+
+    try:
+        assert asyncio.run(main()) == "ok"
+        stats = executor.stats()
+        assert stats["cancelled"] == 2
+        assert stats["completed"] == 2
+        assert stats["queue_depth"] == 0
+    finally:
+        executor.shutdown()
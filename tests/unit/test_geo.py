@@ -8,7 +8,11 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from parsers.geo import load_geofile, find_parcel_by_apn, find_nearest_parcel
+from parsers.geo import (
+    load_geofile, find_parcel_by_apn, find_nearest_parcel,
+    normalize_apn, build_apn_index, locate_parcel, locate_parcels
+)
+from engine.geom import transform_point
 
 
 def test_load_geofile(tmp_path):
@@ -51,6 +55,33 @@ def test_find_parcel_by_apn():
     assert parcel is None
 
 
+def test_normalize_apn():
+    """Test APN normalization."""
+    assert normalize_apn('0204-050712') == '204050712'
+    assert normalize_apn(' 0204 050712 ') == '204050712'
+    assert normalize_apn('ab-12') == normalize_apn('AB12')
+    assert normalize_apn('000') == '0'
+
+
+def test_apn_index():
+    """Test APN index lookups and existence checks."""
+    gdf = gpd.GeoDataFrame({
+        'APN': ['0204050712', '0204-050713', '0204050712'],
+        'geometry': [Point(0, 0), Point(1, 1), Point(2, 2)]
+    }, crs='EPSG:4326')
+    index = build_apn_index(gdf)
+
+    assert len(index) == 2
+    assert index.get('204-050712') == 0
+    assert index.get('0204050713') == 1
+    assert '204050713' in index
+    assert 'missing' not in index
+    assert list(index.get_many(['0204050713', 'missing', '204050712'])) == [1, -1, 0]
+
+    parcel = find_parcel_by_apn(gdf, '0204 050713', index=index)
+    assert parcel['APN'] == '0204-050713'
+
+
 def test_find_nearest_parcel():
     """Test finding nearest parcel to lat/lng."""
     gdf = gpd.GeoDataFrame({
@@ -68,3 +99,49 @@ def test_find_nearest_parcel():
     assert parcel is not None
     assert parcel['APN'] == '12345'
 
+
+def _square_parcels():
+    """Two adjacent 100 ft parcels around the Austin test point (EPSG:2277)."""
+    origin = transform_point(30.2672, -97.7431, "EPSG:4326", "EPSG:2277")
+    x, y = origin.x, origin.y
+    return gpd.GeoDataFrame({
+        'APN': ['A', 'B'],
+        'geometry': [
+            Polygon([(x - 50, y - 50), (x + 50, y - 50), (x + 50, y + 50), (x - 50, y + 50)]),
+            Polygon([(x + 50, y - 50), (x + 150, y - 50), (x + 150, y + 50), (x + 50, y + 50)]),
+        ]
+    }, crs='EPSG:2277')
+
+
+def test_locate_parcel_contains():
+    """Test point inside a parcel matches by containment with no snap."""
+    gdf = _square_parcels()
+    position, match = locate_parcel(gdf, 30.2672, -97.7431, max_distance=10)
+    assert position == 0
+    assert match == {"method": "contains", "snap_distance_ft": 0.0}
+
+
+def test_locate_parcel_snap_radius():
+    """Test points outside every parcel snap only within max_distance."""
+    gdf = _square_parcels()
+    # ~300 ft north of the parcels' top edge
+    lat = 30.2672 + 350 / 364000
+    position, match = locate_parcel(gdf, lat, -97.7431)
+    assert position == 0
+    assert match["method"] == "nearest"
+    assert 250 < match["snap_distance_ft"] < 350
+
+    position, match = locate_parcel(gdf, lat, -97.7431, max_distance=100)
+    assert position is None
+    assert match is None
+
+
+def test_locate_parcels_bulk():
+    """Test bulk lookup mixes containment, snapping and misses."""
+    gdf = _square_parcels()
+    positions, methods, distances = locate_parcels(
+        gdf, [30.2672, 30.2672 + 350 / 364000, 30.3], [-97.7431, -97.7431, -97.7431], max_distance=500
+    )
+    assert positions.tolist() == [0, 0, -1]
+    assert methods.tolist() == ["contains", "nearest", None]
+    assert distances[0] == 0.0
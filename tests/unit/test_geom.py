@@ -1,13 +1,18 @@
 """Unit tests for geom.py."""
 import pytest
 import geopandas as gpd
-from shapely.geometry import Point, Polygon
+from shapely.geometry import Point, Polygon, LineString
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from engine.geom import transform_point, intersect_zone, detect_overlays, is_corner_lot
+from engine.geom import (
+    transform_point, transform_coords, get_transformer,
+    intersect_zone, intersect_zone_shares, assign_zones, assign_zone_shares,
+    detect_overlays, merge_overlays, assign_overlays, is_corner_lot,
+    assign_corner_lots, CORNER_LOT_FIELD
+)
 
 
 def test_transform_point():
@@ -18,6 +23,20 @@ def test_transform_point():
     assert hasattr(point, 'y')
 
 
+def test_transform_coords_matches_to_crs():
+    """Test vectorized transform matches GeoPandas reprojection."""
+    lats = [30.2672, 30.2700]
+    lngs = [-97.7431, -97.7500]
+    xs, ys = transform_coords(lats, lngs, "EPSG:4326", "EPSG:2277")
+    expected = gpd.GeoSeries(gpd.points_from_xy(lngs, lats), crs="EPSG:4326").to_crs("EPSG:2277")
+    assert xs == pytest.approx(expected.x.tolist())
+    assert ys == pytest.approx(expected.y.tolist())
+
+    point = transform_point(lats[0], lngs[0], "EPSG:4326", "EPSG:2277")
+    assert point.x == pytest.approx(xs[0])
+    assert get_transformer("EPSG:4326", "EPSG:2277") is get_transformer("EPSG:4326", "EPSG:2277")
+
+
 def test_intersect_zone():
     """Test zone intersection."""
     parcel = gpd.GeoSeries([Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])], crs='EPSG:2277')
@@ -35,6 +54,55 @@ def test_intersect_zone():
     assert zone == 'SF-3'
 
 
+def test_assign_zones_matches_intersect_zone():
+    """Test bulk zone assignment agrees with per-parcel intersect_zone."""
+    parcels = gpd.GeoDataFrame({
+        'APN': ['inside', 'straddle', 'outside'],
+        'geometry': [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            Polygon([(1.5, 0), (2.5, 0), (2.5, 1), (1.5, 1)]),
+            Polygon([(10, 10), (11, 10), (11, 11), (10, 11)]),
+        ]
+    }, crs='EPSG:2277')
+    # Districts listed out of spatial order; the straddling parcel touches both
+    zoning_gdf = gpd.GeoDataFrame({
+        'zone': ['SF-2', 'SF-3'],
+        'geometry': [
+            Polygon([(2, -1), (4, -1), (4, 2), (2, 2)]),
+            Polygon([(-1, -1), (2, -1), (2, 2), (-1, 2)]),
+        ]
+    }, crs='EPSG:2277')
+    
+    zones = assign_zones(parcels, zoning_gdf)
+    assert zones.tolist() == ['SF-3', 'SF-2', 'UNKNOWN']
+    for (_, parcel), zone in zip(parcels.iterrows(), zones):
+        assert intersect_zone(parcel, zoning_gdf) == zone
+
+
+def test_assign_zone_shares_area_weighted():
+    """Test split parcels get the zone covering most of their area."""
+    parcels = gpd.GeoSeries([
+        Polygon([(0, 0), (4, 0), (4, 1), (0, 1)]),  # 1/4 SF-3, 3/4 SF-2
+        Polygon([(5, 0), (6, 0), (6, 1), (5, 1)]),  # SF-2 only
+    ], crs='EPSG:2277')
+    zoning_gdf = gpd.GeoDataFrame({
+        'zone': ['SF-3', 'SF-2'],
+        'geometry': [
+            Polygon([(-1, -1), (1, -1), (1, 2), (-1, 2)]),
+            Polygon([(1, -1), (7, -1), (7, 2), (1, 2)]),
+        ]
+    }, crs='EPSG:2277')
+    
+    zones, splits = assign_zone_shares(parcels, zoning_gdf)
+    assert zones.tolist() == ['SF-2', 'SF-2']
+    assert splits == {0: [{'zone': 'SF-2', 'fraction': 0.75}, {'zone': 'SF-3', 'fraction': 0.25}]}
+    
+    zone, fractions = intersect_zone_shares(parcels.iloc[[0]], zoning_gdf)
+    assert zone == 'SF-2'
+    assert fractions == splits[0]
+    assert intersect_zone_shares(parcels.iloc[[1]], zoning_gdf) == ('SF-2', [])
+
+
 def test_detect_overlays():
     """Test overlay detection."""
     parcel = gpd.GeoSeries([Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])], crs='EPSG:2277')
@@ -54,6 +122,34 @@ def test_detect_overlays():
     assert 'Airport' not in overlays
 
 
+def test_assign_overlays_single_query():
+    """Test merged overlay layer finds every overlay per parcel, in layer order."""
+    parcels = gpd.GeoSeries([
+        Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+        Polygon([(5, 5), (6, 5), (6, 6), (5, 6)]),
+        Polygon([(20, 20), (21, 20), (21, 21), (20, 21)]),
+    ], crs='EPSG:2277')
+    overlay_gdfs = {
+        'Floodplain': gpd.GeoDataFrame({
+            'geometry': [
+                Polygon([(-1, -1), (2, -1), (2, 2), (-1, 2)]),
+                Polygon([(0.5, 0.5), (7, 0.5), (7, 7), (0.5, 7)]),
+            ]
+        }, crs='EPSG:2277'),
+        'Historic': gpd.GeoDataFrame({'geometry': []}, crs='EPSG:2277'),
+        'Airport': gpd.GeoDataFrame({
+            'geometry': [Polygon([(-1, -1), (1.5, -1), (1.5, 1.5), (-1, 1.5)])]
+        }, crs='EPSG:2277'),
+    }
+    
+    layer = merge_overlays(overlay_gdfs)
+    assert len(layer) == 3
+    assert assign_overlays(parcels, layer) == [['Floodplain', 'Airport'], ['Floodplain'], []]
+    assert assign_overlays(parcels, overlay_gdfs) == assign_overlays(parcels, layer)
+    assert detect_overlays(parcels.iloc[[0]], layer) == ['Floodplain', 'Airport']
+    assert assign_overlays(parcels, merge_overlays({}, crs='EPSG:2277')) == [[], [], []]
+
+
 def test_is_corner_lot():
     """Test corner lot detection."""
     # Simple rectangular parcel (not corner lot)
@@ -64,3 +160,29 @@ def test_is_corner_lot():
     result = is_corner_lot(parcel)
     assert isinstance(result, bool)
 
+
+def test_assign_corner_lots_from_streets():
+    """Test corner lots need frontage on two distinct named streets."""
+    parcels = gpd.GeoSeries([
+        Polygon([(0, 0), (100, 0), (100, 100), (0, 100)]),      # Main St + Oak Ave
+        Polygon([(200, 0), (300, 0), (300, 100), (200, 100)]),  # two Main St segments
+        Polygon([(200, 300), (300, 300), (300, 400), (200, 400)]),  # no street
+    ], crs='EPSG:2277')
+    streets = gpd.GeoDataFrame({
+        'street_name': ['Main St', 'Main St', 'Oak Ave'],
+        'geometry': [
+            LineString([(-50, -20), (150, -20)]),
+            LineString([(150, -20), (350, -20)]),
+            LineString([(-20, -50), (-20, 150)]),
+        ]
+    }, crs='EPSG:2277')
+    
+    corners = assign_corner_lots(parcels, streets, street_buffer_ft=25)
+    assert corners.tolist() == [True, False, False]
+    # Streets farther than the buffer are not frontages
+    assert not assign_corner_lots(parcels, streets, street_buffer_ft=10).any()
+    assert is_corner_lot(parcels.iloc[[0]], 25, streets=streets)
+    
+    # Precomputed flag on a parcel row is used as-is
+    row = gpd.GeoDataFrame({CORNER_LOT_FIELD: [True]}, geometry=[parcels.iloc[2]], crs='EPSG:2277').iloc[0]
+    assert is_corner_lot(row, 25, streets=streets)
@@ -0,0 +1,76 @@
+"""Unit tests for join_table.py."""
+import json
+import shutil
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine.dataset import JURISDICTIONS, load_jurisdiction_data, compile_jurisdiction
+from engine.geom import intersect_zone, is_corner_lot
+from engine.join_table import build_join_table
+from parsers.snapshot import load_manifest
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for rel in ["rules/austin.yaml", "data/austin/parcels.geojson", "data/austin/zoning.geojson"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(REPO_ROOT / rel, tmp_path / rel)
+    return tmp_path
+
+
+def test_build_join_table_matches_single_parcel_path(data_dir):
+    """Test bulk join agrees with per-parcel intersect_zone/is_corner_lot."""
+    data = load_jurisdiction_data("austin", str(data_dir))
+    table = build_join_table(data["parcels"], data["zoning"], data["overlay_gdfs"])
+    for _, parcel in data["parcels"].iterrows():
+        row = table.lookup(parcel["APN"])
+        assert row["zone"] == intersect_zone(parcel, data["zoning"])
+        assert row["corner_lot"] == is_corner_lot(parcel)
+        assert row["overlays"] == []
+    assert table.lookup("missing") is None
+
+
+def test_join_table_only_loaded_once_compiled(data_dir):
+    """Test the table is absent until compiled, then served from disk."""
+    assert load_jurisdiction_data("austin", str(data_dir))["parcel_join"] is None
+    compile_jurisdiction("austin", str(data_dir))
+    table = load_jurisdiction_data("austin", str(data_dir))["parcel_join"]
+    assert table is not None
+    assert table.lookup("0204050713")["zone"] == "SF-3"
+    split = table.lookup("0204050712")
+    assert split["zone"] == "SF-2"
+    assert [share["zone"] for share in split["zone_fractions"]] == ["SF-2", "SF-3"]
+
+
+def test_join_table_rebuilt_when_layer_changes(data_dir):
+    """Test a stale table is rebuilt automatically on load."""
+    compile_jurisdiction("austin", str(data_dir))
+
+    zoning_file = data_dir / "data" / "austin" / "zoning.geojson"
+    zoning = json.loads(zoning_file.read_text())
+    for feature in zoning["features"]:
+        if feature["properties"]["zone"] == "SF-3":
+            feature["properties"]["zone"] = "SF-4"
+    zoning_file.write_text(json.dumps(zoning))
+
+    table = load_jurisdiction_data("austin", str(data_dir))["parcel_join"]
+    assert table.lookup("0204050713")["zone"] == "SF-4"
+
+
+def test_join_table_rebuilt_when_street_buffer_changes(data_dir, monkeypatch):
+    """Test a table compiled with another street buffer is not served."""
+    derived_dir = data_dir / "data" / "austin" / "derived"
+    compile_jurisdiction("austin", str(data_dir))
+    compiled = load_manifest(str(derived_dir))["tables"]["parcel_join"]
+    assert compiled["params"]["street_buffer_ft"] == 10.0
+
+    monkeypatch.setitem(JURISDICTIONS["austin"], "street_buffer_ft", 25.0)
+    assert load_jurisdiction_data("austin", str(data_dir))["parcel_join"] is not None
+    rebuilt = load_manifest(str(derived_dir))["tables"]["parcel_join"]
+    assert rebuilt["params"]["street_buffer_ft"] == 25.0
+    assert rebuilt["dir"] != compiled["dir"]
@@ -0,0 +1,66 @@
+"""Unit tests for jurisdictions.py."""
+import sys
+from pathlib import Path
+
+import geopandas as gpd
+import shapely
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine import dataset
+from engine.jurisdictions import JurisdictionRegistry, get_registry, resolve_batch_any
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+
+def parcel_points():
+    parcels = gpd.read_file(REPO_ROOT / "data" / "austin" / "parcels.geojson")
+    points = parcels.geometry.representative_point().to_crs("EPSG:4326")
+    return list(zip(points.y, points.x))
+
+
+def test_registry_resolves_parcels_to_austin():
+    """Test every sample parcel resolves to Austin by point and APN."""
+    registry = get_registry(str(REPO_ROOT))
+    lats, lngs = zip(*parcel_points())
+    assert list(registry.resolve_points(lats, lngs)) == ["austin"] * len(lats)
+    assert registry.resolve_point(0.0, 0.0) is None
+    assert registry.resolve_apn("0204-050712") == "austin"
+    assert registry.resolve_apn("9999999999") is None
+
+
+def test_resolve_apn_does_not_load_datasets():
+    """Test APN resolution uses the registry's APN sets, not the datasets."""
+    registry = get_registry(str(REPO_ROOT))
+    dataset.clear_datasets()
+    assert registry.resolve_apn("0204050712") == "austin"
+    assert registry.resolve_apn("9999999999") is None
+    assert len(dataset._datasets) == 0
+
+
+def test_registry_priority_and_apn_pattern():
+    """Test overlapping boundaries resolve to the lowest priority number."""
+    square = shapely.box(-98.0, 30.0, -97.0, 31.0)
+    registry = JurisdictionRegistry([
+        {"id": "county", "name": "County", "priority": 2, "boundary": shapely.box(-99.0, 29.0, -96.0, 32.0),
+         "apn_pattern": r"C\d+"},
+        {"id": "city", "name": "City", "priority": 1, "boundary": square, "apn_pattern": r"\d{3}"},
+    ])
+    assert registry.resolve_point(30.5, -97.5) == "city"
+    assert registry.resolve_point(29.5, -97.5) == "county"
+    assert list(registry.resolve_points([30.5, 29.5, 0.0], [-97.5, -97.5, 0.0])) == ["city", "county", None]
+    # Patterns rule the APN out without loading either dataset
+    assert registry.resolve_apn("12-34") is None
+
+
+def test_resolve_batch_any_groups_by_jurisdiction():
+    """Test batch items resolve without a city, keeping input order."""
+    lat, lng = parcel_points()[0]
+    results = resolve_batch_any([
+        {"apn": "0204050712"}, {"latitude": 0.0, "longitude": 0.0}, {"latitude": lat, "longitude": lng},
+    ], str(REPO_ROOT))
+
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["result"]["zone"] == "SF-2"
+    assert not results[1]["ok"]
+    assert results[2]["ok"]
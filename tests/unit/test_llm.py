@@ -0,0 +1,161 @@
+"""Unit tests for llm.py against a local OpenAI-compatible stub server."""
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from parsers import pdf
+from parsers.llm import OpenAICompatibleClient, LLMCitationExtractor, parse_pdf_with_llm
+from tests.unit.pdf_helpers import make_pdf
+
+
+class StubServer:
+    """Chat completions stub: answers every requested citation found in the prompt."""
+
+    def __init__(self, delay_s: float = 0.0):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay_s = delay_s
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    stub.requests.append(body)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay_s)
+                prompt = body["messages"][1]["content"]
+                citations = json.loads(re.match(r"Citations: (\[.*?\])", prompt).group(1))
+                answer = {c: f"{c} text" if c != "§25-2-493" else None for c in citations}
+                reply = json.dumps({"choices": [{"message": {"content": "```json\n" + json.dumps(answer) + "\n```"}}]})
+                with lock:
+                    stub.in_flight -= 1
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(reply.encode())
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def code_pdf(tmp_path, monkeypatch):
+    # Keep extracted pages out of the repo's cache
+    monkeypatch.setattr(pdf, "PAGE_CACHE_DIR", tmp_path / "pages")
+    path = tmp_path / "ldc.pdf"
+    make_pdf(path, [f"§25-2-49{i} Section {i}" for i in range(1, 6)])
+    return path
+
+
+def make_extractor(tmp_path, url, **kwargs):
+    client = OpenAICompatibleClient(url, model="stub-model", timeout_s=kwargs.pop("timeout_s", 5.0))
+    return LLMCitationExtractor(client, cache_file=tmp_path / "llm.sqlite",
+                                index_file=tmp_path / "index.sqlite", **kwargs)
+
+
+def test_extract_batches_bounds_concurrency_and_caches(tmp_path, code_pdf):
+    """Test citations are batched, calls are bounded and repeat runs make no calls."""
+    server = StubServer(delay_s=0.1)
+    try:
+        citations = [f"§25-2-49{i}" for i in range(1, 6)] + ["§99-9-999"]
+        extractor = make_extractor(tmp_path, server.url, batch_size=2, max_concurrency=2)
+        results = extractor.extract_sync(str(code_pdf), citations)
+
+        assert results["§25-2-491"] == "§25-2-491 text"
+        assert results["§25-2-493"] is None
+        # Not in the PDF: never sent to the model
+        assert results["§99-9-999"] is None
+        assert len(server.requests) == 3
+        assert all(request["model"] == "stub-model" for request in server.requests)
+        assert server.max_in_flight <= 2
+
+        again = make_extractor(tmp_path, server.url, batch_size=2)
+        assert again.extract_sync(str(code_pdf), citations) == results
+        assert again.calls == 0
+        assert len(server.requests) == 3
+
+        # Other models do not share results
+        client = OpenAICompatibleClient(server.url, model="other-model")
+        other = LLMCitationExtractor(client, cache_file=tmp_path / "llm.sqlite", index_file=tmp_path / "index.sqlite")
+        other.extract_sync(str(code_pdf), ["§25-2-491"])
+        assert other.calls == 1
+    finally:
+        server.close()
+
+
+def test_extract_timeout_is_not_cached(tmp_path, code_pdf):
+    """Test a timed-out call yields None and is retried on the next run."""
+    server = StubServer(delay_s=1.0)
+    try:
+        slow = make_extractor(tmp_path, server.url, timeout_s=0.2)
+        assert slow.extract_sync(str(code_pdf), ["§25-2-491"]) == {"§25-2-491": None}
+
+        server.delay_s = 0.0
+        retry = make_extractor(tmp_path, server.url)
+        assert retry.extract_sync(str(code_pdf), ["§25-2-491"]) == {"§25-2-491": "§25-2-491 text"}
+        assert retry.calls == 1
+    finally:
+        server.close()
+
+
+def test_parse_pdf_with_llm_disabled_without_endpoint(code_pdf, monkeypatch):
+    """Test no endpoint configured means no LLM call."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    assert parse_pdf_with_llm(str(code_pdf), ["§25-2-491"]) == {"§25-2-491": None}
+
+
+def test_parse_pdf_with_llm_one_extract_for_all_citations(tmp_path, code_pdf, monkeypatch):
+    """Test the citations of one lookup share a batch instead of a call each."""
+    from parsers import llm
+
+    server = StubServer()
+    try:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.url)
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.setattr(llm, "LLM_CACHE_FILE", tmp_path / "llm.sqlite")
+        monkeypatch.setattr(pdf, "INDEX_FILE", tmp_path / "index.sqlite")
+        citations = ["§25-2-491", "§25-2-492", "§25-2-493"]
+        assert parse_pdf_with_llm(str(code_pdf), citations) == {
+            "§25-2-491": "§25-2-491 text", "§25-2-492": "§25-2-492 text", "§25-2-493": None}
+        assert len(server.requests) == 1
+    finally:
+        server.close()
+
+
+def test_extract_sync_inside_running_loop(tmp_path, code_pdf):
+    """Test synchronous callers running on an event loop still get results."""
+    server = StubServer()
+    try:
+        extractor = make_extractor(tmp_path, server.url)
+
+        async def handler():
+            return extractor.extract_sync(str(code_pdf), ["§25-2-491"])
+
+        assert asyncio.run(handler()) == {"§25-2-491": "§25-2-491 text"}
+    finally:
+        server.close()
@@ -1,59 +1,13 @@
 """Unit tests for pdf.py."""
 import pytest
-import json
 import tempfile
 from pathlib import Path
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from parsers.pdf import (
-    load_cache, save_cache, find_code_sections,
-    extract_section_text
-)
-
-
-def test_load_cache(tmp_path, monkeypatch):
-    """Test loading cache."""
-    from parsers import pdf
-    
-    # Mock cache file path
-    cache_file = tmp_path / "cache" / "§-snippets.json"
-    cache_file.parent.mkdir(parents=True)
-    
-    cache_data = {"§25-2-492": "test text"}
-    with open(cache_file, 'w') as f:
-        json.dump(cache_data, f)
-    
-    original_cache_file = pdf.CACHE_FILE
-    pdf.CACHE_FILE = cache_file
-    
-    try:
-        cache = load_cache()
-        assert "§25-2-492" in cache
-    finally:
-        pdf.CACHE_FILE = original_cache_file
-
-
-def test_save_cache(tmp_path, monkeypatch):
-    """Test saving cache."""
-    from parsers import pdf
-    
-    cache_file = tmp_path / "cache" / "§-snippets.json"
-    cache_file.parent.mkdir(parents=True)
-    
-    original_cache_file = pdf.CACHE_FILE
-    pdf.CACHE_FILE = cache_file
-    
-    try:
-        cache = {"§25-2-492": "test text"}
-        save_cache(cache)
-        assert cache_file.exists()
-        
-        loaded = load_cache()
-        assert loaded == cache
-    finally:
-        pdf.CACHE_FILE = original_cache_file
+from parsers.pdf import find_code_sections, extract_section_text
+from tests.unit.pdf_helpers import make_pdf
 
 
 def test_find_code_sections():
@@ -81,3 +35,133 @@ def test_extract_section_text():
     assert "§25-2-492" in snippet
     assert "Setback requirements" in snippet
 
+
+def test_build_citation_index():
+    """Test one pass records page, line and snippet of each first citation."""
+    from parsers.pdf import build_citation_index
+    
+    pages = [
+        "Chapter 25-2\n§25-2-491 SF-2 district\nLot size: 5750",
+        "Intro\n§25-2-492 Setbacks, see §25-2-491\nFront: 25\nSide: 5",
+    ]
+    index = build_citation_index(pages, context_lines=1)
+    assert index["§25-2-491"] == {"page": 1, "line": 1, "snippet": "§25-2-491 SF-2 district\nLot size: 5750"}
+    assert index["§25-2-492"]["page"] == 2
+    assert index["§25-2-492"]["line"] == 1
+    assert index["§25-2-492"]["snippet"] == "§25-2-492 Setbacks, see §25-2-491\nFront: 25"
+    # Snippets continue onto the next page
+    assert build_citation_index(pages, context_lines=2)["§25-2-491"]["snippet"].endswith("Intro")
+
+
+def test_citation_index_keyed_by_content(tmp_path, monkeypatch):
+    """Test PDFs are indexed once per content and a replaced PDF is re-indexed."""
+    from parsers import pdf
+    
+    pdf_file = tmp_path / "code.pdf"
+    pdf_file.write_bytes(b"v1")
+    index_file = tmp_path / "index.sqlite"
+    extracted = []
+    
+    def extract(paths, workers=None):
+        contents = {path: Path(path).read_bytes().decode() for path in paths}
+        extracted.extend(contents.values())
+        return {path: [f"§25-2-492 Setbacks {content}"] for path, content in contents.items()}
+    
+    monkeypatch.setattr(pdf, "extract_documents", extract)
+    assert pdf.lookup_citation("§25-2-492", str(pdf_file), index_file)["snippet"] == "§25-2-492 Setbacks v1"
+    assert pdf.lookup_citation("§25-2-500", str(pdf_file), index_file) is None
+    assert extracted == ["v1"]
+    
+    # Same name, new content
+    pdf_file.write_bytes(b"v2-replaced")
+    entry = pdf.lookup_citation("§25-2-492", str(pdf_file), index_file)
+    assert entry == {"page": 1, "line": 0, "snippet": "§25-2-492 Setbacks v2-replaced"}
+    assert extracted == ["v1", "v2-replaced"]
+
+
+def test_extract_documents_parallel(tmp_path, monkeypatch):
+    """Test page ranges of several PDFs fan out over processes, in page order."""
+    from parsers import pdf
+    
+    monkeypatch.setattr(pdf, "PAGES_PER_TASK", 2)
+    first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    make_pdf(first, [f"Page {i}" for i in range(5)])
+    make_pdf(second, ["Sec. 25-2-492 Setbacks"])
+    
+    documents = pdf.extract_documents([str(first), str(second)], workers=2, page_cache_dir=None)
+    assert [text.strip() for text in documents[str(first)]] == [f"Page {i}" for i in range(5)]
+    assert documents[str(second)][0].strip() == "Sec. 25-2-492 Setbacks"
+
+
+def test_extract_reuses_cached_unchanged_pages(tmp_path, monkeypatch):
+    """Test an amended PDF only re-extracts its changed pages."""
+    from parsers import pdf
+    
+    code = tmp_path / "code.pdf"
+    make_pdf(code, ["Page 0", "Page 1", "Page 2"])
+    extracted = []
+    extract_text = pdf._extract_page_text
+    
+    def record(page):
+        extracted.append(extract_text(page).strip())
+        return extracted[-1]
+    
+    monkeypatch.setattr(pdf, "_extract_page_text", record)
+    page_cache = tmp_path / "pages"
+    assert len(pdf.extract_pages_from_pdf(str(code), workers=1, page_cache_dir=page_cache)) == 3
+    assert extracted == ["Page 0", "Page 1", "Page 2"]
+    
+    make_pdf(code, ["Page 0", "Page 1 amended", "Page 2"])
+    pages = pdf.extract_pages_from_pdf(str(code), workers=1, page_cache_dir=page_cache)
+    assert extracted == ["Page 0", "Page 1", "Page 2", "Page 1 amended"]
+    assert pages == ["Page 0", "Page 1 amended", "Page 2"]
+
+
+def test_page_cache_keys_include_fonts(tmp_path):
+    """Test equal content streams drawn with different font encodings are cached apart."""
+    from parsers import pdf
+    
+    plain, remapped = tmp_path / "plain.pdf", tmp_path / "remapped.pdf"
+    make_pdf(plain, ["AAA"])
+    make_pdf(remapped, ["AAA"], font="<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                      "/Encoding << /Type /Encoding /Differences [65 /B] >> >>")
+    page_cache = tmp_path / "pages"
+    assert pdf.extract_pages_from_pdf(str(plain), workers=1, page_cache_dir=page_cache)[0].strip() == "AAA"
+    assert pdf.extract_pages_from_pdf(str(remapped), workers=1, page_cache_dir=page_cache)[0].strip() == "BBB"
+
+
+def test_extract_error_names_the_pdf(tmp_path):
+    """Test extraction errors report the offending file."""
+    from parsers import pdf
+    
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    with pytest.raises(IOError, match="broken.pdf"):
+        pdf.extract_documents([str(broken)], workers=1)
+
+
+def test_citation_index_concurrent_lookups(tmp_path, monkeypatch):
+    """Test concurrent lookups index each document once and read their own entries."""
+    from concurrent.futures import ThreadPoolExecutor
+    from parsers import pdf
+    
+    paths = []
+    for i in range(4):
+        paths.append(tmp_path / f"doc{i}.pdf")
+        paths[-1].write_bytes(f"doc{i}".encode())
+    index_file = tmp_path / "index.sqlite"
+    extracted = []
+    
+    def extract(pdf_paths, workers=None):
+        extracted.extend(pdf_paths)
+        return {path: [f"§25-2-49{Path(path).stem[-1]} {Path(path).stem}"] for path in pdf_paths}
+    
+    monkeypatch.setattr(pdf, "extract_documents", extract)
+    citations = [f"§25-2-49{i % 4}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        snippets = list(pool.map(
+            lambda citation: pdf.lookup_citation(citation, str(paths[int(citation[-1])]), index_file)["snippet"],
+            citations,
+        ))
+    assert snippets == [f"{citation} doc{citation[-1]}" for citation in citations]
+    assert sorted(extracted) == sorted(str(path) for path in paths)
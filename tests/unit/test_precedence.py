@@ -0,0 +1,162 @@
+"""Unit tests for precedence.py."""
+import json
+from datetime import date
+import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine.precedence import compile_precedence, load_precedence_table, build_answer_table
+from engine.apply_rules import compile_rules
+from engine.batch import resolve_batch
+from engine.dataset import load_jurisdiction_data
+
+
+ANSWERS_DIR = Path(__file__).parent.parent.parent / "ui" / "src" / "engine" / "answers"
+RULES = compile_rules({
+    "version": 1,
+    "jurisdiction": "austin_tx",
+    "zones": {
+        "SF-3": {"height_ft": 35, "far": 0.4, "lot_coverage_pct": 40,
+                 "setbacks_ft": {"front": 25, "side": 5, "rear": 10}},
+    },
+})
+
+
+def load_configs():
+    with open(ANSWERS_DIR / "config" / "overlays.json") as f:
+        overlays = json.load(f)
+    with open(ANSWERS_DIR / "config" / "exceptions.json") as f:
+        exceptions = json.load(f)
+    return overlays, exceptions
+
+
+def answers_by_intent(merged, row):
+    return {answer["intent"]: answer for answer in merged.answers(row)}
+
+
+def test_evaluate_overlays_and_exceptions():
+    """Test one batch pass covers overlay, exception and conflicting cases."""
+    table = compile_precedence(*load_configs(), [])
+    zones = ["SF-3"] * 4
+    merged = table.evaluate(
+        zones, RULES,
+        [["HD"], [], ["Neighborhood Plan"], []],
+        lot={"corner": np.array([False, True, False, False]),
+             "slope": np.array([np.nan, np.nan, 20.0, np.nan])},
+    )
+
+    historic = answers_by_intent(merged, 0)
+    assert historic["front_setback"]["value"] == 30
+    assert historic["front_setback"]["provenance"] == "overlay"
+    # min 30 does not bind on a 35 ft height
+    assert historic["max_height"]["value"] == 35
+    assert historic["max_height"]["provenance"] == "rule"
+
+    corner = answers_by_intent(merged, 1)
+    assert corner["front_setback"]["value"] == 20
+    assert corner["side_setback"]["value"] == 10
+    assert corner["side_setback"]["provenance"] == "exception"
+
+    # Overlay caps coverage at 35, steep slope exception at 25
+    conflict = answers_by_intent(merged, 2)
+    assert conflict["lot_coverage"]["status"] == "needs_review"
+    assert "value" not in conflict["lot_coverage"]
+    assert [s["type"] for s in conflict["lot_coverage"]["sources"]] == ["rule", "overlay", "exception"]
+
+    plain = answers_by_intent(merged, 3)
+    assert all(a["provenance"] == "rule" for a in plain.values())
+    # No district rule for min lot size
+    assert "min_lot_size" not in plain
+
+
+def test_evaluate_overrides():
+    """Test parcel overrides beat district overrides, settle conflicts and expire."""
+    citation = {"code_id": "austin_ldc_2024", "section": "25-2-492", "anchor": "(D)"}
+    overrides = [
+        {"district": "SF-3", "intent": "lot_coverage", "value": 33, "unit": "percent",
+         "citation": citation, "rationale": "District amendment"},
+        {"district": "SF-3", "intent": "lot_coverage", "value": 45, "unit": "percent",
+         "citation": citation, "rationale": "Variance", "scope": "parcel", "apn": "0204-050712"},
+        {"district": "SF-3", "intent": "front_setback", "value": 15, "unit": "ft",
+         "citation": citation, "rationale": "Expired", "expires": "2020-01-01"},
+    ]
+    table = compile_precedence(*load_configs(), overrides)
+    zones = ["SF-3", "SF-3"]
+    merged = table.evaluate(
+        zones, RULES, [["NP"], []],
+        lot={"slope": np.array([20.0, np.nan])},
+        apns=["0204050712", "0100000001"], today=date(2025, 1, 1),
+    )
+
+    parcel = answers_by_intent(merged, 0)
+    assert parcel["lot_coverage"]["status"] == "answered"
+    assert parcel["lot_coverage"]["value"] == 45
+    assert parcel["lot_coverage"]["provenance"] == "override"
+    assert parcel["lot_coverage"]["citations"] == [citation]
+    assert parcel["front_setback"]["value"] == 25
+
+    district = answers_by_intent(merged, 1)
+    assert district["lot_coverage"]["value"] == 33
+
+
+def test_trace_records_each_step():
+    """Test traces list rule, overlay and exception steps with expressions."""
+    table = compile_precedence(*load_configs(), [])
+    zones = ["SF-3", "SF-3"]
+    merged = table.evaluate(zones, RULES, [["HD"], ["NP"]],
+                            lot={"slope": np.array([np.nan, 20.0])})
+
+    trace = merged.trace(0, "front_setback", "austin")
+    assert trace["answer_id"] == "SF-3:front_setback"
+    assert [(s["type"], s["expr"], s["value"]) for s in trace["steps"]] == [
+        ("rule", "25", 25), ("overlay", "max(prev, 30)", 30)
+    ]
+    assert trace["provenance"] == "overlay"
+    assert trace["final_value"] == 30
+
+    conflict = merged.trace(1, "lot_coverage", "austin")
+    assert [s["id"] for s in conflict["steps"]] == ["rule.SF-3.lot_coverage", "overlay.NP", "exception.steep_slope"]
+    assert conflict["provenance"] == "conflict"
+    assert conflict["final_value"] is None
+
+    # Traces are only attached when asked for
+    assert "trace" not in merged.answers(0)[0]
+    assert merged.answers(0, "austin")[0]["trace"] == trace
+
+
+def test_load_precedence_table_missing_files(tmp_path):
+    """Test missing config files compile to an empty table."""
+    table = load_precedence_table(str(tmp_path / "overlays.json"), str(tmp_path / "exceptions.json"),
+                                  str(tmp_path / "overrides.json"))
+    merged = table.evaluate(["SF-3"], RULES, [["HD"]],
+                            lot={"corner": np.array([True])})
+    assert [a["provenance"] for a in merged.answers(0)] == ["rule"] * 5
+
+
+def test_build_answer_table():
+    """Test the {zone, intent, corner} table holds merged answers and their JSON."""
+    table = compile_precedence(*load_configs(), [])
+    answers = build_answer_table(table, RULES, "austin", today=date(2025, 1, 1))
+
+    assert len(answers) == 10
+    assert answers.answer("SF-3", "front_setback")["value"] == 25
+    corner = answers.answer("SF-3", "front_setback", corner_lot=True)
+    assert corner["value"] == 20
+    assert corner["provenance"] == "exception"
+    assert "sources" not in corner
+    assert json.loads(answers.payload("SF-3", "side_setback", True))["value"] == 10
+    assert answers.answer("SF-3", "min_lot_size") is None
+    assert answers.payload("MF-1", "front_setback") is None
+
+
+def test_batch_includes_merged_answers():
+    """Test batch results carry merged answers."""
+    base_dir = Path(__file__).parent.parent.parent
+    data = load_jurisdiction_data("austin", str(base_dir))
+    results = resolve_batch(data, [{"apn": "0204050712"}], "austin")
+
+    answers = {a["intent"]: a for a in results[0]["result"]["answers"]}
+    assert answers["front_setback"]["answer_id"] == "SF-2:front_setback"
+    assert answers["max_height"]["value"] == 30
@@ -0,0 +1,108 @@
+"""Unit tests for search.py."""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine import search
+from engine.dataset import JURISDICTIONS
+from parsers import pdf
+from engine.search import split_passages, parse_query, update_search_index, search_index
+from tests.unit.pdf_helpers import make_pdf
+
+
+def test_split_passages_by_section():
+    """Test passages break at section citations and carry the section across pages."""
+    passages = split_passages([
+        "Preamble\n§25-2-491 Setbacks\nFront yard\n§25-2-492 Height",
+        "Maximum height 35 feet",
+    ])
+    assert [(p["citation"], p["page"], p["line"]) for p in passages] == [
+        (None, 1, 0), ("§25-2-491", 1, 1), ("§25-2-492", 1, 3), ("§25-2-492", 2, 0)
+    ]
+    assert passages[1]["text"] == "§25-2-491 Setbacks\nFront yard"
+
+
+def test_parse_query():
+    """Test phrases stay quoted, terms are escaped and empty queries fail."""
+    assert parse_query('front "impervious cover"') == '"front" "impervious cover"'
+    assert parse_query('25-2-492 AND') == '"25-2-492" "AND"'
+    with pytest.raises(ValueError):
+        parse_query('  "" ')
+
+
+@pytest.fixture
+def page_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf, "PAGE_CACHE_DIR", tmp_path / "pages")
+    return tmp_path / "pages"
+
+
+def test_search_ranks_phrases_and_reindexes_changed_pdfs(tmp_path, page_cache):
+    """Test BM25 ranking, phrase queries and incremental rebuilds."""
+    code = tmp_path / "ldc.pdf"
+    make_pdf(code, [
+        "Sec. 25-2-491 Impervious cover limits for SF-2",
+        "Cover the trash bins. Impervious surfaces drain to the street.",
+        "Sec. 25-2-492 Front yard setback",
+    ])
+    index_file = tmp_path / "search.sqlite"
+    assert update_search_index([str(code)], index_file) == 1
+    assert update_search_index([str(code)], index_file) == 0
+
+    results = search_index('"impervious cover"', index_file)
+    assert [r["page"] for r in results] == [1]
+    assert results[0]["document"] == "ldc.pdf"
+    assert "[Impervious cover]" in results[0]["snippet"]
+    assert {r["page"] for r in search_index("impervious cover", index_file)} == {1, 2}
+
+    make_pdf(code, ["Sec. 25-2-493 Rear yard setback"])
+    assert update_search_index([str(code)], index_file) == 1
+    assert search_index("impervious", index_file) == []
+    assert [r["page"] for r in search_index("rear setback", index_file)] == [1]
+
+    assert update_search_index([], index_file) == 0
+    assert search_index("rear", index_file) == []
+
+
+def test_search_code_returns_section_citations(tmp_path, monkeypatch, page_cache):
+    """Test results from a jurisdiction's code PDFs carry the section they fall under."""
+    monkeypatch.setattr(search, "SEARCH_INDEX_DIR", tmp_path / "search")
+    monkeypatch.setitem(JURISDICTIONS["austin"], "code_pdfs", ["pdfs/ldc.pdf"])
+    (tmp_path / "pdfs").mkdir()
+    make_pdf(tmp_path / "pdfs" / "ldc.pdf", [
+        "§25-2-491 Impervious cover limits",
+        "§25-2-492 Front yard setback of 25 feet",
+        "Corner lots also keep a street side yard setback",
+    ])
+
+    results = search.search_code("austin", "setback", str(tmp_path))
+    assert {(r["citation"], r["page"]) for r in results} == {("§25-2-492", 2), ("§25-2-492", 3)}
+    assert search.search_code("austin", "impervious", str(tmp_path))[0]["citation"] == "§25-2-491"
+
+
+def test_search_code_without_pdfs(tmp_path, monkeypatch):
+    """Test a jurisdiction without code PDFs searches an empty index."""
+    monkeypatch.setattr(search, "SEARCH_INDEX_DIR", tmp_path)
+    assert search.search_code("austin", "setback", str(Path(__file__).parent.parent.parent)) == []
+
+
+def test_search_code_indexes_each_data_dir_separately(tmp_path, monkeypatch, page_cache):
+    """Test alternating data dirs of one city never re-extract each other's PDFs."""
+    monkeypatch.setattr(search, "SEARCH_INDEX_DIR", tmp_path / "search")
+    monkeypatch.setitem(JURISDICTIONS["austin"], "code_pdfs", ["ldc.pdf"])
+    extracted = []
+    extract_documents = search.extract_documents
+
+    def record(pdf_paths, workers=None):
+        extracted.extend(pdf_paths)
+        return extract_documents(pdf_paths, workers)
+
+    monkeypatch.setattr(search, "extract_documents", record)
+    for name in ["alpha", "bravo"]:
+        (tmp_path / name).mkdir()
+        make_pdf(tmp_path / name / "ldc.pdf", [f"§25-2-492 Setback in {name}"])
+    for name in ["alpha", "bravo", "alpha", "bravo"]:
+        results = search.search_code("austin", "setback", str(tmp_path / name))
+        assert len(results) == 1 and name in results[0]["snippet"]
+    assert sorted(extracted) == [str(tmp_path / "alpha" / "ldc.pdf"), str(tmp_path / "bravo" / "ldc.pdf")]
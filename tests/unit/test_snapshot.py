@@ -0,0 +1,136 @@
+"""Unit tests for snapshot.py."""
+import multiprocessing
+import pytest
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import Point, Polygon, MultiPolygon
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from parsers.snapshot import write_layer, read_layer, write_table, load_layer, compile_layer, load_manifest
+
+
+def _write_geojson(path, gdf):
+    path.write_text(gdf.to_json())
+
+
+def test_write_read_layer_roundtrip(tmp_path):
+    """Test polygon layer round-trips through ragged coordinate arrays."""
+    gdf = gpd.GeoDataFrame({
+        'APN': ['001', '002'],
+        'area': [1.5, 2.5],
+        'geometry': [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            Polygon([(2, 2), (3, 2), (3, 3), (2, 3)])
+        ]
+    }, crs='EPSG:2277')
+
+    entry = write_layer(gdf, str(tmp_path), "parcels")
+    assert entry["geometry"]["encoding"] == "ragged"
+
+    loaded = read_layer(str(tmp_path), "parcels")
+    assert loaded.crs == gdf.crs
+    assert list(loaded['APN']) == ['001', '002']
+    assert list(loaded['area']) == [1.5, 2.5]
+    assert loaded.geom_equals(gdf).all()
+
+
+def test_write_read_layer_polygons_and_multipolygons(tmp_path):
+    """Test polygon/multipolygon layers with missing geometries stay on ragged arrays."""
+    gdf = gpd.GeoDataFrame({
+        'name': ['a', None, 'c', 'd'],
+        'geometry': [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            MultiPolygon([Polygon([(2, 2), (3, 2), (3, 3), (2, 3)])]),
+            None,
+            Polygon(),
+        ]
+    }, crs='EPSG:2277')
+
+    entry = write_layer(gdf, str(tmp_path), "overlay:Floodplain")
+    assert entry["geometry"]["encoding"] == "ragged"
+
+    loaded = read_layer(str(tmp_path), "overlay:Floodplain")
+    assert loaded.geometry.iloc[0].geom_type == 'Polygon'
+    assert loaded.geometry.iloc[1].geom_type == 'MultiPolygon'
+    assert loaded.geometry.iloc[2] is None
+    assert loaded.geometry.iloc[3].geom_type == 'Polygon' and loaded.geometry.iloc[3].is_empty
+    assert loaded.geometry.iloc[:2].geom_equals(gdf.geometry.iloc[:2]).all()
+    assert loaded['name'].isna().tolist() == [False, True, False, False]
+
+
+def test_write_read_layer_mixed_geometries(tmp_path):
+    """Test genuinely mixed geometry types fall back to WKB."""
+    gdf = gpd.GeoDataFrame({
+        'name': ['a', 'b', 'c'],
+        'geometry': [
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            Point(5, 5),
+            None,
+        ]
+    }, crs='EPSG:2277')
+
+    entry = write_layer(gdf, str(tmp_path), "overlay:Mixed")
+    assert entry["geometry"]["encoding"] == "wkb"
+
+    loaded = read_layer(str(tmp_path), "overlay:Mixed")
+    assert loaded.geometry.iloc[:2].geom_equals(gdf.geometry.iloc[:2]).all()
+    assert loaded.geometry.iloc[2] is None
+
+
+def test_load_layer_uses_fresh_snapshot_only(tmp_path):
+    """Test snapshot is used when current and ignored once the source changes."""
+    source = tmp_path / "parcels.geojson"
+    gdf = gpd.GeoDataFrame({'APN': ['001'], 'geometry': [Point(-97.7431, 30.2672)]}, crs='EPSG:4326')
+    _write_geojson(source, gdf)
+    derived = tmp_path / "derived"
+
+    compile_layer(str(source), "EPSG:2277", str(derived), "parcels")
+    assert "parcels" in load_manifest(str(derived))["layers"]
+
+    loaded = load_layer(str(source), "EPSG:2277", str(derived), "parcels")
+    assert loaded.crs.to_epsg() == 2277
+    assert loaded.geometry.iloc[0].x > 1_000_000
+
+    # Different CRS requested: snapshot not used
+    loaded = load_layer(str(source), "EPSG:4326", str(derived), "parcels")
+    assert loaded.geometry.iloc[0].x == pytest.approx(-97.7431)
+
+    # Source changed: snapshot is stale
+    gdf['APN'] = ['002']
+    _write_geojson(source, gdf)
+    loaded = load_layer(str(source), "EPSG:2277", str(derived), "parcels")
+    assert loaded['APN'].iloc[0] == '002'
+
+
+def test_recompile_publishes_new_dir_and_prunes_old_ones(tmp_path):
+    """Test each compile gets its own dir and only the previous one is kept."""
+    dirs = []
+    for value in ['a', 'b', 'c']:
+        gdf = gpd.GeoDataFrame({'name': [value], 'geometry': [Point(0, 0)]}, crs='EPSG:2277')
+        dirs.append(write_layer(gdf, str(tmp_path), "zoning")["dir"])
+
+    assert len(set(dirs)) == 3
+    assert load_manifest(str(tmp_path))["layers"]["zoning"]["dir"] == dirs[2]
+    assert list(read_layer(str(tmp_path), "zoning")['name']) == ['c']
+    assert not (tmp_path / dirs[0]).exists()
+    assert (tmp_path / dirs[1]).exists()
+
+
+def _write_tables(derived_dir, prefix):
+    for i in range(10):
+        write_table(pd.DataFrame({'value': [i]}), derived_dir, f"{prefix}{i}", sources={})
+
+
+def test_concurrent_processes_keep_every_manifest_entry(tmp_path):
+    """Test manifest updates from separate processes never drop each other's entries."""
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_tables, args=(str(tmp_path), prefix)) for prefix in "ab"]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    assert set(load_manifest(str(tmp_path))["tables"]) == {f"{p}{i}" for p in "ab" for i in range(10)}
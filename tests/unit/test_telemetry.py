@@ -0,0 +1,113 @@
+"""Unit tests for engine/telemetry.py."""
+import json
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from engine import telemetry
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    telemetry.shutdown()
+    telemetry.reset_metrics()
+    monkeypatch.setattr(telemetry, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(telemetry, "FLUSH_INTERVAL_S", 0)
+    yield tmp_path
+    telemetry.reset_metrics()
+    telemetry.shutdown()
+
+
+def read_records(log_dir):
+    telemetry.shutdown()
+    lines = [line for path in log_dir.glob("*.log") for line in path.read_text().splitlines()]
+    return [json.loads(line) for line in lines]
+
+
+def test_metrics_aggregate_without_per_event_logs(log_dir, monkeypatch):
+    """Test counters and timers aggregate in memory and flush as one record."""
+    monkeypatch.setattr(telemetry, "EVENT_LOGS", False)
+    for _ in range(10_000):
+        telemetry.incr("parcels_processed")
+    telemetry.set_gauge("queue_depth", 3)
+    for _ in range(3):
+        telemetry.start_timer("lookup")
+        telemetry.stop_timer("lookup")
+    telemetry.log("info", "Batch done")
+
+    snapshot = telemetry.flush_metrics()
+    assert snapshot["metrics"] == {"parcels_processed": 10_000, "queue_depth": 3}
+    assert snapshot["timers"]["lookup"]["count"] == 3
+    assert telemetry.flush_metrics() is None
+    assert telemetry.emit_metrics()["timers"]["lookup"]["count"] == 3
+
+    records = read_records(log_dir)
+    assert [r["message"] for r in records] == ["Batch done", "Metrics flushed"]
+    assert records[1]["metrics"]["parcels_processed"] == 10_000
+
+
+def test_periodic_flush(log_dir, monkeypatch):
+    """Test aggregates flush once the interval has passed."""
+    monkeypatch.setattr(telemetry, "EVENT_LOGS", False)
+    monkeypatch.setattr(telemetry, "FLUSH_INTERVAL_S", 1e-9)
+    telemetry.incr("rules_applied")
+    assert [r["message"] for r in read_records(log_dir)] == ["Metrics flushed"]
+
+
+def test_debug_sampling(log_dir, monkeypatch):
+    """Test DEBUG records are sampled and warnings never are."""
+    monkeypatch.setattr(telemetry, "EVENT_LOGS", True)
+    monkeypatch.setattr(telemetry, "DEBUG_SAMPLE_RATE", 0.0)
+    telemetry.incr("parcels_processed")
+    telemetry.stop_timer("missing")
+    assert [r["level"] for r in read_records(log_dir)] == ["WARNING"]
+
+
+def test_spans_nest_per_request(log_dir):
+    """Test nested spans form one tree per request span."""
+    with telemetry.request_span("zoning", city="austin") as root:
+        telemetry.start_timer("data_load")
+        telemetry.stop_timer("data_load")
+        with telemetry.span("parcel_lookup"):
+            with telemetry.span("zone_intersection"):
+                pass
+        assert telemetry.current_span() is root
+    assert telemetry.current_span() is None
+
+    tree = root.to_dict()
+    assert tree["name"] == "zoning"
+    assert tree["city"] == "austin"
+    assert [child["name"] for child in tree["children"]] == ["data_load", "parcel_lookup"]
+    assert tree["children"][1]["children"][0]["name"] == "zone_intersection"
+    assert tree["duration_ms"] >= tree["children"][1]["duration_ms"]
+    assert telemetry.emit_metrics()["timers"]["parcel_lookup"]["count"] == 1
+
+
+def test_concurrent_timers_do_not_interfere(log_dir, monkeypatch):
+    """Test same-named timers in concurrent threads time their own work."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Each thread gets its own clock, advanced by the "work" it does
+    clock = threading.local()
+    monkeypatch.setattr(telemetry.time, "perf_counter_ns", lambda: getattr(clock, "ns", 0))
+    barrier = threading.Barrier(4)
+
+    def request(delay_ms):
+        clock.ns = 0
+        with telemetry.request_span("zoning") as root:
+            telemetry.start_timer("parcel_lookup")
+            # All four same-named timers are open at once
+            barrier.wait()
+            clock.ns += delay_ms * 1_000_000
+            elapsed = telemetry.stop_timer("parcel_lookup")
+        return elapsed, root.to_dict()
+
+    delays_ms = [0, 50, 100, 150]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(request, delays_ms))
+    for delay_ms, (elapsed, tree) in zip(delays_ms, results):
+        assert elapsed == pytest.approx(delay_ms / 1000)
+        assert [child["name"] for child in tree["children"]] == ["parcel_lookup"]
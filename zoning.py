@@ -4,125 +4,85 @@ import argparse
 import json
 import sys
 import time
-from pathlib import Path
 from typing import Optional, Tuple
 
-from parsers.geo import load_geofile, find_parcel_by_apn, find_nearest_parcel
+from parsers.geo import find_parcel_by_apn, locate_parcel
 from parsers.pdf import get_citation_snippet
 from parsers.llm import parse_pdf_with_llm
-from engine.geom import intersect_zone, detect_overlays, is_corner_lot
-from engine.apply_rules import load_rules, get_zone_rules, apply_zone_rules, get_overlay_rules, get_crs_config
-from engine.schemas import create_output_schema, validate_output_schema
+from engine.apply_rules import get_zone_rules
+from engine.geom import intersect_zone_shares, detect_overlays, is_corner_lot
+from engine.schemas import create_output_schema, validate_output_schema, format_jurisdiction_name
+from engine.dataset import get_jurisdiction_data
+from engine.jurisdictions import resolve_jurisdiction
+from engine.envelope import compute_envelope, envelope_summary
+from engine.precedence import parcel_answers
 from engine.telemetry import (
     emit_metrics,
+    end_span,
     incr,
     log,
     set_gauge,
+    start_span,
     start_timer,
     stop_timer,
 )
 
 
-# Jurisdiction configuration
-JURISDICTIONS = {
-    "austin": {
-        "parcel_layer": "data/austin/parcels.geojson",
-        "zoning_layer": "data/austin/zoning.geojson",
-        "overlay_layers": {},
-        "code_pdfs": [],
-        "rules_file": "rules/austin.yaml"
-    }
-}
-
-
 def parse_args():
     """Parse CLI arguments."""
     parser = argparse.ArgumentParser(description="Zoning Intelligence CLI")
     input_group = parser.add_mutually_exclusive_group(required=True)
     input_group.add_argument("--apn", help="APN (parcel ID)")
     input_group.add_argument("--lat-lng", help="Latitude,Longitude (e.g., 30.2672,-97.7431)")
-    parser.add_argument("--city", required=True, help="City/jurisdiction (e.g., austin)")
+    parser.add_argument("--city", help="City/jurisdiction (e.g., austin); resolved from the APN or lat-lng if omitted")
     parser.add_argument("--data-dir", default=".", help="Data directory (default: current dir)")
     parser.add_argument("--out", required=True, help="Output JSON file")
     parser.add_argument("--verbose", action="store_true", help="Verbose logging")
     parser.add_argument("--offline", action="store_true", help="Offline mode (use cached data only)")
     parser.add_argument("--llm", action="store_true", help="Enable LLM PDF parsing")
+    parser.add_argument("--max-distance-ft", type=float, default=None,
+                        help="Max snap distance (ft) for points outside every parcel (default: from rules)")
+    parser.add_argument("--trace", action="store_true", help="Include step-by-step traces in answers")
     return parser.parse_args()
 
 
-def load_jurisdiction_data(city: str, data_dir: str, verbose: bool = False):
-    """Load all data layers for jurisdiction."""
-    if city not in JURISDICTIONS:
-        raise ValueError(f"Unknown jurisdiction: {city}")
-    
-    config = JURISDICTIONS[city]
-    base_path = Path(data_dir)
-    
-    # Load rules
-    rules_path = base_path / config["rules_file"]
-    rules = load_rules(str(rules_path))
-    crs_config = get_crs_config(rules)
-    
-    if verbose:
-        print(f"Loaded rules from {rules_path}")
-        print(f"CRS: {crs_config['input']} -> {crs_config['internal']}")
-    
-    # Load parcel layer
-    parcel_path = base_path / config["parcel_layer"]
-    parcels = load_geofile(str(parcel_path), target_crs=crs_config["internal"])
-    if verbose:
-        print(f"Loaded {len(parcels)} parcels from {parcel_path}")
-    
-    # Load zoning layer
-    zoning_path = base_path / config["zoning_layer"]
-    zoning = load_geofile(str(zoning_path), target_crs=crs_config["internal"])
-    if verbose:
-        print(f"Loaded {len(zoning)} zoning districts from {zoning_path}")
-    
-    # Load overlay layers
-    overlay_gdfs = {}
-    for overlay_name, overlay_path in config.get("overlay_layers", {}).items():
-        overlay_full_path = base_path / overlay_path
-        if overlay_full_path.exists():
-            overlay_gdfs[overlay_name] = load_geofile(str(overlay_full_path), target_crs=crs_config["internal"])
-            if verbose:
-                print(f"Loaded overlay {overlay_name} from {overlay_full_path}")
-    
-    return {
-        "rules": rules,
-        "crs_config": crs_config,
-        "parcels": parcels,
-        "zoning": zoning,
-        "overlay_gdfs": overlay_gdfs,
-        "config": config,
-        "base_path": base_path
-    }
-
+def find_parcel(data: dict, apn: Optional[str], lat_lng: Optional[Tuple[float, float]], verbose: bool = False,
+                max_distance: Optional[float] = None):
+    """
+    Find parcel by APN or lat/lng.
 
-def find_parcel(data: dict, apn: Optional[str], lat_lng: Optional[Tuple[float, float]], verbose: bool = False):
-    """Find parcel by APN or lat/lng."""
+    Returns:
+        Tuple of (parcel, APN, match info); match info is None for APN lookups
+    """
     parcels = data["parcels"]
     crs_config = data["crs_config"]
     
     if apn:
-        parcel = find_parcel_by_apn(parcels, apn)
+        parcel = find_parcel_by_apn(parcels, apn, index=data.get("apn_index"))
         if parcel is None:
             raise ValueError(f"Parcel not found for APN: {apn}")
         if verbose:
             print(f"Found parcel: {apn}")
-        return parcel, apn
+        return parcel, parcel.get("APN", apn), None
     else:
         lat, lng = lat_lng
-        parcel = find_nearest_parcel(parcels, lat, lng, 
-                                    source_crs=crs_config["input"],
-                                    target_crs=crs_config["internal"])
-        if parcel is None:
+        if max_distance is None:
+            max_distance = data.get("lookup_config", {}).get("max_snap_distance_ft")
+        position, match = locate_parcel(parcels, lat, lng,
+                                        source_crs=crs_config["input"],
+                                        target_crs=crs_config["internal"],
+                                        max_distance=max_distance)
+        if position is None:
+            if max_distance is not None:
+                raise ValueError(f"No parcel found within {max_distance} ft of {lat},{lng}")
             raise ValueError(f"No parcel found near {lat},{lng}")
+        parcel = parcels.iloc[position]
         # Get APN from parcel
         apn = parcel.get("APN", "UNKNOWN")
         if verbose:
-            print(f"Found nearest parcel: {apn} at {lat},{lng}")
-        return parcel, apn
+            print(f"Found parcel: {apn} at {lat},{lng} ({match['method']}, "
+                  f"{match['snap_distance_ft']:.1f} ft)")
+        return parcel, apn, match
 
 
 def main():
@@ -130,17 +90,11 @@ def main():
     start_time = time.time()
     args = parse_args()
     
-    # Initialize telemetry
-    start_timer("total_runtime")
+    # Initialize telemetry (stage timers nest under this span)
+    run_span = start_span("total_runtime")
     log("info", "Zoning CLI started", apn=args.apn, lat_lng=args.lat_lng, city=args.city)
     
     try:
-        # Load jurisdiction data
-        start_timer("data_load")
-        data = load_jurisdiction_data(args.city, args.data_dir, args.verbose)
-        data_load_ms = stop_timer("data_load") * 1000
-        log("info", "Data loaded", data_load_ms=data_load_ms)
-        
         # Parse input
         lat_lng = None
         if args.lat_lng:
@@ -150,16 +104,40 @@ def main():
             except ValueError:
                 sys.exit(f"Invalid lat-lng format: {args.lat_lng}")
         
+        # Resolve the jurisdiction from the APN or point when not given
+        if args.city is None:
+            args.city = resolve_jurisdiction(args.data_dir, apn=args.apn, lat_lng=lat_lng)
+            if args.verbose:
+                print(f"Resolved jurisdiction: {args.city}")
+        
+        # Load jurisdiction data
+        start_timer("data_load")
+        data = get_jurisdiction_data(args.city, args.data_dir, args.verbose)
+        data_load_ms = stop_timer("data_load") * 1000
+        log("info", "Data loaded", data_load_ms=data_load_ms)
+        
         # Find parcel
         start_timer("parcel_lookup")
-        parcel, apn = find_parcel(data, args.apn, lat_lng, args.verbose)
+        # APN lookups are a keyed read on the precomputed join table when available
+        joined = None
+        parcel_match = None
+        if args.apn and data.get("parcel_join") is not None:
+            joined = data["parcel_join"].lookup(args.apn)
+        if joined is not None:
+            apn = joined["apn"]
+        else:
+            parcel, apn, parcel_match = find_parcel(data, args.apn, lat_lng, args.verbose,
+                                                    max_distance=args.max_distance_ft)
         parcel_lookup_ms = stop_timer("parcel_lookup") * 1000
         incr("parcels_processed")
         log("info", "Parcel found", parcel_lookup_ms=parcel_lookup_ms, apn=apn)
         
         # Get zone
         start_timer("rules_application")
-        zone = intersect_zone(parcel, data["zoning"])
+        if joined is not None:
+            zone, zone_fractions = joined["zone"], joined["zone_fractions"]
+        else:
+            zone, zone_fractions = intersect_zone_shares(parcel, data["zoning"])
         if zone is None:
             zone = "UNKNOWN"
             incr("warnings_count")
@@ -168,22 +146,35 @@ def main():
                 print("Warning: No zone intersection found")
         
         # Get zone rules
-        zone_rules = get_zone_rules(data["rules"], zone)
-        if zone_rules is None:
+        rules_table = data["rules_table"]
+        if rules_table.constraints(zone) is None:
             incr("errors_count")
             log("error", "No rules found for zone", zone=zone)
             raise ValueError(f"No rules found for zone: {zone}")
         
         # Detect corner lot
-        corner_lot = is_corner_lot(parcel)
+        if joined is not None:
+            corner_lot = joined["corner_lot"]
+        else:
+            corner_lot = is_corner_lot(parcel, data["street_buffer_ft"], streets=data["streets"])
         
-        # Apply zone rules
-        zone_constraints = apply_zone_rules(zone_rules, corner_lot)
+        # Apply zone rules (precompiled per zone and corner-lot case)
+        zone_constraints = rules_table.constraints(zone, corner_lot)
         incr("rules_applied")
         
         # Detect overlays
-        overlays = detect_overlays(parcel, data["overlay_gdfs"])
-        overlay_rules = get_overlay_rules(data["rules"], overlays)
+        overlays = joined["overlays"] if joined is not None else detect_overlays(parcel, data["overlay_layer"])
+        overlay_notes = rules_table.overlay_notes(overlays)
+        
+        # Buildable envelope on the parcel polygon
+        attributes = parcel if joined is None else None
+        if joined is not None:
+            parcel = data["parcels"].geometry.values[joined["position"]]
+        envelope = envelope_summary(compute_envelope(parcel, zone_constraints))
+        
+        # Rule answers merged with overlay, exception and override adjustments
+        answers = parcel_answers(data, zone, overlays, corner_lot, apn, attributes,
+                                 trace_jurisdiction=args.city if args.trace else None)
         rules_ms = stop_timer("rules_application") * 1000
         log("info", "Rules applied", rules_ms=rules_ms, zone=zone)
         
@@ -191,8 +182,7 @@ def main():
         notes_parts = []
         if corner_lot:
             notes_parts.append("Corner lot; street-side setback applied")
-        if overlay_rules.get("notes"):
-            notes_parts.extend(overlay_rules["notes"])
+        notes_parts.extend(overlay_notes)
         notes = "; ".join(notes_parts) if notes_parts else ""
         
         # Get PDF citations (stub for MVP)
@@ -203,25 +193,26 @@ def main():
         # Add code citations if PDFs available
         pdf_paths = [str(data["base_path"] / pdf) for pdf in data["config"].get("code_pdfs", [])]
         if pdf_paths and not args.offline:
-            # Try to get a citation (stub)
-            citation = "§25-2-492"  # Example citation
+            # Citations to look up: the example section plus the zone's own
+            citations = ["§25-2-492"]  # Example citation
+            zone_section = (get_zone_rules(data["rules"], zone) or {}).get("code_section")
+            if zone_section and f"§{zone_section}" not in citations:
+                citations.append(f"§{zone_section}")
             if args.llm:
-                snippet = parse_pdf_with_llm(pdf_paths[0] if pdf_paths else None, citation)
+                # One extract() call so the citations share batches and the cache
+                snippets = parse_pdf_with_llm(pdf_paths[0], citations)
             else:
-                snippet = get_citation_snippet(citation, pdf_paths, use_cache=True)
-            if snippet:
-                sources.append({"type": "code", "cite": citation})
+                snippets = {citation: get_citation_snippet(citation, pdf_paths, use_cache=True)
+                            for citation in citations}
+            for citation in citations:
+                if snippets[citation]:
+                    sources.append({"type": "code", "cite": citation})
         
         # Build output
         start_timer("output_write")
         run_ms = (time.time() - start_time) * 1000
         # Format jurisdiction: "austin_tx" -> "Austin, TX"
-        jurisdiction_raw = data["rules"].get("jurisdiction", args.city)
-        if "_" in jurisdiction_raw:
-            parts = jurisdiction_raw.split("_")
-            jurisdiction_name = f"{parts[0].title()}, {parts[1].upper()}"
-        else:
-            jurisdiction_name = jurisdiction_raw.title()
+        jurisdiction_name = format_jurisdiction_name(data["rules"].get("jurisdiction", args.city))
         
         output = create_output_schema(
             apn=apn,
@@ -234,7 +225,11 @@ def main():
             overlays=overlays,
             sources=sources,
             notes=notes,
-            run_ms=run_ms
+            run_ms=run_ms,
+            parcel_match=parcel_match,
+            zone_fractions=zone_fractions,
+            envelope=envelope,
+            answers=answers
         )
         
         # Validate output
@@ -248,8 +243,9 @@ def main():
         log("info", "Output written", output_file=args.out, output_write_ms=output_write_ms)
         
         # Emit metrics
-        total_runtime_ms = stop_timer("total_runtime") * 1000
+        total_runtime_ms = end_span(run_span) * 1000
         set_gauge("total_runtime_ms", total_runtime_ms)
+        log("info", "Run completed", total_runtime_ms=total_runtime_ms, spans=run_span.to_dict())
         
         # Emit metrics to file if requested
         metrics_path = args.out.replace(".json", "_metrics.json")
@@ -10,7 +10,7 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from zoning.engine.telemetry import emit_metrics
+from engine.telemetry import emit_metrics
 
 
 def main():